@@ -1,164 +1,189 @@
+import time
 import streamlit as st
-import pandas as pd
 import zipfile
-import io
-import json
-from langchain.output_parsers import ResponseSchema, StructuredOutputParser
-from groq import Groq
 # import win32com.client
-import time
-
-# Define individual schemas for each resume detail
-name_schema = ResponseSchema(
-    name="Name",
-    description="Extract the full name from the resume text."
-)
-
-mailid_schema = ResponseSchema(
-    name="Mail ID",
-    description="Extract the email ID from the resume text."
-)
-
-linkedin_schema = ResponseSchema(
-    name="LinkedIn",
-    description="Extract the LinkedIn profile URL from the resume text."
-)
-
-workexp_schema = ResponseSchema(
-    name="Work Experience",
-    description="Extract all organization names where the person has worked, along with the number of years or months worked there and the designations held, and output them as a comma-separated Python list."
-)
-
-companydetails_schema = ResponseSchema(
-    name="Company Details",
-    description="Extract all company names and details where the person has worked, and output them as a comma-separated Python list."
-)
-
-technical_skills_schema = ResponseSchema(
-    name="Technical Skills",
-    description="Extract all technical skills mentioned in the resume text and output them as a comma-separated Python list."
-)
-
-soft_skills_schema = ResponseSchema(
-    name="Soft Skills",
-    description="Extract all soft skills mentioned in the resume text and output them as a comma-separated Python list."
-)
-
-projects_schema = ResponseSchema(
-    name="Projects",
-    description="Extract all project titles mentioned in the resume text and output them as a comma-separated Python list."
-)
-
-# Combine all schemas into a list
-response_schemas = [
-    name_schema,
-    mailid_schema,
-    linkedin_schema,
-    workexp_schema,
-    companydetails_schema,
-    technical_skills_schema,
-    soft_skills_schema,
-    projects_schema
-]
-
-# Create the output parser using the response schemas
-output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
-
-# Get the format instructions
-format_instructions = output_parser.get_format_instructions()
-
-def extract_text_from_docx(docx_file):
-    import docx
-    doc = docx.Document(io.BytesIO(docx_file.read()))
-    text = [para.text for para in doc.paragraphs]
-    return '\n'.join(text)
-
-# def extract_text_from_doc(doc_path):
-#     word = win32com.client.Dispatch("Word.Application")
-#     doc = word.Documents.Open(doc_path)
-#     text = doc.Content.Text
-#     doc.Close(False)
-#     word.Quit()
-#     return text
-
-def extract_text_from_pdf(pdf_file):
-    from PyPDF2 import PdfReader
-    pdf_text = []
-    reader = PdfReader(io.BytesIO(pdf_file.read()))
-    for page in reader.pages:
-        pdf_text.append(page.extract_text())
-    return '\n'.join(pdf_text)
-
-def extract_text_from_resume(file):
-    if file.name.endswith('.docx'):
-        return extract_text_from_docx(file)
-    # elif file.name.endswith('.doc'):
-    #     return extract_text_from_doc(file)
-    elif file.name.endswith('.pdf'):
-        return extract_text_from_pdf(file)
-    else:
-        raise ValueError(f"Unsupported file format: {file.name}")
-
-def process_resumes(resumes_text):
-    all_rows = []
-    csv_file = 'combined_employee_data.csv'
-    for filename, text in resumes_text.items():
-        prompt_template = f'''
-        You are an AI bot designed to act as a professional for parsing resumes.
-        You are given a resume, and your job is to extract the following information from it without adding any additional text:
-        1. Full name
-        2. Email ID
-        3. LinkedIn profile
-        4. Employment details
-        5. Technical skills
-        6. Soft skills
-        7. Projects
-        Give the extracted information in the following format: {format_instructions}
-
-        Resume:
-        {text}
-        '''
-        api_key=st.secrets["groq"]["api_key"]
-        client = Groq(api_key=api_key)
-
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "system",
-                    "content": prompt_template,
-                }
-            ],
-            temperature=0.4,
-            model="llama3-70b-8192",
+import app_profile
+from candidate_index import INDEX_PATH, CandidateIndex
+from job_queue import QUEUE_PATH, JobQueue
+from metrics import merge_snapshots, tier_report
+from result_sink import SOURCE_COLUMN
+
+PROFILE_NAME = 'app'
+# Seconds between progress refreshes while a job is running
+POLL_SECONDS = 2
+# Most search results shown at once
+SEARCH_LIMIT = 100
+
+def read_uploaded_resumes(uploaded_files):
+    for file in uploaded_files:
+        if file.name.endswith('.zip'):
+            with zipfile.ZipFile(file, 'r') as zip_ref:
+                for zip_info in zip_ref.infolist():
+                    if zip_info.filename.endswith(('.docx', '.pdf')):
+                        with zip_ref.open(zip_info) as extracted_file:
+                            yield zip_info.filename, extracted_file.read()
+        else:
+            yield file.name, file.read()
+
+def submit_job(job_queue, files, batch_mode=False):
+    """
+    Queues the uploaded resumes for the background workers and remembers the job in this session.
+    """
+    job_id = job_queue.submit(files, PROFILE_NAME, batch_mode)
+    st.session_state.setdefault('job_ids', []).append(job_id)
+    return job_id
+
+def show_job(job_queue, job_id):
+    # pandas is only imported once there is something to show, keeping the first page load fast
+    import pandas as pd
+    progress = job_queue.progress(job_id)
+    if progress is None:
+        return None
+    finished = progress['done'] + progress['failed']
+    st.write(f"### Job {job_id}")
+    st.progress(finished / progress['total'] if progress['total'] else 1.0)
+    st.caption(
+        f"{finished}/{progress['total']} resumes ({progress['failed']} failed, {progress['running']} in progress) "
+        f"· {progress['per_minute']:.1f} resumes/min · queued {progress['queued_seconds']:.0f}s"
+        + first_result_caption(progress)
+    )
+    results = job_queue.results(job_id)
+    if results:
+        cache_hits = sum(result['cache_hit'] for result in results)
+        st.caption(f"Cache hits: {cache_hits}/{len(results)} ({cache_hits / len(results):.0%})")
+    # Resumes still streaming in show the fields that have arrived so far
+    partial = [] if progress['finished'] else job_queue.partial_rows(job_id)
+    rows = []
+    token_savings = []
+    for result in results:
+        if result['row'] is None:
+            st.warning(f"Skipped {result['filename']}: {result['error']}")
+            continue
+        rows.append((result['position'], {SOURCE_COLUMN: result['filename'], **result['row']}))
+        token_savings.append({
+            'File': result['filename'],
+            'Trimmed Tokens': result['trimmed_tokens'],
+            'Batching Tokens Saved': result['tokens_saved'],
+        })
+    duplicates = [result for result in results if result['duplicate_of']]
+    if duplicates:
+        with st.expander(f"{len(duplicates)} duplicate resumes"):
+            st.dataframe(pd.DataFrame([
+                {'File': result['filename'], 'Duplicate Of': result['duplicate_of']} for result in duplicates
+            ]), hide_index=True)
+    show_metrics(job_queue, progress, results)
+    rows += [(result['position'], {SOURCE_COLUMN: result['filename'], **result['row']}) for result in partial]
+    result_df = None
+    if rows:
+        rows.sort(key=lambda entry: entry[0])
+        from result_normalization import join_lists, normalize_frame, parquet_bytes, profile_settings
+        # Lists split, skills made canonical and emails lower-cased over the whole table at once
+        result_df = normalize_frame(pd.DataFrame([row for _, row in rows]), **profile_settings(app_profile))
+        st.dataframe(result_df)
+    if token_savings:
+        savings = pd.DataFrame(token_savings)
+        total_saved = int(savings['Trimmed Tokens'].sum() + savings['Batching Tokens Saved'].sum())
+        with st.expander(f"Saved ~{total_saved} prompt tokens"):
+            st.dataframe(savings)
+    if not progress['finished']:
+        return progress
+    failures = [{'File': result['filename'], 'Error': result['error']} for result in results if result['row'] is None]
+    if failures:
+        st.download_button(
+            label="Download failures CSV",
+            data=pd.DataFrame(failures).to_csv(index=False).encode('utf-8'),
+            file_name='failed_resumes.csv',
+            mime='text/csv',
+            key=f"download-failures-{job_id}",
         )
-
-        response_content = chat_completion.choices[0].message.content
-        response_content 
-        start_index = response_content.find('{')
-        end_index = response_content.rfind('}') + 1
-        # try:
-        json_part = response_content[start_index:end_index]
-        
-
-        try:
-            if json_part.startswith('{') and json_part.endswith('}'):
-                data = json.loads(json_part)
-                df = pd.DataFrame([data])
-                all_rows.append(df)
-            else:
-                pass
-                # st.error("Extracted JSON part is not valid.")
-        except json.JSONDecodeError as e:
-            st.error(f"Failed to decode JSON: {e}")
-
-        # Wait for 10 seconds before processing the next resume
-        time.sleep(10)
+    if result_df is not None:
+        st.download_button(
+            label="Download CSV",
+            data=join_lists(result_df).to_csv(index=False).encode('utf-8'),
+            file_name='combined_employee_data.csv',
+            mime='text/csv',
+            key=f"download-{job_id}",
+        )
+        st.download_button(
+            label="Download Parquet",
+            data=parquet_bytes(result_df, app_profile.LIST_FIELDS),
+            file_name='combined_employee_data.parquet',
+            mime='application/vnd.apache.parquet',
+            key=f"download-parquet-{job_id}",
+        )
+    return progress
+
+def first_result_caption(progress):
+    parts = []
+    if progress['first_field_seconds'] is not None:
+        parts.append(f"first field after {progress['first_field_seconds']:.1f}s")
+    if progress['first_row_seconds'] is not None:
+        parts.append(f"first row after {progress['first_row_seconds']:.1f}s")
+    return ''.join(f" · {part}" for part in parts)
+
+def show_metrics(job_queue, progress, results):
+    """
+    Live rate, slowest files, token spend per resume and the workers' per-stage timings.
+    """
+    import pandas as pd
+    if not results:
+        return
+    per_resume = pd.DataFrame([
+        {
+            'File': result['filename'],
+            'Seconds': round(result['seconds'] or 0.0, 2),
+            'Prompt Tokens': round(result['prompt_tokens']),
+            'Completion Tokens': round(result['completion_tokens']),
+        }
+        for result in results
+    ])
+    with st.expander("Pipeline metrics"):
+        rate, tokens, per_resume_tokens = st.columns(3)
+        rate.metric("Resumes/min", f"{progress['per_minute']:.1f}")
+        total_tokens = int(per_resume['Prompt Tokens'].sum() + per_resume['Completion Tokens'].sum())
+        tokens.metric("Tokens spent", total_tokens)
+        per_resume_tokens.metric("Tokens/resume", round(total_tokens / len(per_resume)))
+        st.write("Slowest files")
+        st.dataframe(per_resume.nlargest(5, 'Seconds'), hide_index=True)
+        st.write("Token spend per resume")
+        st.dataframe(per_resume, hide_index=True)
+        snapshot = merge_snapshots(job_queue.worker_metrics())
+        tiers, escalation_rate = tier_report(snapshot)
+        if 'escalated' in tiers:
+            st.write(f"Model tiers (escalation rate {escalation_rate:.0%})")
+            st.dataframe(pd.DataFrame(tiers).T, use_container_width=True)
+        stages = snapshot['stages']
+        if stages:
+            st.write("Mean seconds per stage (live workers)")
+            st.bar_chart(pd.Series({stage: summary['sum'] / summary['count'] for stage, summary in stages.items()}))
+
+@st.cache_resource
+def get_candidate_index():
+    # One connection per server process, shared by every session and rerun
+    return CandidateIndex(INDEX_PATH)
+
+def show_search():
+    """
+    Query box over every candidate the workers have parsed, e.g. `PyTorch AND IFRS` or
+    `"machine learning" OR tensorflow NOT java`.
+    """
+    query = st.text_input("Search candidates", placeholder='PyTorch AND IFRS')
+    if not query:
+        return
+    import pandas as pd
     try:
-        result_df = pd.concat(all_rows, ignore_index=True)
-        result_df.to_csv(csv_file, index=False)
-        return csv_file, result_df
-    except:
-        st.error(f"resume parsing got error")
+        started = time.perf_counter()
+        matches = get_candidate_index().search(query, limit=SEARCH_LIMIT)
+        elapsed = time.perf_counter() - started
+    except ValueError as e:
+        st.error(str(e))
+        return
+    st.caption(f"{len(matches)} matches in {elapsed * 1000:.0f} ms")
+    if matches:
+        st.dataframe(pd.DataFrame([
+            {'Score': round(match['score'], 2), SOURCE_COLUMN: match['filename'], 'Job': match['source'], **match['row']}
+            for match in matches
+        ]), hide_index=True)
 
 def main():
     st.title("Resume Parser")
@@ -191,35 +216,32 @@ def main():
         accept_multiple_files=True
     )
 
+    job_queue = JobQueue(QUEUE_PATH)
     if uploaded_files:
+        batch_mode = st.sidebar.checkbox("Pack several resumes into each request")
         process_button = st.sidebar.button("Process Resumes")
         if process_button:
-            resumes_text = {}
-            for file in uploaded_files:
-                if file.name.endswith('.zip'):
-                    with zipfile.ZipFile(file, 'r') as zip_ref:
-                        for zip_info in zip_ref.infolist():
-                            if zip_info.filename.endswith(('.docx', '.pdf')):
-                                with zip_ref.open(zip_info) as extracted_file:
-                                    text = extract_text_from_resume(extracted_file)
-                                    resumes_text[zip_info.filename] = text
-                else:
-                    text = extract_text_from_resume(file)
-                    resumes_text[file.name] = text
-            try:
-                csv_file, all_rows = process_resumes(resumes_text)
-            except:
-                st.error(f"resume parsing got error")
-
-            st.write("### Extracted Information")
-            st.dataframe(all_rows)
-
-            st.download_button(
-                label="Download CSV",
-                data=open(csv_file, 'rb').read(),
-                file_name='combined_employee_data.csv',
-                mime='text/csv'
-            )
+            job_id = submit_job(job_queue, read_uploaded_resumes(uploaded_files), batch_mode)
+            st.sidebar.success(f"Submitted job {job_id}")
+
+    show_search()
+    job_ids = st.session_state.get('job_ids', [])
+    if not job_ids:
+        job_queue.close()
+        return
+    if not job_queue.live_workers():
+        st.warning("No workers are running; start them with `python job_worker.py`.")
+    st.write("### Extracted Information")
+    running = False
+    # Newest job first
+    for job_id in reversed(job_ids):
+        progress = show_job(job_queue, job_id)
+        running = running or (progress is not None and not progress['finished'])
+    job_queue.close()
+    # Parsing happens in the workers, so the page only polls while jobs are unfinished
+    if running:
+        time.sleep(POLL_SECONDS)
+        st.rerun()
 
 if __name__ == "__main__":
     main()
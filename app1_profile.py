@@ -0,0 +1,191 @@
+# Schemas, prompt and settings used by app1.py, importable without Streamlit
+from functools import lru_cache
+from json_recovery import check_fields, merge_records, parse_fields, parse_streamed_fields
+from rule_extractors import EMAIL, extract_email
+
+MODEL_NAME = "llama3-70b-8192"
+# Number of Groq requests allowed in flight at once
+MAX_IN_FLIGHT = 4
+# Provider quotas for MODEL_NAME, used to size the rate limiter
+REQUESTS_PER_MINUTE = 30
+TOKENS_PER_MINUTE = 6000
+# Expected completion size, counted against the tokens-per-minute quota
+COMPLETION_TOKENS = 512
+# On-disk cache of LLM responses keyed by resume bytes, prompt and model
+CACHE_PATH = 'extraction_cache.sqlite3'
+# Seconds a single file may spend in text extraction before it is skipped
+EXTRACTION_TIMEOUT = 60
+# Token budget (prompt plus expected completions) for one request in batching mode
+BATCH_TOKEN_BUDGET = 6000
+# Attempts per Groq request before a resume is reported as failed
+MAX_ATTEMPTS = 4
+# Resume text is cut down to this many tokens, keeping the sections the schemas need
+RESUME_TOKEN_BUDGET = 3000
+RESUME_SECTIONS = ('experience', 'skills', 'projects', 'education', 'languages')
+# PDF text backend ('auto', 'pypdf2' or 'pdfminer'); see text_extraction.PDF_BACKENDS
+PDF_BACKEND = 'auto'
+# PDFs stop being read once this many characters are out; compaction keeps far fewer
+PDF_CHAR_BUDGET = 8 * RESUME_TOKEN_BUDGET
+# Chunked mode: instead of trimming to RESUME_TOKEN_BUDGET, resumes keep up to MAX_CHUNKS
+# chunks of CHUNK_TOKENS, split along sections, extracted concurrently and merged
+CHUNK_TOKENS = 1500
+MAX_CHUNKS = 6
+# Fields holding a single value; merged chunk answers keep the first one instead of a union
+SINGLE_VALUE_FIELDS = ("Name", "Mail ID")
+# Cascade mode: SMALL_MODEL_NAME answers first and only answers failing check_response()
+# are asked again of MODEL_NAME
+SMALL_MODEL_NAME = "llama3-8b-8192"
+# USD per million prompt and completion tokens, for cost reporting
+MODEL_PRICES = {
+    MODEL_NAME: (0.59, 0.79),
+    SMALL_MODEL_NAME: (0.05, 0.08),
+}
+# Fields a small-model answer has to fill before it is trusted
+REQUIRED_FIELDS = ("Name", "Work Experience", "Technical Skills", "Education")
+# Comma-separated fields whose items are indexed as whole tags for candidate search
+INDEX_TAG_FIELDS = ("Technical Skills", "Soft Skills", "Company Details", "Specific Terms", "Languages Spoken")
+# Result normalisation (see result_normalization.py): fields split into lists of items,
+# fields whose items go through the skill synonym table, and fields lower-cased as emails
+LIST_FIELDS = ("Company Details", "Technical Skills", "Soft Skills", "Projects", "Languages Spoken", "Specific Terms")
+SKILL_FIELDS = ("Technical Skills", "Soft Skills")
+EMAIL_FIELDS = ("Mail ID",)
+
+# Field names and descriptions for each resume detail; the langchain schemas are built
+# from them on first use, so importing the profile stays cheap
+FIELD_DESCRIPTIONS = {
+    "Name": "Extract the full name from the resume text.",
+    "Mail ID": "Extract the email ID from the resume text.",
+    "Work Experience": "Extract all organization names where the person has worked, along with the number of years or months worked there and the designations held, and output them as a comma-separated Python list.",
+    "Company Details": "Extract all company names and details where the person has worked, and output them as a comma-separated Python list.",
+    "Technical Skills": "Extract all technical skills mentioned in the resume text and output them as a comma-separated Python list.",
+    "Soft Skills": "Extract all soft skills mentioned in the resume text and output them as a comma-separated Python list.",
+    "Projects": "Extract all project titles mentioned in the resume text and output them as a comma-separated Python list.",
+    # Educational details, languages spoken, and presence of specific terms
+    "Education": "Extract all educational qualifications mentioned in the resume text, including degrees, institutions, and years attended.",
+    "Languages Spoken": "Extract all languages spoken by the person mentioned in the resume text.",
+    "Specific Terms": "Check if any of the specified terms are present in the resume and list their headings if found.",
+}
+FIELD_NAMES = list(FIELD_DESCRIPTIONS)
+
+# List of specific terms to check for, used while TERMS_PATH doesn't exist
+specific_terms = [
+    "Credit", "Derivatives", "Insurance Linked Securities", "Long/Short equity",
+    "Private Equity", "Crypto / Digital Assets", "Real Estate", "Venture Capital",
+    "Fund Investments (Fund of Funds)", "Hedge Funds",
+    "Private Funds", "Fund of Funds", "SOC Reports", "Management Companies",
+    "Financial Corporate Service Providers", "AML", "Public Companies (ICFR engagements)",
+    "IFRS", "US GAAP", "Retail Banks", "Private Banks", "Trust Companies",
+    "Captive insurance", "Non public commercial carriers", "Public companies",
+    "Life insurance", "Property and casualty insurance"
+]
+# Taxonomy file for Specific Terms, one term per line; edits are picked up while running
+TERMS_PATH = 'specific_terms.txt'
+
+@lru_cache(maxsize=None)
+def get_specific_terms_taxonomy():
+    # term_index imports numpy, so the taxonomy is only loaded once a resume needs it
+    from term_index import TaxonomyFile
+    return TaxonomyFile(TERMS_PATH, specific_terms)
+
+def find_specific_terms(text):
+    return get_specific_terms_taxonomy().find_joined(text)
+
+# Fields filled locally by rules; the LLM is only asked for them when the rules find nothing
+FIELD_RULES = {
+    "Mail ID": extract_email,
+    "Specific Terms": find_specific_terms,
+}
+# Fields only ever filled by FIELD_RULES: the LLM is never asked for them
+LOCAL_FIELDS = ("Specific Terms",)
+
+def rules_version():
+    """
+    Changes whenever FIELD_RULES would find something different, e.g. after a taxonomy edit.
+    """
+    return get_specific_terms_taxonomy().current().version
+
+def asked_fields(skip_fields=()):
+    """
+    The fields the LLM is asked for, given the fields rules have already filled.
+    """
+    return tuple(name for name in FIELD_NAMES if name not in skip_fields and name not in LOCAL_FIELDS)
+
+@lru_cache(maxsize=None)
+def get_response_schemas():
+    # langchain takes most of a second to import, so it is only loaded once prompts are needed
+    from langchain.output_parsers import ResponseSchema
+    return [ResponseSchema(name=name, description=description) for name, description in FIELD_DESCRIPTIONS.items()]
+
+@lru_cache(maxsize=None)
+def get_format_instructions(skip_fields=()):
+    from langchain.output_parsers import StructuredOutputParser
+    schemas = [schema for schema in get_response_schemas() if schema.name in asked_fields(skip_fields)]
+    return StructuredOutputParser.from_response_schemas(schemas).get_format_instructions()
+
+@lru_cache(maxsize=None)
+def prompt_parts(skip_fields=()):
+    """
+    The static text before and after the resume in build_prompt, built once per skip_fields.
+    """
+    prompt_template = f'''
+    You are an AI bot designed to act as a professional for parsing resumes.
+    You are given a resume, and your job is to extract the following information from it without adding any additional text:
+    1. Full name
+    2. Email ID
+    3. Employment details
+    4. Technical skills
+    5. Soft skills
+    6. Projects
+    7. Education
+    8. Languages Spoken
+    Give the extracted information in the following format: {get_format_instructions(skip_fields)}
+
+    Resume:
+    '''
+    return prompt_template, '\n    '
+
+def build_prompt(text, skip_fields=()):
+    prefix, suffix = prompt_parts(skip_fields)
+    return prefix + text + suffix
+
+def build_followup_prompt(text, fields):
+    """
+    Asks again for just the fields an earlier answer left out or got wrong.
+    """
+    skip_fields = tuple(name for name in FIELD_NAMES if name not in fields)
+    prompt_template = f'''
+    You are an AI bot designed to act as a professional for parsing resumes.
+    An earlier answer for this resume was missing these fields or gave them in the wrong format: {', '.join(fields)}.
+    Extract only these fields from the resume without adding any additional text.
+    Give the extracted information in the following format: {get_format_instructions(skip_fields)}
+
+    Resume:
+    {text}
+    '''
+    return prompt_template
+
+def parse_response(response_content, skip_fields=()):
+    """
+    Returns (fields, missing) for the schema fields not in skip_fields, repairing malformed JSON.
+    """
+    return parse_fields(response_content, list(asked_fields(skip_fields)))
+
+
+def parse_partial(response_content, skip_fields=()):
+    """
+    Returns (fields, complete) for a response still streaming in: the fields whose values
+    have fully arrived, and whether all of them have.
+    """
+    return parse_streamed_fields(response_content, list(asked_fields(skip_fields)))
+
+def check_response(fields, missing):
+    """
+    Returns the reasons to escalate a parsed answer in cascade mode; empty when it can be kept.
+    """
+    return check_fields(fields, missing, REQUIRED_FIELDS, {"Mail ID": EMAIL})
+
+def merge_chunks(records):
+    """
+    Combines the fields parsed from each chunk of a long resume into one record.
+    """
+    return merge_records(records, FIELD_NAMES, SINGLE_VALUE_FIELDS)
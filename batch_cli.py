@@ -0,0 +1,327 @@
+"""
+Headless batch runner: parses a directory, zip or manifest of resumes without Streamlit.
+
+    python batch_cli.py resumes/ --output results.jsonl --concurrency 8
+    python batch_cli.py batch.zip --output results.csv --resume --shard 2/4
+    python batch_cli.py resumes/ --output results.csv --cascade
+    python batch_cli.py resumes/ --output results.csv --stream
+
+A manifest is a text file listing one directory, zip, PDF or DOCX path per line.
+Each output gets a run manifest (see run_manifest.py) recording every file's content hash
+and outcome; with --resume, only files that are new, changed or not yet done are processed.
+The Groq API key is read from --api-key, the GROQ_API_KEY environment variable or the
+[groq] api_key entry of .streamlit/secrets.toml the apps used.
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+import zipfile
+import zlib
+from collections import deque
+
+from batch_runner import make_request_completions, run_resumes
+from candidate_index import INDEX_PATH, CandidateIndex
+from dedup import DuplicateIndex
+from extraction_cache import ExtractionCache
+from groq_client import default_api_key, get_client
+from llm_dispatch import RateLimiter
+from metrics import Metrics, serve, tier_report
+from result_sink import FORMATS, SOURCE_COLUMN, ResultSink, sink_columns
+from run_manifest import MANIFEST_SUFFIX, RunManifest, content_hash, manifest_path
+
+RESUME_EXTENSIONS = ('.docx', '.pdf')
+
+
+def parse_shard(value):
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in 0..N-1, got {value!r}")
+    return index, count
+
+
+def in_shard(name, shard):
+    """
+    Stable assignment of a source name to one of N shards, identical on every node.
+    """
+    if shard is None:
+        return True
+    index, count = shard
+    return zlib.crc32(name.encode('utf-8')) % count == index
+
+
+def iter_resume_files(inputs, shard=None, skip=()):
+    """
+    Yields (source_name, file_bytes) for every resume under the inputs that falls in `shard`
+    and isn't in `skip`. Source names are relative to the input they came from, so every
+    node sharding the same corpus sees the same names. Bytes are only read for selected files.
+    """
+    def wanted(name):
+        return name.lower().endswith(RESUME_EXTENSIONS) and name not in skip and in_shard(name, shard)
+
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for filename in sorted(files):
+                    full_path = os.path.join(root, filename)
+                    if filename.lower().endswith('.zip'):
+                        yield from iter_resume_files([full_path], shard, skip)
+                        continue
+                    name = os.path.relpath(full_path, path).replace(os.sep, '/')
+                    if wanted(name):
+                        with open(full_path, 'rb') as f:
+                            yield name, f.read()
+        elif path.lower().endswith('.zip'):
+            with zipfile.ZipFile(path, 'r') as zip_ref:
+                for zip_info in zip_ref.infolist():
+                    name = f"{os.path.basename(path)}:{zip_info.filename}"
+                    if not zip_info.is_dir() and wanted(name):
+                        with zip_ref.open(zip_info) as extracted_file:
+                            yield name, extracted_file.read()
+        elif path.lower().endswith(RESUME_EXTENSIONS):
+            if wanted(os.path.basename(path)):
+                with open(path, 'rb') as f:
+                    yield os.path.basename(path), f.read()
+        else:
+            # Anything else is a manifest; its entries are relative to the manifest's folder
+            base = os.path.dirname(path)
+            with open(path, encoding='utf-8') as f:
+                entries = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+            yield from iter_resume_files([os.path.join(base, entry) for entry in entries], shard, skip)
+
+
+def unprocessed(files, manifest, run_id, counts, retried):
+    """
+    Passes on the files the run manifest doesn't have as done with the same content,
+    recording each as running. Those that failed with the same content are added to `retried`.
+    """
+    for name, file_bytes in files:
+        digest = content_hash(file_bytes)
+        status = manifest.status(name, digest)
+        if status == 'done':
+            counts['skipped'] += 1
+            continue
+        if status == 'failed':
+            retried.add(name)
+        manifest.begin(run_id, name, digest)
+        yield name, file_bytes
+
+
+def redact(argv):
+    # The run manifest keeps each run's arguments, which shouldn't include the API key
+    redacted = list(argv)
+    for index, arg in enumerate(redacted):
+        if arg.startswith('--api-key='):
+            redacted[index] = '--api-key=***'
+        elif index and redacted[index - 1] == '--api-key':
+            redacted[index] = '***'
+    return redacted
+
+
+def write_normalized(profile, output, path):
+    """
+    Normalises the whole output (including rows from earlier --resume runs) in one pass
+    and writes it as a typed Parquet file.
+    """
+    from result_normalization import normalize_frame, profile_settings, read_results, write_parquet
+    started = time.perf_counter()
+    settings = profile_settings(profile)
+    df = read_results(output)
+    # A file processed again after it changed has a newer row further down
+    df = normalize_frame(df.drop_duplicates(SOURCE_COLUMN, keep='last'), **settings)
+    write_parquet(df, path, settings['list_fields'])
+    print(f"Normalised {len(df)} rows in {time.perf_counter() - started:.1f}s -> {path}", file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Parse resumes in bulk without the Streamlit UI.")
+    parser.add_argument('inputs', nargs='+', help="Directories, zip files, resumes or manifest files.")
+    parser.add_argument('--output', required=True, help="Result file (.csv/.jsonl) or Parquet directory.")
+    parser.add_argument('--format', choices=FORMATS, help="Output format; defaults to the output's extension.")
+    parser.add_argument('--profile', default='app', choices=['app', 'app1'], help="Which app's schemas and prompt to use.")
+    parser.add_argument('--concurrency', type=int, help="Groq requests in flight (default: the profile's MAX_IN_FLIGHT).")
+    parser.add_argument('--rpm', type=int, help="Requests-per-minute quota (default: the profile's); 0 disables limiting.")
+    parser.add_argument('--tpm', type=int, help="Tokens-per-minute quota (default: the profile's).")
+    parser.add_argument('--batch', action='store_true', help="Pack several resumes into each request.")
+    parser.add_argument('--resume', action='store_true', help="Append to an existing output, skipping files already done with the same content.")
+    parser.add_argument('--overwrite', action='store_true', help="Replace an existing output.")
+    parser.add_argument('--shard', type=parse_shard, help="Process only shard i of N (e.g. 0/4).")
+    parser.add_argument('--cache', help="Response cache path (default: the profile's CACHE_PATH).")
+    parser.add_argument('--no-cache', action='store_true', help="Don't read or write the response cache.")
+    parser.add_argument('--no-dedup', action='store_true', help="Don't reuse responses for duplicate resumes.")
+    parser.add_argument('--chunk', action='store_true', help="Split long resumes into chunks extracted in parallel instead of trimming them.")
+    parser.add_argument('--stream', action='store_true', help="Stream responses and stop reading each one once every field has arrived.")
+    parser.add_argument('--cascade', action='store_true', help="Try the profile's SMALL_MODEL_NAME first, escalating failing answers.")
+    parser.add_argument('--index', default=INDEX_PATH, help="Candidate search index the parsed rows are added to.")
+    parser.add_argument('--no-index', action='store_true', help="Don't add parsed rows to the search index.")
+    parser.add_argument('--normalized', help="Also write the normalised output (lists split, skills and emails cleaned) to this Parquet file.")
+    parser.add_argument('--errors', help="Write failed files to this JSONL file.")
+    parser.add_argument('--run-manifest', help=f"Run manifest path (default: the output's path plus {MANIFEST_SUFFIX}).")
+    parser.add_argument('--no-run-manifest', action='store_true', help="Don't record or skip files by content hash.")
+    parser.add_argument('--api-key', help="Groq API key (default: GROQ_API_KEY, then [groq] api_key in .streamlit/secrets.toml).")
+    parser.add_argument('--base-url', help="Alternative OpenAI-compatible endpoint, e.g. a local mock server.")
+    parser.add_argument('--progress', type=int, default=50, help="Log progress every N resumes.")
+    parser.add_argument('--metrics', help="Write per-stage metrics as JSON to this file at every progress update.")
+    parser.add_argument('--metrics-port', type=int, help="Serve metrics at /metrics (Prometheus) and /metrics.json.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.api_key = args.api_key or default_api_key()
+    if not args.api_key:
+        sys.exit("No Groq API key: pass --api-key, set GROQ_API_KEY or add it to .streamlit/secrets.toml")
+    if os.path.exists(args.output) and not (args.resume or args.overwrite):
+        sys.exit(f"{args.output} already exists: pass --resume to continue it or --overwrite to replace it")
+
+    profile = importlib.import_module(f'{args.profile}_profile')
+    sink = ResultSink(args.output, sink_columns(profile.FIELD_NAMES), args.format, resume=args.resume)
+    cache = None if args.no_cache else ExtractionCache(args.cache or profile.CACHE_PATH)
+    text_cache = None if args.no_cache else ExtractionCache(args.cache or profile.CACHE_PATH, table='documents')
+    # Without the cache, duplicates are only looked for within this run
+    dedup = None if args.no_dedup else DuplicateIndex(':memory:' if args.no_cache else args.cache or profile.CACHE_PATH)
+    search_index = None if args.no_index else CandidateIndex(args.index)
+    # Rows are indexed under the output they were written to, so re-running it replaces them
+    index_source = os.path.abspath(args.output)
+    rpm = profile.REQUESTS_PER_MINUTE if args.rpm is None else args.rpm
+    rate_limiter = RateLimiter(rpm, args.tpm or profile.TOKENS_PER_MINUTE) if rpm else None
+    client = get_client(args.api_key, args.base_url)
+    request_completion, escalate_completion = make_request_completions(client, profile, args.cascade)
+    errors = open(args.errors, 'a', encoding='utf-8') if args.errors else None
+    manifest = None if args.no_run_manifest else RunManifest(args.run_manifest or manifest_path(args.output))
+    if manifest is not None and not (args.resume and sink.rows):
+        # Its files are only done if their rows are still in the output
+        manifest.forget_files()
+    # Files in the output but not the manifest (written without one) are skipped by name, unread
+    skip = set(sink.completed) - (manifest.sources() if manifest is not None else set())
+    if skip:
+        print(f"Resuming: skipping {len(skip)} files already in {args.output}", file=sys.stderr)
+
+    metrics = Metrics()
+    server = serve(metrics.snapshot, args.metrics_port) if args.metrics_port else None
+    counts = {'processed': 0, 'rows': 0, 'failed': 0, 'skipped': 0}
+    first_row_seconds = None
+    files = iter_resume_files(args.inputs, args.shard, skip)
+    run_id = None
+    # Failed files are asked again rather than given their cached response
+    retried = set()
+    if manifest is not None:
+        run_id = manifest.start_run(redact(sys.argv[1:] if argv is None else argv))
+        files = unprocessed(files, manifest, run_id, counts, retried)
+    # Manifest entries of rows not yet on disk (a Parquet sink's buffer), as (filename, resume, row_id)
+    unsaved = deque()
+    finished = False
+    started = time.perf_counter()
+    try:
+        results = run_resumes(
+            profile,
+            files,
+            request_completion,
+            cache=cache,
+            rate_limiter=rate_limiter,
+            max_in_flight=args.concurrency,
+            batch_mode=args.batch,
+            metrics=metrics,
+            text_cache=text_cache,
+            dedup=dedup,
+            escalate_completion=escalate_completion,
+            chunked=args.chunk,
+            stream=args.stream,
+            refresh=retried.__contains__,
+        )
+        for resume, data in results:
+            counts['processed'] += 1
+            if resume['duplicate_of'] is not None:
+                print(
+                    f"DUPLICATE {resume['filename']} of {resume['duplicate_of']} ({resume['similarity']:.0%} similar)",
+                    file=sys.stderr,
+                )
+            if data is None:
+                counts['failed'] += 1
+                error = resume['error'] or resume['parse_error']
+                print(f"FAILED {resume['filename']}: {error}", file=sys.stderr)
+                if errors is not None:
+                    errors.write(json.dumps({'file': resume['filename'], 'error': error}) + '\n')
+                    errors.flush()
+                if manifest is not None:
+                    manifest.finish(resume['filename'], resume)
+            else:
+                started_write = time.perf_counter()
+                row_id = sink.write(resume['filename'], data)
+                if manifest is not None:
+                    unsaved.append((resume['filename'], resume, row_id))
+                    while unsaved and unsaved[0][2] < sink.saved_rows():
+                        manifest.finish(*unsaved.popleft())
+                metrics.observe('sink_write', time.perf_counter() - started_write)
+                if search_index is not None:
+                    started_index = time.perf_counter()
+                    search_index.add(index_source, resume['filename'], data, profile.INDEX_TAG_FIELDS)
+                    metrics.observe('index_write', time.perf_counter() - started_index)
+                counts['rows'] += 1
+                if first_row_seconds is None:
+                    first_row_seconds = time.perf_counter() - started
+            if args.progress and counts['processed'] % args.progress == 0:
+                rate = counts['processed'] / (time.perf_counter() - started) * 60
+                print(f"{counts['processed']} processed, {counts['failed']} failed, {rate:.1f} resumes/min", file=sys.stderr)
+                if args.metrics:
+                    metrics.write_json(args.metrics)
+        finished = True
+    finally:
+        sink.close()
+        if manifest is not None:
+            for filename, resume, row_id in unsaved:
+                manifest.finish(filename, resume, row_id)
+            manifest.finish_run(run_id, counts['processed'], counts['failed'], counts['skipped'], not finished)
+            manifest.close()
+        if args.metrics:
+            metrics.write_json(args.metrics)
+        if server is not None:
+            server.shutdown()
+        if cache is not None:
+            cache.close()
+            text_cache.close()
+        if dedup is not None:
+            dedup.close()
+        if search_index is not None:
+            search_index.close()
+        if errors is not None:
+            errors.close()
+
+    elapsed = time.perf_counter() - started
+    if args.normalized:
+        write_normalized(profile, args.output, args.normalized)
+    print(
+        f"Done: {counts['processed']} processed, {counts['rows']} rows written, {counts['failed']} failed, "
+        f"{counts['skipped']} unchanged skipped in {elapsed:.1f}s -> {args.output}",
+        file=sys.stderr,
+    )
+    snapshot = metrics.snapshot()
+    if cache is not None and counts['processed']:
+        cache_hits = snapshot['counters'].get('cache_hits', 0)
+        print(f"Cache hits: {cache_hits}/{counts['processed']} ({cache_hits / counts['processed']:.0%})", file=sys.stderr)
+    if first_row_seconds is not None:
+        line = f"First row after {first_row_seconds:.2f}s"
+        first_field = snapshot['stages'].get('llm_first_field')
+        if first_field:
+            line += f", first field {first_field['sum'] / first_field['count']:.2f}s into a request on average"
+        print(line, file=sys.stderr)
+    tiers, escalation_rate = tier_report(snapshot)
+    for tier, stats in tiers.items():
+        print(
+            f"{tier}: {stats['resumes']} resumes, {stats['mean_seconds']:.2f}s mean LLM latency, "
+            f"{stats['tokens']:.0f} tokens, ${stats['cost_usd']:.4f}",
+            file=sys.stderr,
+        )
+    if args.cascade:
+        print(f"Escalation rate: {escalation_rate:.1%}", file=sys.stderr)
+    return 1 if counts['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
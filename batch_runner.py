@@ -0,0 +1,180 @@
+from llm_dispatch import estimate_tokens
+from pipeline import stream_resumes
+from rule_extractors import apply_rules
+from text_compaction import compact_text, split_chunks
+
+
+# A field's value can only have finished in a delta holding one of these
+VALUE_ENDS = frozenset('",]}\n')
+
+
+def make_request_completion(client, model_name):
+    """
+    Returns request_completion(prompt, on_text=None) -> (content, usage). With `on_text` the
+    response is streamed and on_text(content_so_far) is called whenever a field may have
+    finished; once it returns True the rest of the response is dropped unread.
+    """
+    def request_completion(prompt_template, on_text=None):
+        messages = [
+            {
+                "role": "system",
+                "content": prompt_template,
+            }
+        ]
+        if on_text is not None:
+            return stream_completion(messages, on_text)
+        chat_completion = client.chat.completions.create(
+            messages=messages,
+            temperature=0.4,
+            model=model_name,
+        )
+        usage = chat_completion.usage
+        tokens = {'prompt_tokens': usage.prompt_tokens, 'completion_tokens': usage.completion_tokens} if usage else {}
+        return chat_completion.choices[0].message.content, tokens
+
+    def stream_completion(messages, on_text):
+        stream = client.chat.completions.create(
+            messages=messages,
+            temperature=0.4,
+            model=model_name,
+            stream=True,
+        )
+        parts, usage = [], None
+        try:
+            for chunk in stream:
+                # Groq reports usage on the final chunk
+                if chunk.x_groq is not None and chunk.x_groq.usage is not None:
+                    usage = chunk.x_groq.usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                parts.append(delta)
+                if not VALUE_ENDS.isdisjoint(delta) and on_text(''.join(parts)):
+                    break
+        finally:
+            stream.close()
+        content = ''.join(parts)
+        if usage is None:
+            # Stopped before the final chunk: the provider bills what it generated, which is
+            # at least what was read
+            return content, {
+                'prompt_tokens': estimate_tokens(messages[0]['content']), 'completion_tokens': estimate_tokens(content),
+            }
+        return content, {'prompt_tokens': usage.prompt_tokens, 'completion_tokens': usage.completion_tokens}
+    return request_completion
+
+
+def tier_models(profile, cascade=False):
+    """
+    Maps the pipeline's tiers to the models answering them.
+    """
+    if cascade:
+        return {'base': profile.SMALL_MODEL_NAME, 'escalated': profile.MODEL_NAME}
+    return {'base': profile.MODEL_NAME}
+
+
+def make_request_completions(client, profile, cascade=False):
+    """
+    Returns (request_completion, escalate_completion) for run_resumes; the second is None
+    unless `cascade` is set.
+    """
+    models = tier_models(profile, cascade)
+    escalate = make_request_completion(client, models['escalated']) if cascade else None
+    return make_request_completion(client, models['base']), escalate
+
+
+def tier_cost(profile, model_name, usage):
+    prompt_price, completion_price = profile.MODEL_PRICES.get(model_name, (0.0, 0.0))
+    return (usage.get('prompt_tokens', 0) * prompt_price + usage.get('completion_tokens', 0) * completion_price) / 1e6
+
+
+def text_budgets(profile, chunked=False):
+    """
+    (token_budget, pdf_char_budget) for the resume text sent to the LLM.
+    """
+    if chunked:
+        tokens = profile.CHUNK_TOKENS * profile.MAX_CHUNKS
+        return tokens, tokens * profile.PDF_CHAR_BUDGET // profile.RESUME_TOKEN_BUDGET
+    return profile.RESUME_TOKEN_BUDGET, profile.PDF_CHAR_BUDGET
+
+
+def make_cache_key(profile, cache, cascade=False, chunked=False):
+    prompt_template = profile.build_prompt('')
+    # Cascade answers come from a different mix of models, so they are cached separately
+    models = '+'.join(tier_models(profile, cascade).values())
+    token_budget, char_budget = text_budgets(profile, chunked)
+    chunking = [profile.CHUNK_TOKENS, profile.MAX_CHUNKS] if chunked else []
+    # rules_version() is read per file, so a taxonomy edit mid-run stops older rule results matching
+    return lambda file_bytes: cache.make_key(
+        file_bytes, profile.get_format_instructions(), prompt_template, models,
+        token_budget, profile.RESUME_SECTIONS, sorted(profile.FIELD_RULES), profile.rules_version(),
+        profile.PDF_BACKEND, char_budget, *chunking,
+    )
+
+
+def run_resumes(profile, files, request_completion, cache=None, rate_limiter=None,
+                max_in_flight=None, batch_mode=False, metrics=None, text_cache=None, dedup=None,
+                escalate_completion=None, chunked=False, stream=False, on_fields=None, refresh=None,
+                extraction_pool=None):
+    """
+    Runs (filename, file_bytes) pairs through the pipeline with a profile module's schemas,
+    prompt, rules and settings. Yields (resume, row) in input order, where row is the parsed
+    record merged with rule-filled fields, or None when the resume failed ('error') or its
+    response could not be parsed ('parse_error'). Each resume is recorded in `metrics` if given.
+    `text_cache` keeps extracted document text by content hash, and `dedup` lets duplicate
+    resumes reuse an earlier resume's response.
+    With `escalate_completion` (see make_request_completions), `request_completion` is the
+    profile's SMALL_MODEL_NAME and answers failing profile.check_response are asked again of
+    the larger model. Each resume gets 'cost_by_tier' in USD from profile.MODEL_PRICES.
+    With `chunked`, long resumes are split into profile.CHUNK_TOKENS chunks that are
+    extracted concurrently and merged with profile.merge_chunks, rather than trimmed.
+    With `stream`, responses are streamed and parsed with profile.parse_partial as they arrive;
+    `on_fields(resume, row_so_far)` sees each resume's row fill in, and a response is cut off
+    once every field has arrived.
+    Files whose name `refresh(filename)` is true for are asked again rather than read from `cache`.
+    `extraction_pool` keeps one text extraction pool across calls (see text_extraction.ExtractionPool).
+    """
+    cascade = escalate_completion is not None
+    models = tier_models(profile, cascade)
+    token_budget, char_budget = text_budgets(profile, chunked)
+    resumes = stream_resumes(
+        files,
+        profile.build_prompt,
+        request_completion,
+        cache=cache,
+        cache_key=make_cache_key(profile, cache, cascade, chunked) if cache is not None else None,
+        max_in_flight=max_in_flight or profile.MAX_IN_FLIGHT,
+        rate_limiter=rate_limiter,
+        completion_tokens=profile.COMPLETION_TOKENS,
+        extraction_timeout=profile.EXTRACTION_TIMEOUT,
+        batch_token_budget=profile.BATCH_TOKEN_BUDGET if batch_mode else None,
+        max_attempts=profile.MAX_ATTEMPTS,
+        compact=lambda text: compact_text(text, token_budget, profile.RESUME_SECTIONS),
+        rules=lambda text: apply_rules(text, profile.FIELD_RULES),
+        parse=profile.parse_response,
+        followup_prompt=profile.build_followup_prompt,
+        text_cache=text_cache,
+        pdf_backend=profile.PDF_BACKEND,
+        char_budget=char_budget,
+        dedup=dedup,
+        escalate=escalate_completion,
+        check=profile.check_response,
+        chunk=(lambda text: split_chunks(text, profile.CHUNK_TOKENS)) if chunked else None,
+        merge=profile.merge_chunks,
+        # Enough for every chunk of one resume at once, so its latency is that of its largest chunk
+        max_chunks_in_flight=max(max_in_flight or profile.MAX_IN_FLIGHT, profile.MAX_CHUNKS),
+        parse_partial=profile.parse_partial if stream or on_fields is not None else None,
+        on_fields=on_fields,
+        refresh=refresh,
+        extraction_pool=extraction_pool,
+    )
+    for resume in resumes:
+        resume['cost_by_tier'] = {
+            tier: tier_cost(profile, models[tier], usage) for tier, usage in resume['usage_by_tier'].items()
+        }
+        row = None
+        if resume['error'] is None and resume['data'] is not None:
+            row = {**resume['data'], **resume['prefilled']}
+        if metrics is not None:
+            metrics.observe_resume(resume)
+        yield resume, row
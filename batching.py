@@ -0,0 +1,78 @@
+import json
+
+from llm_dispatch import estimate_tokens
+
+BATCH_NOTE = '''The text below contains several resumes, each starting with a line "### Resume <number>".
+    Extract the information from every resume separately using the format above, and return a single
+    JSON object that maps each "Resume <number>" to its extracted information, inside one ```json code block.
+'''
+
+
+def resume_label(position):
+    # Sections are labelled by position rather than filename, which two resumes can share
+    return f"Resume {position + 1}"
+
+
+def build_batch_prompt(build_prompt, resumes, skip_fields=()):
+    """
+    Packs several resumes under one copy of the instructions and format instructions.
+    """
+    sections = [f"### {resume_label(position)}\n{resume['text']}" for position, resume in enumerate(resumes)]
+    return build_prompt(BATCH_NOTE + '\n'.join(sections), skip_fields)
+
+
+def group_batches(resumes, build_prompt, token_budget, completion_tokens, max_batch_size=8):
+    """
+    Groups consecutive resumes so each batch prompt plus its expected completions stays
+    within `token_budget`. Resumes that need no LLM call ride along without using budget.
+    """
+    overhead = estimate_tokens(build_prompt(BATCH_NOTE))
+    batch = []
+    used = overhead
+    requests = 0
+    for resume in resumes:
+        if resume['response'] is not None or resume['error'] is not None:
+            batch.append(resume)
+            continue
+        cost = estimate_tokens(resume['text']) + completion_tokens
+        if requests and (used + cost > token_budget or requests >= max_batch_size):
+            yield batch
+            batch = []
+            used = overhead
+            requests = 0
+        batch.append(resume)
+        used += cost
+        requests += 1
+    if batch:
+        yield batch
+
+
+def split_batch_response(response_content, count):
+    """
+    Splits a batch response for `count` resumes into a list of JSON strings, one per
+    position in the batch. Resumes missing from the response, or with unusable values, get None.
+    """
+    responses = [None] * count
+    start_index = response_content.find('{')
+    end_index = response_content.rfind('}') + 1
+    try:
+        data = json.loads(response_content[start_index:end_index])
+    except json.JSONDecodeError:
+        # Some models answer with an array of objects, one per resume in order, instead
+        start_index = response_content.find('[')
+        end_index = response_content.rfind(']') + 1
+        try:
+            items = json.loads(response_content[start_index:end_index])
+        except json.JSONDecodeError:
+            return responses
+        if not isinstance(items, list) or len(items) != count:
+            return responses
+        data = {resume_label(position): item for position, item in enumerate(items)}
+    if not isinstance(data, dict):
+        return responses
+    for position in range(count):
+        # "Resume 3", or just "3"
+        value = data.get(resume_label(position), data.get(str(position + 1)))
+        if isinstance(value, dict):
+            responses[position] = json.dumps(value)
+    return responses
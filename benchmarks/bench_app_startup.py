@@ -0,0 +1,85 @@
+"""
+Cold-start and rerun latency of the Streamlit apps, measured with Streamlit's AppTest.
+
+    python -m benchmarks.bench_app_startup --runs 5 --reruns 10
+
+Every run starts a fresh interpreter, so 'import' and 'first run' include all module
+imports. 'rerun' is the mean of the following reruns, as after a widget interaction.
+Each app is measured on an empty page and with one finished 50-resume job on screen.
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed_job(profile_name, resumes):
+    from job_queue import QUEUE_PATH, JobQueue
+
+    job_queue = JobQueue(QUEUE_PATH)
+    job_id = job_queue.submit(((f'resume_{index}.pdf', b'%PDF') for index in range(resumes)), profile_name)
+    job, claimed = job_queue.claim('benchmark', resumes)
+    for position, filename, _ in claimed:
+        job_queue.complete(job_id, position, 'benchmark', row={'Name': filename, 'Technical Skills': 'Python, SQL'}, seconds=1.0)
+    job_queue.close()
+    return job_id
+
+
+def measure(app, with_job, reruns, results):
+    """
+    Runs in a fresh process: times importing the app module, its first AppTest run and the reruns.
+    """
+    os.chdir(tempfile.mkdtemp())
+    sys.path.insert(0, REPO)
+    started = time.perf_counter()
+    __import__(app)
+    import_seconds = time.perf_counter() - started
+    from streamlit.testing.v1 import AppTest
+
+    job_id = seed_job(app, 50) if with_job else None
+    at = AppTest.from_file(os.path.join(REPO, f'{app}.py'), default_timeout=120)
+    if job_id is not None:
+        at.session_state['job_ids'] = [job_id]
+    started = time.perf_counter()
+    at.run()
+    first_seconds = time.perf_counter() - started
+    rerun_seconds = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        at.run()
+        rerun_seconds.append(time.perf_counter() - started)
+    results.put((import_seconds, first_seconds, statistics.mean(rerun_seconds), len(at.exception)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Streamlit app cold start and rerun latency.")
+    parser.add_argument('--apps', nargs='+', default=['app', 'app1'])
+    parser.add_argument('--runs', type=int, default=3, help="Fresh processes per measurement.")
+    parser.add_argument('--reruns', type=int, default=10)
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    print(f"{'app':<6}{'page':<12}{'import ms':>11}{'first run ms':>14}{'rerun ms':>10}")
+    for app in args.apps:
+        for with_job in (False, True):
+            samples = []
+            for _ in range(args.runs):
+                results = context.Queue()
+                process = context.Process(target=measure, args=(app, with_job, args.reruns, results))
+                process.start()
+                samples.append(results.get())
+                process.join()
+            if any(sample[3] for sample in samples):
+                print(f"{app}: the app raised an exception", file=sys.stderr)
+            import_ms, first_ms, rerun_ms = (statistics.median(sample[index] for sample in samples) * 1000 for index in range(3))
+            page = 'with job' if with_job else 'empty'
+            print(f"{app:<6}{page:<12}{import_ms:>11.0f}{first_ms:>14.0f}{rerun_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
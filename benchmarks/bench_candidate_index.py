@@ -0,0 +1,71 @@
+"""
+Indexing rate and query latency of the candidate search index on synthetic parsed rows.
+
+    python -m benchmarks.bench_candidate_index --rows 200000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_pipeline import percentile
+from candidate_index import CandidateIndex
+
+SKILLS = [
+    'Python', 'PyTorch', 'TensorFlow', 'Java', 'C++', 'C#', 'SQL', 'Machine Learning', 'Docker',
+    'Kubernetes', 'React', 'Node.js', 'Go', 'Rust', 'Excel', 'Tableau', 'Spark', 'Airflow',
+]
+TERMS = ['IFRS', 'US GAAP', 'AML', 'Credit', 'Derivatives', 'Private Equity', 'Hedge Funds', 'Real Estate']
+QUERIES = [
+    'PyTorch AND IFRS',
+    '"machine learning" OR tensorflow',
+    'python NOT java',
+    '"company 42"',
+    'c++ AND ("us gaap" OR aml)',
+    'skill12*',
+]
+TAG_FIELDS = ('Technical Skills', 'Specific Terms', 'Company Details')
+
+
+def synthetic_rows(count, seed=0):
+    rng = random.Random(seed)
+    skills = SKILLS + [f'Skill{index}' for index in range(2000)]
+    companies = [f'Company {index}' for index in range(5000)]
+    for index in range(count):
+        yield f'resume_{index:06d}.pdf', {
+            'Name': f'Candidate {index}',
+            'Technical Skills': ', '.join(rng.sample(skills, 8)),
+            'Specific Terms': ', '.join(rng.sample(TERMS, 2)),
+            'Company Details': ', '.join(rng.sample(companies, 3)),
+            'Work Experience': f'Engineer at {rng.choice(companies)} (3 years)',
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the candidate search index.")
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20, help="Runs of each query.")
+    args = parser.parse_args()
+
+    directory = tempfile.TemporaryDirectory()
+    index = CandidateIndex(os.path.join(directory.name, 'candidate_index.sqlite3'))
+    started = time.perf_counter()
+    for filename, row in synthetic_rows(args.rows):
+        index.add('benchmark', filename, row, TAG_FIELDS)
+    elapsed = time.perf_counter() - started
+    print(f"Indexed {args.rows} rows in {elapsed:.1f}s ({args.rows / elapsed:.0f} rows/s)")
+    print(f"{'query':<36}{'matches':>9}{'p50 ms':>9}{'p95 ms':>9}")
+    for query in QUERIES:
+        seconds = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            matches = index.search(query)
+            seconds.append(time.perf_counter() - started)
+        print(f"{query:<36}{len(matches):>9}{percentile(seconds, 0.5) * 1000:>9.1f}{percentile(seconds, 0.95) * 1000:>9.1f}")
+    index.close()
+    directory.cleanup()
+
+
+if __name__ == "__main__":
+    main()
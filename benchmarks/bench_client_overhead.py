@@ -0,0 +1,74 @@
+"""
+Per-request overhead of building a Groq client for every resume (as process_resumes did)
+against the shared, pooled client from groq_client, measured on the local mock server
+with no injected latency.
+
+    python -m benchmarks.bench_client_overhead --requests 200 --threads 4
+
+Over TLS the per-request client also pays a handshake each time, so real savings are larger.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from groq import Groq
+
+from batch_runner import make_request_completion
+from benchmarks.bench_pipeline import percentile
+from benchmarks.mock_llm_server import MockSettings, start_server
+from groq_client import HTTP2_AVAILABLE, close_clients, get_client
+
+PROMPT = 'Give the extracted information in the following format: {"Name": string  // Extract the full name.}'
+
+
+def run_mode(settings, base_url, mode, requests, threads):
+    def call(_):
+        started = time.perf_counter()
+        if mode == 'per-request':
+            client = Groq(api_key='benchmark', base_url=base_url, max_retries=0)
+        else:
+            client = get_client('benchmark', base_url)
+        make_request_completion(client, 'mock')(PROMPT)
+        return time.perf_counter() - started
+
+    connections = settings.connections
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        seconds = list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        'mean': sum(seconds) / len(seconds),
+        'p50': percentile(seconds, 0.5),
+        'p95': percentile(seconds, 0.95),
+        'per_second': requests / elapsed,
+        'connections': settings.connections - connections,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-request and shared Groq clients.")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    settings = MockSettings(latency=0.0, jitter=0.0)
+    server, base_url = start_server(settings)
+    try:
+        # Warm up imports and the server before timing anything
+        run_mode(settings, base_url, 'shared', 10, 1)
+        results = {mode: run_mode(settings, base_url, mode, args.requests, args.threads) for mode in ('per-request', 'shared')}
+    finally:
+        close_clients()
+        server.shutdown()
+
+    print(f"{args.requests} requests on {args.threads} threads, HTTP/2 {'available' if HTTP2_AVAILABLE else 'unavailable (h2 not installed)'}")
+    print(f"{'client':<13}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>10}{'connections':>13}")
+    for mode, stats in results.items():
+        print(
+            f"{mode:<13}{stats['mean'] * 1000:>10.2f}{stats['p50'] * 1000:>10.2f}{stats['p95'] * 1000:>10.2f}"
+            f"{stats['per_second']:>10.0f}{stats['connections']:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Time to normalise a results history with result_normalization, on synthetic rows that mix
+comma strings, stringified Python lists and skill spelling variants.
+
+    python -m benchmarks.bench_normalization --rows 100000
+"""
+import argparse
+import importlib
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from result_normalization import normalize_frame, profile_settings, write_parquet
+from result_sink import SOURCE_COLUMN
+
+SKILLS = [
+    'Python', 'python', 'PowerBI', 'Power BI', 'MS Excel', 'Excel', 'SQL', 'sklearn', 'Scikit-learn',
+    'PyTorch', 'Pytorch', 'TensorFlow', 'Web scrapping', 'NLP', 'Docker', 'K8s', 'Kubernetes', 'Node.js',
+    'NodeJS', 'Tableau', 'Spark', 'AWS', 'Machine Learning', 'ML', 'C++', 'Java',
+]
+SOFT_SKILLS = ['Communication', 'communication skills', 'Teamwork', 'Team work', 'Leadership', 'Problem-solving']
+
+
+def as_cell(rng, items):
+    # Half the rows hold a stringified list, as older runs wrote them
+    if rng.random() < 0.5:
+        return str(items)
+    return ', '.join(items)
+
+
+def synthetic_history(rows, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for index in range(rows):
+        records.append({
+            SOURCE_COLUMN: f'resume_{index:06d}.pdf',
+            'Name': f'Candidate {index}',
+            'Mail ID': f'Candidate.{index}@Example.COM',
+            'LinkedIn': '',
+            'Work Experience': f'Engineer at Company {index % 500}, London (3 years)',
+            'Company Details': as_cell(rng, [f'Company {index % 500}, London (Head Office)', 'EY']),
+            'Technical Skills': as_cell(rng, rng.sample(SKILLS, 8)),
+            'Soft Skills': as_cell(rng, rng.sample(SOFT_SKILLS, 3)),
+            'Projects': as_cell(rng, [f'Project {index % 97}', 'Dashboard']),
+        })
+    return pd.DataFrame(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark columnar result normalisation.")
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    settings = profile_settings(importlib.import_module('app_profile'))
+    df = synthetic_history(args.rows)
+    started = time.perf_counter()
+    normalized = normalize_frame(df, **settings)
+    normalize_seconds = time.perf_counter() - started
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'history.parquet')
+        started = time.perf_counter()
+        write_parquet(normalized, path, settings['list_fields'])
+        write_seconds = time.perf_counter() - started
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+    skills = normalized['Technical Skills'].explode()
+    print(f"{args.rows} rows: normalised in {normalize_seconds:.2f}s ({args.rows / normalize_seconds:.0f} rows/s), "
+          f"Parquet written in {write_seconds:.2f}s ({size_mb:.1f} MB)")
+    print(f"Distinct skill spellings: {len(SKILLS)} in the input -> {skills.nunique()} after normalising")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Speed and quality of the PDF text backends, with and without a character budget.
+
+    python -m benchmarks.bench_pdf_backends --resumes 30
+    python -m benchmarks.bench_pdf_backends --pdf-dir ~/resumes
+
+Synthetic resumes have known text, so quality is the share of their words each backend
+recovers. Real PDFs from --pdf-dir have no ground truth and only report speed and size.
+"""
+import argparse
+import os
+import random
+import re
+import time
+from collections import Counter
+
+from benchmarks.synthetic_resumes import make_pdf, resume_lines
+from text_extraction import PAGE_BREAK, PDF_BACKENDS, extract_text_from_pdf
+
+BACKENDS = list(PDF_BACKENDS) + ['auto']
+WORD = re.compile(r'\w+')
+
+
+def word_recall(expected, actual):
+    expected_words = Counter(WORD.findall(expected.lower()))
+    actual_words = Counter(WORD.findall(actual.lower()))
+    total = sum(expected_words.values())
+    return sum((expected_words & actual_words).values()) / total if total else 1.0
+
+
+def synthetic_pdfs(count, seed=0):
+    rng = random.Random(seed)
+    for index in range(count):
+        # Every third resume runs to several pages, where the budget matters
+        lines = resume_lines(rng, index, rng.randint(20, 40) if index % 3 == 0 else rng.randint(2, 5))
+        yield f"resume_{index:05d}.pdf", make_pdf(lines), '\n'.join(lines)
+
+
+def directory_pdfs(path):
+    for filename in sorted(os.listdir(path)):
+        if filename.lower().endswith('.pdf'):
+            with open(os.path.join(path, filename), 'rb') as f:
+                yield filename, f.read(), None
+
+
+def run_benchmark(documents, char_budget=None):
+    results = {backend: {'seconds': 0.0, 'chars': 0, 'pages': 0, 'recall': [], 'errors': 0} for backend in BACKENDS}
+    for _, file_bytes, expected in documents:
+        for backend in BACKENDS:
+            stats = results[backend]
+            started = time.perf_counter()
+            try:
+                text = extract_text_from_pdf(file_bytes, backend=backend, char_budget=char_budget)
+            except Exception:
+                stats['errors'] += 1
+                continue
+            stats['seconds'] += time.perf_counter() - started
+            stats['chars'] += len(text)
+            stats['pages'] += text.count(PAGE_BREAK) + 1
+            if expected is not None and char_budget is None:
+                stats['recall'].append(word_recall(expected, text))
+    return results
+
+
+def print_report(title, results, documents):
+    print(title)
+    print(f"{'backend':<10}{'ms/doc':>10}{'pages':>8}{'chars':>10}{'recall':>9}{'errors':>8}")
+    for backend, stats in results.items():
+        recall = f"{sum(stats['recall']) / len(stats['recall']):.3f}" if stats['recall'] else '-'
+        print(
+            f"{backend:<10}{stats['seconds'] / documents * 1000:>10.1f}{stats['pages']:>8}"
+            f"{stats['chars']:>10}{recall:>9}{stats['errors']:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PDF text backends for speed and quality.")
+    parser.add_argument('--resumes', type=int, default=30, help="Synthetic resumes to generate.")
+    parser.add_argument('--pdf-dir', help="Benchmark the PDFs in this directory instead.")
+    parser.add_argument('--char-budget', type=int, default=24000, help="Budget for the second run.")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    documents = list(directory_pdfs(args.pdf_dir) if args.pdf_dir else synthetic_pdfs(args.resumes, args.seed))
+    print_report("Full documents", run_benchmark(documents), len(documents))
+    print()
+    print_report(f"Character budget {args.char_budget}", run_benchmark(documents, args.char_budget), len(documents))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Replays a synthetic resume corpus through the same pipeline as process_resumes in the
+Streamlit apps (batch_runner.run_resumes), against the local mock LLM server, and reports resumes/minute,
+p50/p95 latency per stage and peak memory.
+
+    python -m benchmarks.bench_pipeline --resumes 200 --concurrency 8 --latency 0.8
+    python -m benchmarks.bench_pipeline --cascade --weak-ratio 0.2
+    python -m benchmarks.bench_pipeline --chunk --long-ratio 1 --long-entries 80 --token-latency 0.5
+    python -m benchmarks.bench_pipeline --stream --output-token-latency 0.005 --trailing-words 60
+
+With --cascade the profile's SMALL_MODEL_NAME answers first (served faster by the mock,
+with --weak-ratio of its answers failing the checks), and the report adds per-tier
+latency, tokens, cost and the escalation rate. With --stream, responses are streamed and
+parsed as they arrive; 'llm_first_field' is how far into a request its first field arrived,
+and the report adds how long after the start the first field and the first whole row arrived.
+"""
+import argparse
+import importlib
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from batch_runner import make_request_completions, run_resumes
+from benchmarks.mock_llm_server import MockSettings, start_server
+from benchmarks.synthetic_resumes import generate_corpus
+from groq_client import get_client
+from llm_dispatch import RateLimiter
+from metrics import Metrics, tier_report
+from result_sink import ResultSink, sink_columns
+
+STAGES = ['read', 'extraction', 'rules', 'compaction', 'prompt', 'llm', 'llm_first_field', 'llm_escalated', 'parse', 'followup', 'csv_write']
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_benchmark(profile, base_url, resumes=100, concurrency=4, batch_mode=False,
+                  requests_per_minute=None, tokens_per_minute=None, seed=0, cascade=False, chunked=False,
+                  long_ratio=0.1, long_entries=30, stream=False):
+    client = get_client('benchmark', base_url)
+    request_completion, escalate_completion = make_request_completions(client, profile, cascade)
+    metrics = Metrics()
+    rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute) if requests_per_minute else None
+    timings = {stage: [] for stage in STAGES}
+    counts = {'resumes': 0, 'rows': 0, 'failed': 0, 'parse_errors': 0, 'llm_attempts': 0, 'trimmed_tokens': 0}
+    directory = tempfile.TemporaryDirectory()
+    sink = ResultSink(os.path.join(directory.name, 'combined_employee_data.csv'), sink_columns(profile.FIELD_NAMES))
+
+    first_result = {}
+
+    def on_fields(resume, row):
+        first_result.setdefault('field', time.perf_counter() - started)
+
+    # Builds the cached prompt parts (and imports langchain) once, as a running worker already has
+    profile.build_prompt('')
+    tracemalloc.start()
+    started = time.perf_counter()
+    stream = run_resumes(
+        profile,
+        generate_corpus(resumes, seed, long_ratio=long_ratio, long_entries=long_entries),
+        request_completion,
+        rate_limiter=rate_limiter,
+        max_in_flight=concurrency,
+        batch_mode=batch_mode,
+        metrics=metrics,
+        escalate_completion=escalate_completion,
+        chunked=chunked,
+        on_fields=on_fields if stream else None,
+    )
+    for resume, data in stream:
+        counts['resumes'] += 1
+        for stage, seconds in resume['timings'].items():
+            timings[stage].append(seconds)
+        if resume['first_field_seconds'] is not None:
+            timings['llm_first_field'].append(resume['first_field_seconds'])
+        counts['llm_attempts'] += resume['attempts']
+        counts['trimmed_tokens'] += resume['trimmed_tokens']
+        if resume['error'] is not None:
+            counts['failed'] += 1
+            continue
+        if data is None:
+            counts['parse_errors'] += 1
+            continue
+        write_started = time.perf_counter()
+        sink.write(resume['filename'], data)
+        first_result.setdefault('row', time.perf_counter() - started)
+        timings['csv_write'].append(time.perf_counter() - write_started)
+
+    sink.close()
+    elapsed = time.perf_counter() - started
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    directory.cleanup()
+
+    counts['rows'] = sink.written
+    tiers, escalation_rate = tier_report(metrics.snapshot())
+    return {
+        'elapsed_seconds': elapsed,
+        'resumes_per_minute': counts['resumes'] / elapsed * 60 if elapsed else 0.0,
+        'counts': counts,
+        'stages': {
+            stage: {'p50': percentile(values, 0.5), 'p95': percentile(values, 0.95), 'samples': len(values)}
+            for stage, values in timings.items()
+        },
+        'peak_traced_mb': peak_traced / (1024 * 1024),
+        'peak_rss_mb': peak_rss_mb(),
+        'tiers': tiers,
+        'escalation_rate': escalation_rate,
+        # Without streaming, a resume's fields arrive with its row
+        'first_field_seconds': first_result.get('field', first_result.get('row')),
+        'first_row_seconds': first_result.get('row'),
+    }
+
+
+def print_report(report, settings):
+    print(f"Resumes/minute: {report['resumes_per_minute']:.1f} ({report['elapsed_seconds']:.1f}s total)")
+    print("Counts: " + ", ".join(f"{name}={value}" for name, value in report['counts'].items()))
+    print(
+        f"Mock server: requests={settings.requests}, 429s={settings.rate_limited}, malformed={settings.malformed}, "
+        f"streams={settings.streams} ({settings.streams_cancelled} cut off)"
+    )
+    if report['first_row_seconds'] is not None:
+        print(f"First field after {report['first_field_seconds'] * 1000:.0f} ms, first row after {report['first_row_seconds'] * 1000:.0f} ms")
+    print(f"{'stage':<16}{'p50 ms':>10}{'p95 ms':>10}{'samples':>10}")
+    for stage, stats in report['stages'].items():
+        print(f"{stage:<16}{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}{stats['samples']:>10}")
+    print(f"{'tier':<12}{'resumes':>10}{'mean ms':>10}{'tokens':>10}{'cost $':>10}")
+    for tier, stats in report['tiers'].items():
+        print(
+            f"{tier:<12}{stats['resumes']:>10}{stats['mean_seconds'] * 1000:>10.1f}"
+            f"{stats['tokens']:>10.0f}{stats['cost_usd']:>10.4f}"
+        )
+    print(f"Escalation rate: {report['escalation_rate']:.1%}")
+    print(f"Peak traced memory: {report['peak_traced_mb']:.1f} MB")
+    if report['peak_rss_mb'] is not None:
+        print(f"Peak RSS: {report['peak_rss_mb']:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark for the resume pipeline.")
+    parser.add_argument('--profile', default='app', choices=['app', 'app1'], help="Which app's prompt and schemas to use.")
+    parser.add_argument('--resumes', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--batch', action='store_true', help="Pack several resumes into each request.")
+    parser.add_argument('--rpm', type=int, default=None, help="Requests-per-minute quota for the rate limiter.")
+    parser.add_argument('--tpm', type=int, default=None, help="Tokens-per-minute quota for the rate limiter.")
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--jitter', type=float, default=0.2)
+    parser.add_argument('--rate-limit-ratio', type=float, default=0.0)
+    parser.add_argument('--malformed-ratio', type=float, default=0.0)
+    parser.add_argument('--chunk', action='store_true', help="Extract long resumes in parallel chunks.")
+    parser.add_argument('--long-ratio', type=float, default=0.1, help="Share of multi-page resumes in the corpus.")
+    parser.add_argument('--long-entries', type=int, default=30, help="Most entries in a multi-page resume.")
+    parser.add_argument('--token-latency', type=float, default=0.0, help="Mock seconds per 1000 prompt tokens.")
+    parser.add_argument('--stream', action='store_true', help="Stream responses, parsing fields as they arrive.")
+    parser.add_argument('--output-token-latency', type=float, default=0.0, help="Mock seconds per generated token.")
+    parser.add_argument('--trailing-words', type=int, default=0, help="Mock chatter after the JSON answer, in words.")
+    parser.add_argument('--cascade', action='store_true', help="Answer with the small model first, escalating failures.")
+    parser.add_argument('--small-latency', type=float, default=0.15, help="Mock latency of the small model.")
+    parser.add_argument('--weak-ratio', type=float, default=0.0, help="Share of small-model answers that fail checks.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Also write the report to this JSON file.")
+    args = parser.parse_args()
+
+    profile = importlib.import_module(f'{args.profile}_profile')
+    settings = MockSettings(
+        args.latency, args.jitter, args.rate_limit_ratio, args.malformed_ratio, seed=args.seed,
+        small_models=[profile.SMALL_MODEL_NAME], small_latency=args.small_latency, weak_ratio=args.weak_ratio,
+        token_latency=args.token_latency, output_token_latency=args.output_token_latency,
+        trailing_words=args.trailing_words,
+    )
+    server, base_url = start_server(settings)
+    try:
+        report = run_benchmark(
+            profile, base_url, args.resumes, args.concurrency, args.batch, args.rpm, args.tpm, args.seed, args.cascade,
+            args.chunk, args.long_ratio, args.long_entries, args.stream,
+        )
+    finally:
+        server.shutdown()
+    print_report(report, settings)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
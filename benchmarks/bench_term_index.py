@@ -0,0 +1,162 @@
+"""
+Throughput and recall of the Specific Terms taxonomy index on synthetic resume text.
+
+    python -m benchmarks.bench_term_index --resumes 5000
+
+Each resume mentions a few taxonomy terms, some spelled as written and some as they turn
+up in real resumes (hyphenated, abbreviated, misspelt). The report compares the fuzzy
+TermIndex, scored in batches and one resume at a time as the pipeline does, with the exact
+Aho-Corasick TermMatcher it replaced.
+"""
+import argparse
+import random
+import re
+import time
+from collections import deque
+
+import app1_profile
+from benchmarks.synthetic_resumes import resume_lines
+from rule_extractors import normalise
+from term_index import TermIndex
+
+# Ways a term is written in resumes, by term
+SPELLINGS = {
+    'Private Equity': ['private equity', 'private-equity', 'Privat Equity'],
+    'Hedge Funds': ['hedge funds', 'hedge-fund', 'Hedge Fund'],
+    'US GAAP': ['US GAAP', 'US-GAAP', 'U.S. GAAP'],
+    'IFRS': ['IFRS', 'IFRS 9'],
+    'Derivatives': ['derivatives', 'derivative'],
+    'Real Estate': ['real estate', 'real-estate'],
+    'Venture Capital': ['venture capital', 'venture-capital', 'ventur capital'],
+    'Insurance Linked Securities': ['insurance-linked securities', 'insurance linked security'],
+    'Property and casualty insurance': ['property & casualty insurance', 'property and casualty insurers'],
+    'Trust Companies': ['trust companies', 'Trust company'],
+    'Retail Banks': ['retail banks', 'retail bank'],
+    'AML': ['AML', 'AML/KYC'],
+}
+
+
+def term_variants(term):
+    """
+    Spellings of a taxonomy term worth matching: the term itself, the alternatives in
+    "A / B" and "A (B)" forms, and the singular/plural of the last word.
+    """
+    parts = [term]
+    parts += [part for part in re.split(r'\s+/\s+', term) if part != term]
+    outside = re.sub(r'\(.*?\)', ' ', term)
+    parts += [outside] + re.findall(r'\((.*?)\)', term)
+    variants = set()
+    for part in parts:
+        phrase = normalise(part).strip()
+        if not phrase:
+            continue
+        variants.add(phrase)
+        variants.add(phrase[:-1] if phrase.endswith('s') else phrase + 's')
+    return variants
+
+
+class TermMatcher:
+    """
+    The exact Aho-Corasick matcher TermIndex replaced, kept as the baseline: it finds every
+    taxonomy term in a text in a single pass.
+    Matching is case-insensitive, ignores punctuation and only counts whole words.
+    """
+    def __init__(self, terms):
+        self.terms = list(terms)
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [set()]
+        for index, term in enumerate(self.terms):
+            for variant in term_variants(term):
+                self._add(' ' + variant + ' ', index)
+        self._build()
+
+    def _add(self, phrase, index):
+        state = 0
+        for char in phrase:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(set())
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.output[state].add(index)
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] |= self.output[self.fail[child]]
+
+    def find(self, text):
+        """
+        Returns the matched terms in taxonomy order.
+        """
+        found = set()
+        state = 0
+        for char in normalise(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            found |= self.output[state]
+        return [self.terms[index] for index in sorted(found)]
+
+
+def synthetic_texts(count, seed=0):
+    """
+    Returns (texts, expected): resume texts and the taxonomy terms planted in each.
+    """
+    rng = random.Random(seed)
+    texts, expected = [], []
+    for index in range(count):
+        lines = resume_lines(rng, index)
+        planted = rng.sample(sorted(SPELLINGS), 3)
+        lines += ['', 'SECTORS'] + [f"Audit of {rng.choice(SPELLINGS[term])} clients" for term in planted]
+        texts.append('\n'.join(lines))
+        expected.append(set(planted))
+    return texts, expected
+
+
+def recall(found, expected):
+    return sum(len(terms & set(hits)) for terms, hits in zip(expected, found)) / sum(map(len, expected))
+
+
+def report(name, seconds, count, found, expected):
+    print(f"{name:<24}{count / seconds:>12.0f}{seconds / count * 1000 * 1000:>14.0f}{recall(found, expected):>9.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Specific Terms taxonomy index.")
+    parser.add_argument('--resumes', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    texts, expected = synthetic_texts(args.resumes, args.seed)
+    terms = app1_profile.specific_terms
+    started = time.perf_counter()
+    index = TermIndex(terms)
+    print(f"Built the index over {len(terms)} terms in {(time.perf_counter() - started) * 1000:.1f} ms")
+    print(f"{'method':<24}{'resumes/s':>12}{'ms per 1000':>14}{'recall':>9}")
+
+    started = time.perf_counter()
+    found = index.match_many(texts)
+    report('TermIndex (batch)', time.perf_counter() - started, len(texts), found, expected)
+
+    started = time.perf_counter()
+    found = [index.match_many([text])[0] for text in texts]
+    report('TermIndex (per resume)', time.perf_counter() - started, len(texts), found, expected)
+
+    matcher = TermMatcher(terms)
+    started = time.perf_counter()
+    found = [matcher.find(text) for text in texts]
+    report('TermMatcher (exact)', time.perf_counter() - started, len(texts), found, expected)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Local stand-in for the Groq OpenAI-compatible chat completions endpoint.
+
+Answers every request with a JSON object built from the field names found in the
+prompt's format instructions, so the real parsing code runs against realistic output.
+Latency, rate-limit 429s and malformed responses can be injected. Requests for one of
+`small_models` are answered after `small_latency` instead, and `weak_ratio` of them leave
+required fields empty and the email malformed, to exercise cascade escalation.
+Requests with "stream": true are answered as server-sent events, one small delta at a time.
+`output_token_latency` spaces out generated tokens, and `trailing_words` adds the chatter
+models often write after the JSON, which a streaming client can stop reading early.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIELD_PATTERN = re.compile(r'"([^"]+)": string')
+RESUME_PATTERN = re.compile(r'^### (Resume \d+)$', re.M)
+
+
+class MockSettings:
+    def __init__(self, latency=0.5, jitter=0.2, rate_limit_ratio=0.0, malformed_ratio=0.0,
+                 retry_after=1.0, seed=None, small_models=(), small_latency=0.15, weak_ratio=0.0,
+                 token_latency=0.0, output_token_latency=0.0, trailing_words=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.malformed_ratio = malformed_ratio
+        self.retry_after = retry_after
+        self.small_models = set(small_models)
+        self.small_latency = small_latency
+        self.weak_ratio = weak_ratio
+        # Extra seconds per 1000 prompt tokens, as real prompt processing time grows with length
+        self.token_latency = token_latency
+        # Seconds per generated token, after the first one
+        self.output_token_latency = output_token_latency
+        self.trailing_words = trailing_words
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rate_limited = 0
+        self.malformed = 0
+        self.weak = 0
+        self.connections = 0
+        self.requests_by_model = {}
+        self.streams = 0
+        self.streams_cancelled = 0
+
+    def roll(self, ratio):
+        with self.lock:
+            return self.random.random() < ratio
+
+
+def build_completion(prompt, malformed=False, weak=False, trailing_words=0):
+    fields = list(dict.fromkeys(FIELD_PATTERN.findall(prompt)))
+    record = {field: f"mock {field.lower()}" for field in fields}
+    if 'Mail ID' in record:
+        record['Mail ID'] = 'candidate@example.com'
+    if weak:
+        # What a small model gets wrong: a blank name and an email it half copied
+        record.update({field: '' for field in ('Name', 'Work Experience') if field in record})
+        if 'Mail ID' in record:
+            record['Mail ID'] = 'candidate at example'
+    labels = RESUME_PATTERN.findall(prompt)
+    payload = {label: record for label in labels} if labels else record
+    content = json.dumps(payload, indent=4)
+    if malformed:
+        # Drop the closing brace and leave a trailing comma, the usual LLM failure modes
+        content = content.rstrip('}').rstrip() + ','
+    trailing = ''
+    if trailing_words:
+        trailing = '\n\nNote: ' + ' '.join(['the fields above were extracted from the resume text'] * (trailing_words // 9 + 1))
+    return f"```json\n{content}\n```" + trailing
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps connections open between requests, like the real endpoint
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without this, delayed ACKs stall kept-alive connections
+    disable_nagle_algorithm = True
+    settings = MockSettings()
+
+    def setup(self):
+        super().setup()
+        with self.settings.lock:
+            self.settings.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        settings = self.settings
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        model = request.get('model', 'mock')
+        with settings.lock:
+            settings.requests += 1
+            settings.requests_by_model[model] = settings.requests_by_model.get(model, 0) + 1
+        if not self.path.endswith('/chat/completions'):
+            self.send_json(404, {'error': {'message': f'unknown path {self.path}'}})
+            return
+        if settings.roll(settings.rate_limit_ratio):
+            with settings.lock:
+                settings.rate_limited += 1
+            self.send_json(
+                429,
+                {'error': {'message': 'Rate limit reached', 'type': 'tokens', 'code': 'rate_limit_exceeded'}},
+                {'retry-after': str(settings.retry_after)},
+            )
+            return
+
+        small = model in settings.small_models
+        latency = settings.small_latency if small else settings.latency
+        # Jitter scales with the latency so small-model answers stay fast
+        jitter = settings.jitter * latency / settings.latency if settings.latency else 0.0
+        prompt = '\n'.join(message.get('content', '') for message in request.get('messages', []))
+        latency += settings.token_latency * len(prompt) / 4000
+        time.sleep(max(0.0, latency + settings.random.uniform(-jitter, jitter)))
+        malformed = settings.roll(settings.malformed_ratio)
+        if malformed:
+            with settings.lock:
+                settings.malformed += 1
+        weak = small and settings.roll(settings.weak_ratio)
+        if weak:
+            with settings.lock:
+                settings.weak += 1
+        content = build_completion(prompt, malformed, weak, settings.trailing_words)
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        usage = {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+        }
+        if request.get('stream'):
+            self.send_stream(model, content, usage)
+            return
+        time.sleep(settings.output_token_latency * completion_tokens)
+        self.send_json(200, {
+            'id': f'chatcmpl-mock-{settings.requests}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': usage,
+        })
+
+    def send_stream(self, model, content, usage):
+        settings = self.settings
+        with settings.lock:
+            settings.streams += 1
+        completion_id = f'chatcmpl-mock-{settings.requests}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        def event(delta, finish_reason=None, x_groq=None):
+            chunk = {
+                'id': completion_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}],
+            }
+            if x_groq is not None:
+                chunk['x_groq'] = x_groq
+            return f'data: {json.dumps(chunk)}\n\n'
+
+        def send(data):
+            data = data.encode('utf-8')
+            self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+            self.wfile.flush()
+
+        try:
+            send(event({'role': 'assistant', 'content': ''}))
+            # About four tokens per delta
+            for start in range(0, len(content), 16):
+                time.sleep(settings.output_token_latency * 4)
+                send(event({'content': content[start:start + 16]}))
+            send(event({}, 'stop', {'id': completion_id, 'usage': usage}))
+            send('data: [DONE]\n\n')
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading once it had what it needed
+            with settings.lock:
+                settings.streams_cancelled += 1
+            self.close_connection = True
+
+
+def start_server(settings, host='127.0.0.1', port=0):
+    """
+    Starts the mock server in a background thread and returns (server, base_url).
+    """
+    handler = type('ConfiguredMockHandler', (MockHandler,), {'settings': settings})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.5)
+    parser.add_argument('--jitter', type=float, default=0.2)
+    parser.add_argument('--rate-limit-ratio', type=float, default=0.0)
+    parser.add_argument('--malformed-ratio', type=float, default=0.0)
+    parser.add_argument('--token-latency', type=float, default=0.0, help="Extra seconds per 1000 prompt tokens.")
+    parser.add_argument('--small-model', action='append', default=[], help="Model answered fast but less reliably.")
+    parser.add_argument('--small-latency', type=float, default=0.15)
+    parser.add_argument('--output-token-latency', type=float, default=0.0, help="Seconds per generated token.")
+    parser.add_argument('--trailing-words', type=int, default=0, help="Words of chatter after the JSON answer.")
+    parser.add_argument('--weak-ratio', type=float, default=0.0, help="Share of small-model answers that fail checks.")
+    args = parser.parse_args()
+    settings = MockSettings(
+        args.latency, args.jitter, args.rate_limit_ratio, args.malformed_ratio,
+        small_models=args.small_model, small_latency=args.small_latency, weak_ratio=args.weak_ratio,
+        token_latency=args.token_latency, output_token_latency=args.output_token_latency,
+        trailing_words=args.trailing_words,
+    )
+    server, base_url = start_server(settings, port=args.port)
+    print(f"Mock LLM server listening on {base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
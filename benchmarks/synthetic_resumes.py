@@ -0,0 +1,138 @@
+"""
+Generates synthetic PDF and DOCX resumes without any third-party dependencies.
+"""
+import io
+import random
+import zipfile
+
+FIRST_NAMES = ["Charlotte", "Umang", "Priya", "James", "Amelia", "Wei", "Fatima", "Lucas", "Sofia", "Arjun"]
+LAST_NAMES = ["Donald", "Purwar", "Sharma", "Smith", "Chen", "Khan", "Garcia", "Muller", "Rossi", "Nair"]
+COMPANIES = ["EY", "Innodatatics", "Deloitte", "KPMG", "Accenture", "Infosys", "PwC", "Barclays"]
+TITLES = ["Data Scientist", "Audit Manager", "Software Engineer", "Analyst", "Consultant", "Team Lead"]
+SKILLS = [
+    "Python", "SQL", "Power BI", "TensorFlow", "PyTorch", "IFRS", "US GAAP", "AML", "Excel",
+    "Pandas", "NumPy", "Scikit-learn", "AWS", "Docker", "Hedge Funds", "Private Equity", "Derivatives",
+]
+SOFT_SKILLS = ["Communication", "Leadership", "Teamwork", "Problem-solving", "Time Management"]
+
+
+def resume_lines(rng, index, experience_entries=4):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    lines = [
+        f"{first} {last}",
+        f"{first.lower()}.{last.lower()}{index}@example.com | linkedin.com/in/{first.lower()}-{last.lower()}-{index}",
+        "",
+        "EXPERIENCE",
+    ]
+    for _ in range(experience_entries):
+        start = rng.randint(2005, 2020)
+        lines.append(f"{rng.choice(TITLES)} at {rng.choice(COMPANIES)} ({start} - {start + rng.randint(1, 4)})")
+        for _ in range(3):
+            lines.append(f"- Delivered {rng.choice(SKILLS)} work for {rng.randint(2, 40)} clients across {rng.choice(COMPANIES)} teams.")
+    lines += [
+        "",
+        "SKILLS",
+        ", ".join(rng.sample(SKILLS, 8)),
+        ", ".join(rng.sample(SOFT_SKILLS, 3)),
+        "",
+        "EDUCATION",
+        f"BSc Computer Science, University {rng.randint(1, 50)}, {rng.randint(2000, 2018)}",
+        "",
+        "PROJECTS",
+        f"Project {rng.randint(1, 999)}: {rng.choice(SKILLS)} dashboard",
+    ]
+    return lines
+
+
+def _pdf_escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_pdf(lines, lines_per_page=45):
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    # Object 1: catalog, 2: page tree, 3: font, then a (page, content stream) pair per page
+    objects = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for page_lines in pages:
+        commands = ["BT", "/F1 10 Tf", "12 TL", "50 800 Td"]
+        for line in page_lines:
+            commands.append(f"({_pdf_escape(line)}) Tj T*")
+        commands.append("ET")
+        stream = "\n".join(commands).encode('latin-1', 'replace')
+        content_id = len(objects) + 2
+        page_ids.append(len(objects) + 1)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream")
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def _xml_escape(line):
+    return line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def make_docx(lines):
+    paragraphs = "".join(f"<w:p><w:r><w:t xml:space=\"preserve\">{_xml_escape(line)}</w:t></w:r></w:p>" for line in lines)
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '</Types>'
+        ))
+        docx.writestr('_rels/.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="word/document.xml"/>'
+            '</Relationships>'
+        ))
+        docx.writestr('word/document.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{paragraphs}</w:body></w:document>'
+        ))
+    return out.getvalue()
+
+
+def generate_corpus(count, seed=0, docx_ratio=0.3, long_ratio=0.1, long_entries=30):
+    """
+    Yields (filename, file_bytes) pairs for `count` synthetic resumes.
+    About `long_ratio` of them are multi-page documents of 12 to `long_entries` entries.
+    """
+    rng = random.Random(seed)
+    for index in range(count):
+        entries = rng.randint(12, long_entries) if rng.random() < long_ratio else rng.randint(2, 5)
+        lines = resume_lines(rng, index, entries)
+        if rng.random() < docx_ratio:
+            yield f"resume_{index:05d}.docx", make_docx(lines)
+        else:
+            yield f"resume_{index:05d}.pdf", make_pdf(lines)
+
+
+def write_zip(path, count, seed=0):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for filename, file_bytes in generate_corpus(count, seed):
+            archive.writestr(filename, file_bytes)
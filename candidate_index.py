@@ -0,0 +1,137 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+
+INDEX_PATH = 'candidate_index.sqlite3'
+# '_' joins the words of a multi-word tag into one token; '+' and '#' keep C++ and C# whole
+TOKENIZER = "unicode61 tokenchars '_+#'"
+# bm25 weights for the tags and body columns: whole-item matches rank above stray words
+TAG_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+_TAG_SEPARATOR = re.compile(r'[^\w+#]+')
+_QUERY_TOKEN = re.compile(r'"[^"]*"|\(|\)|[^\s()"]+')
+OPERATORS = {'AND', 'OR', 'NOT'}
+
+
+def split_items(value):
+    return [item.strip() for item in re.split(r'[,;\n]', value or '') if item.strip()]
+
+
+def tag_token(item):
+    """
+    Normalises one skill, company or term ("Machine Learning", "node.js") to a single token.
+    """
+    return _TAG_SEPARATOR.sub('_', item.lower()).strip('_')
+
+
+def build_match(query):
+    """
+    Translates a search box query into an FTS5 MATCH expression. Words and "quoted phrases"
+    are terms, combined with AND (the default between terms), OR, NOT and parentheses;
+    a trailing * matches by prefix. Each term matches a whole tag or the same words anywhere.
+    """
+    parts = []
+    for token in _QUERY_TOKEN.findall(query):
+        if token.upper() in OPERATORS:
+            parts.append(token.upper())
+            continue
+        if token in '()':
+            parts.append(token)
+            continue
+        prefix = token.endswith('*')
+        text = token.strip('"').rstrip('*').strip()
+        words = _TAG_SEPARATOR.sub(' ', text.lower()).split()
+        if not words:
+            continue
+        star = '*' if prefix else ''
+        parts.append(f'(tags : "{"_".join(words)}"{star} OR body : "{" ".join(words)}"{star})')
+    # Terms next to each other are ANDed, as FTS5 does for bare words
+    match = []
+    for part in parts:
+        if match and match[-1] not in OPERATORS and match[-1] != '(' and part not in OPERATORS and part != ')':
+            match.append('AND')
+        match.append(part)
+    return ' '.join(match)
+
+
+class CandidateIndex:
+    """
+    Full-text index over parsed resume rows, kept in SQLite FTS5. Each row is stored once
+    per (source, filename), so re-indexing a file replaces its entry. The 'tags' column
+    holds one token per skill, company or term from the profile's tag fields, and 'body'
+    holds the text of every field.
+    """
+    def __init__(self, path=INDEX_PATH):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(
+            f'''CREATE TABLE IF NOT EXISTS candidates (
+                id INTEGER PRIMARY KEY,
+                source TEXT NOT NULL,
+                filename TEXT NOT NULL,
+                row TEXT NOT NULL,
+                indexed_at REAL NOT NULL,
+                UNIQUE (source, filename)
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5(
+                tags, body, tokenize="{TOKENIZER}"
+            );'''
+        )
+
+    def add(self, source, filename, row, tag_fields=()):
+        """
+        Indexes one parsed row. `source` names where it came from (a job or an output file).
+        """
+        tags = ' '.join(
+            token for field in tag_fields for token in map(tag_token, split_items(row.get(field))) if token
+        )
+        body = '\n'.join(str(value) for value in row.values() if value)
+        with self.lock, self.conn:
+            existing = self.conn.execute(
+                'SELECT id FROM candidates WHERE source = ? AND filename = ?', (source, filename)
+            ).fetchone()
+            if existing is not None:
+                self.conn.execute('DELETE FROM candidates_fts WHERE rowid = ?', existing)
+                self.conn.execute('DELETE FROM candidates WHERE id = ?', existing)
+            cursor = self.conn.execute(
+                'INSERT INTO candidates (source, filename, row, indexed_at) VALUES (?, ?, ?, ?)',
+                (source, filename, json.dumps(row), time.time()),
+            )
+            self.conn.execute(
+                'INSERT INTO candidates_fts (rowid, tags, body) VALUES (?, ?, ?)', (cursor.lastrowid, tags, body)
+            )
+
+    def search(self, query, limit=50):
+        """
+        Returns up to `limit` matches, best first, as dicts with 'source', 'filename',
+        'score' (higher is better) and the parsed 'row'. Raises ValueError for a query
+        FTS5 can't run, such as one starting with NOT.
+        """
+        match = build_match(query)
+        if not match:
+            return []
+        try:
+            with self.lock:
+                rows = self.conn.execute(
+                    f'''SELECT c.source, c.filename, c.row, bm25(candidates_fts, {TAG_WEIGHT}, {BODY_WEIGHT}) AS rank
+                    FROM candidates_fts JOIN candidates c ON c.id = candidates_fts.rowid
+                    WHERE candidates_fts MATCH ? ORDER BY rank LIMIT ?''',
+                    (match, limit),
+                ).fetchall()
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Can't search for {query!r}: {e}")
+        return [
+            {'source': source, 'filename': filename, 'score': -rank, 'row': json.loads(row)}
+            for source, filename, row, rank in rows
+        ]
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM candidates').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
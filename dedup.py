@@ -0,0 +1,170 @@
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from rule_extractors import normalise
+
+# Word shingle length and MinHash size; 16 bands of 4 rows find pairs above roughly 0.5
+# estimated Jaccard similarity, which are then checked against `threshold`
+SHINGLE_WORDS = 5
+NUM_HASHES = 64
+BANDS = 16
+# Texts with fewer shingles (e.g. scanned PDFs with no text layer) are never matched
+MIN_SHINGLES = 20
+# Documents kept, evicted oldest first like ExtractionCache entries, checked every EVICT_EVERY adds
+MAX_DOCUMENTS = 100_000
+EVICT_EVERY = 1000
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, _PRIME, NUM_HASHES).astype(np.int64)
+_B = _rng.randint(0, _PRIME, NUM_HASHES).astype(np.int64)
+
+
+def shingles(text):
+    words = normalise(text).split()
+    return {' '.join(words[index:index + SHINGLE_WORDS]) for index in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+
+
+def minhash(shingle_set):
+    hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingle_set), np.int64, len(shingle_set))
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+class DuplicateIndex:
+    """
+    MinHash LSH index over normalised resume text. Documents live in SQLite, so one index
+    catches duplicates both within the current batch and against earlier runs; ':memory:'
+    keeps it to the current process. Lookups only compare documents sharing an LSH bucket.
+    Each normalised text is indexed once. Documents older than `max_age_days` (as for the
+    response cache they point into) or beyond the newest `max_documents` are evicted.
+    """
+    def __init__(self, path=':memory:', threshold=0.8, max_documents=MAX_DOCUMENTS, max_age_days=30):
+        self.threshold = threshold
+        self.rows = NUM_HASHES // BANDS
+        self.max_documents = max_documents
+        self.max_age = max_age_days * 24 * 60 * 60
+        self.adds = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.executescript(
+            '''CREATE TABLE IF NOT EXISTS dedup_documents (
+                id INTEGER PRIMARY KEY,
+                filename TEXT NOT NULL,
+                exact_hash TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                key TEXT,
+                scope TEXT,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS dedup_documents_exact ON dedup_documents (exact_hash);
+            CREATE TABLE IF NOT EXISTS dedup_buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                document_id INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS dedup_buckets_lookup ON dedup_buckets (band, bucket);'''
+        )
+        with self.lock:
+            self._evict()
+
+    def fingerprint(self, text):
+        """
+        Returns (exact_hash, signature), or None for texts too short to compare.
+        """
+        shingle_set = shingles(text)
+        if len(shingle_set) < MIN_SHINGLES:
+            return None
+        exact_hash = hashlib.sha256(normalise(text).encode('utf-8')).hexdigest()
+        return exact_hash, minhash(shingle_set)
+
+    def _buckets(self, signature):
+        for band in range(BANDS):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            yield band, zlib.crc32(rows.tobytes())
+
+    def find(self, fingerprint):
+        """
+        Returns the closest earlier document as a dict with 'id', 'filename', 'key', 'scope' and
+        'similarity' (1.0 for identical normalised text), or None if nothing passes the threshold.
+        """
+        if fingerprint is None:
+            return None
+        exact_hash, signature = fingerprint
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT id, filename, key, scope FROM dedup_documents WHERE exact_hash = ? ORDER BY id LIMIT 1',
+                (exact_hash,),
+            ).fetchone()
+            if row is not None:
+                return {'id': row[0], 'filename': row[1], 'key': row[2], 'scope': row[3], 'similarity': 1.0}
+            candidates = set()
+            for band, bucket in self._buckets(signature):
+                candidates.update(document_id for (document_id,) in self.conn.execute(
+                    'SELECT document_id FROM dedup_buckets WHERE band = ? AND bucket = ?', (band, bucket)
+                ))
+            best = None
+            for document_id in sorted(candidates):
+                filename, key, scope, stored = self.conn.execute(
+                    'SELECT filename, key, scope, signature FROM dedup_documents WHERE id = ?', (document_id,)
+                ).fetchone()
+                similarity = float(np.mean(np.frombuffer(stored, np.int64) == signature))
+                if similarity >= self.threshold and (best is None or similarity > best['similarity']):
+                    best = {'id': document_id, 'filename': filename, 'key': key, 'scope': scope, 'similarity': similarity}
+            return best
+
+    def add(self, filename, fingerprint, key=None, scope=None):
+        """
+        Indexes a document and returns its id, or None if it was too short to index or its
+        text is already indexed under the same `scope`. Text indexed under another scope
+        is pointed at this document instead.
+        `key` is its response cache key, so later duplicates can reuse the extraction, and
+        `scope` identifies the extraction settings that key was made under.
+        """
+        if fingerprint is None:
+            return None
+        exact_hash, signature = fingerprint
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT id, scope FROM dedup_documents WHERE exact_hash = ? ORDER BY id LIMIT 1', (exact_hash,)
+            ).fetchone()
+            if row is not None:
+                if row[1] == scope:
+                    return None
+                # Its key was made under other settings, so it can't be reused any more
+                self.conn.execute(
+                    'UPDATE dedup_documents SET filename = ?, key = ?, scope = ?, created_at = ? WHERE id = ?',
+                    (filename, key, scope, time.time(), row[0]),
+                )
+                self.conn.commit()
+                return row[0]
+            cursor = self.conn.execute(
+                'INSERT INTO dedup_documents (filename, exact_hash, signature, key, scope, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (filename, exact_hash, signature.tobytes(), key, scope, time.time()),
+            )
+            document_id = cursor.lastrowid
+            self.conn.executemany(
+                'INSERT INTO dedup_buckets (band, bucket, document_id) VALUES (?, ?, ?)',
+                [(band, bucket, document_id) for band, bucket in self._buckets(signature)],
+            )
+            self.adds += 1
+            if self.adds % EVICT_EVERY == 0:
+                self._evict()
+            self.conn.commit()
+        return document_id
+
+    def _evict(self):
+        self.conn.execute('DELETE FROM dedup_documents WHERE created_at < ?', (time.time() - self.max_age,))
+        self.conn.execute(
+            'DELETE FROM dedup_documents WHERE id IN '
+            '(SELECT id FROM dedup_documents ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_documents,),
+        )
+        self.conn.execute('DELETE FROM dedup_buckets WHERE document_id NOT IN (SELECT id FROM dedup_documents)')
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
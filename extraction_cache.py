@@ -0,0 +1,112 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+class ExtractionCache:
+    """
+    Persistent SQLite cache of LLM responses keyed by resume content and extraction settings.
+    Entries older than `max_age_days` are dropped, and the least recently used entries
+    are evicted once the stored responses exceed `max_bytes`. Other kinds of entries, such
+    as extracted document text, live in their own `table` of the same database.
+    The stored size is kept up to date by triggers in a one-row `<table>_size` table, so a
+    put doesn't have to add up every entry, whichever process wrote them.
+    """
+    def __init__(self, path='extraction_cache.sqlite3', max_bytes=256 * 1024 * 1024, max_age_days=30,
+                 table='responses'):
+        self.path = path
+        self.table = table
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 24 * 60 * 60
+        self.lock = threading.Lock()
+        # Shared by every batch_cli run and worker process, so writers wait for each other
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            f'''CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )'''
+        )
+        self.conn.execute(f'CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at)')
+        self.conn.execute(f'CREATE INDEX IF NOT EXISTS {table}_created ON {table} (created_at)')
+        # IMMEDIATE takes the write lock up front: a read upgraded to a write fails at once
+        # instead of waiting out the timeout when another process is setting up the same table
+        self.conn.executescript(
+            f'''BEGIN IMMEDIATE;
+            CREATE TABLE IF NOT EXISTS {table}_size (bytes INTEGER NOT NULL);
+            INSERT INTO {table}_size SELECT (SELECT COALESCE(SUM(size), 0) FROM {table})
+                WHERE NOT EXISTS (SELECT 1 FROM {table}_size);
+            CREATE TRIGGER IF NOT EXISTS {table}_size_insert AFTER INSERT ON {table}
+                BEGIN UPDATE {table}_size SET bytes = bytes + new.size; END;
+            CREATE TRIGGER IF NOT EXISTS {table}_size_delete AFTER DELETE ON {table}
+                BEGIN UPDATE {table}_size SET bytes = bytes - old.size; END;
+            CREATE TRIGGER IF NOT EXISTS {table}_size_update AFTER UPDATE OF size ON {table}
+                BEGIN UPDATE {table}_size SET bytes = bytes + new.size - old.size; END;
+            COMMIT;'''
+        )
+
+    @staticmethod
+    def make_key(file_bytes, format_instructions, prompt_template, model_name, *settings):
+        """
+        Hashes the resume bytes together with everything that shapes the LLM output.
+        Extra `settings` (e.g. preprocessing options) are folded into the key as strings.
+        """
+        digest = hashlib.sha256()
+        for part in (file_bytes, format_instructions, prompt_template, model_name, *map(str, settings)):
+            if isinstance(part, str):
+                part = part.encode('utf-8')
+            digest.update(len(part).to_bytes(8, 'big'))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                f'SELECT value FROM {self.table} WHERE key = ? AND created_at >= ?',
+                (key, now - self.max_age),
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(f'UPDATE {self.table} SET accessed_at = ? WHERE key = ?', (now, key))
+            self.conn.commit()
+            return row[0]
+
+    def put(self, key, value):
+        now = time.time()
+        with self.lock:
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete wouldn't fire the size trigger
+            self.conn.execute(
+                f'''INSERT INTO {self.table} (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET value = excluded.value, size = excluded.size,
+                created_at = excluded.created_at, accessed_at = excluded.accessed_at''',
+                (key, value, len(value.encode('utf-8')), now, now),
+            )
+            self._evict(now)
+            self.conn.commit()
+
+    def delete(self, key):
+        with self.lock:
+            self.conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+            self.conn.commit()
+
+    def _evict(self, now):
+        self.conn.execute(f'DELETE FROM {self.table} WHERE created_at < ?', (now - self.max_age,))
+        total = self.conn.execute(f'SELECT bytes FROM {self.table}_size').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in self.conn.execute(f'SELECT key, size FROM {self.table} ORDER BY accessed_at'):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self.conn.executemany(f'DELETE FROM {self.table} WHERE key = ?', stale)
+
+    def close(self):
+        self.conn.close()
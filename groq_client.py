@@ -0,0 +1,79 @@
+import importlib.util
+import os
+import threading
+
+import httpx
+from groq import Groq
+
+# Connections kept per client; above the in-flight limits so requests never wait for a socket
+MAX_CONNECTIONS = 32
+MAX_KEEPALIVE_CONNECTIONS = 16
+# Seconds an idle connection stays open for reuse
+KEEPALIVE_EXPIRY = 60.0
+# Seconds to connect, and to wait for a whole completion
+CONNECT_TIMEOUT = 5.0
+REQUEST_TIMEOUT = 60.0
+# HTTP/2 multiplexes requests over one connection, but needs the optional h2 package
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def client_settings(max_connections=MAX_CONNECTIONS, max_keepalive=MAX_KEEPALIVE_CONNECTIONS,
+                    timeout=REQUEST_TIMEOUT, http2=True):
+    """
+    Keyword arguments for an httpx client with a bounded, keep-alive connection pool.
+    HTTP/2 is only used when h2 is installed; otherwise connections are reused over HTTP/1.1.
+    """
+    return {
+        'limits': httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        'timeout': httpx.Timeout(timeout, connect=CONNECT_TIMEOUT),
+        'http2': http2 and HTTP2_AVAILABLE,
+    }
+
+
+def default_api_key():
+    """
+    The GROQ_API_KEY environment variable, or else the `[groq] api_key` entry of Streamlit's
+    secrets.toml that the apps used to read, or None when neither is set.
+    """
+    api_key = os.environ.get('GROQ_API_KEY')
+    if api_key:
+        return api_key
+    import streamlit as st
+    try:
+        return st.secrets['groq']['api_key']
+    except (FileNotFoundError, KeyError):
+        return None
+
+
+def get_client(api_key, base_url=None, max_retries=0, **settings):
+    """
+    Returns the process-wide Groq client for these arguments, creating it on first use.
+    Reusing one client keeps its connections (and TLS sessions) open between requests.
+    Retries default to 0 because the pipeline retries with its own backoff.
+    """
+    key = (api_key, base_url, max_retries, tuple(sorted(settings.items())))
+    with _lock:
+        if key not in _clients:
+            config = client_settings(**settings)
+            _clients[key] = Groq(
+                api_key=api_key, base_url=base_url, max_retries=max_retries,
+                timeout=config['timeout'], http_client=httpx.Client(**config),
+            )
+        return _clients[key]
+
+
+def close_clients():
+    """
+    Closes every shared client and its connections.
+    """
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
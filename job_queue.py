@@ -0,0 +1,331 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+QUEUE_PATH = 'job_queue.sqlite3'
+# A claimed resume whose worker stops heartbeating for this long is handed to another worker
+LEASE_SECONDS = 300
+# A resume whose worker is lost this many times (e.g. a PDF that crashes or hangs it) fails
+MAX_ATTEMPTS = 3
+WORKER_TIMEOUT = 30
+
+
+class JobQueue:
+    """
+    SQLite-backed queue of parsing jobs shared by the Streamlit apps and job_worker.py.
+    A job holds the uploaded resumes; workers claim a few resumes at a time from whichever
+    active job has the fewest resumes in progress, so concurrent jobs share the workers fairly.
+    Each process should open its own JobQueue.
+    """
+    def __init__(self, path=QUEUE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(
+            '''CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                owner TEXT,
+                profile TEXT NOT NULL,
+                batch_mode INTEGER NOT NULL,
+                total INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS job_resumes (
+                job_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                filename TEXT NOT NULL,
+                file_bytes BLOB,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                claimed_at REAL,
+                finished_at REAL,
+                row TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                trimmed_tokens INTEGER NOT NULL DEFAULT 0,
+                tokens_saved INTEGER NOT NULL DEFAULT 0,
+                seconds REAL,
+                prompt_tokens REAL NOT NULL DEFAULT 0,
+                completion_tokens REAL NOT NULL DEFAULT 0,
+                duplicate_of TEXT,
+                first_field_at REAL,
+                cache_hit INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (job_id, position)
+            );
+            CREATE INDEX IF NOT EXISTS job_resumes_status ON job_resumes (status, job_id);
+            CREATE TABLE IF NOT EXISTS workers (
+                id TEXT PRIMARY KEY,
+                pid INTEGER,
+                heartbeat_at REAL NOT NULL,
+                metrics TEXT
+            );'''
+        )
+        # Queues created before per-resume metrics existed
+        for table, column, definition in (
+            ('job_resumes', 'seconds', 'REAL'),
+            ('job_resumes', 'prompt_tokens', 'REAL NOT NULL DEFAULT 0'),
+            ('job_resumes', 'completion_tokens', 'REAL NOT NULL DEFAULT 0'),
+            ('job_resumes', 'duplicate_of', 'TEXT'),
+            ('job_resumes', 'first_field_at', 'REAL'),
+            ('job_resumes', 'cache_hit', 'INTEGER NOT NULL DEFAULT 0'),
+            ('workers', 'metrics', 'TEXT'),
+        ):
+            columns = [row[1] for row in self.conn.execute(f'PRAGMA table_info({table})')]
+            if column not in columns:
+                self.conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+    def submit(self, files, profile, batch_mode=False, owner=None):
+        """
+        Stores (filename, file_bytes) pairs as a new job and returns its ID.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        rows = [(job_id, position, filename, file_bytes) for position, (filename, file_bytes) in enumerate(files)]
+        with self._transaction():
+            self.conn.execute(
+                'INSERT INTO jobs (id, owner, profile, batch_mode, total, created_at, finished_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job_id, owner, profile, int(batch_mode), len(rows), now, None if rows else now),
+            )
+            self.conn.executemany(
+                'INSERT INTO job_resumes (job_id, position, filename, file_bytes) VALUES (?, ?, ?, ?)', rows
+            )
+        return job_id
+
+    def claim(self, worker_id, limit=8):
+        """
+        Claims up to `limit` pending resumes of one job for `worker_id`.
+        Returns (job, [(position, filename, file_bytes), ...]), or (None, []) when there is no work.
+        """
+        now = time.time()
+        with self._transaction():
+            expired = now - LEASE_SECONDS
+            lost_jobs = [job_id for job_id, in self.conn.execute(
+                "SELECT DISTINCT job_id FROM job_resumes WHERE status = 'running' AND claimed_at < ? AND attempts >= ?",
+                (expired, MAX_ATTEMPTS),
+            )]
+            self.conn.execute(
+                '''UPDATE job_resumes SET status = 'failed', worker = NULL, row = NULL, file_bytes = NULL, finished_at = ?,
+                   error = 'Worker lost ' || attempts || ' times while processing this resume'
+                   WHERE status = 'running' AND claimed_at < ? AND attempts >= ?''',
+                (now, expired, MAX_ATTEMPTS),
+            )
+            for job_id in lost_jobs:
+                self._finish_job(job_id, now)
+            # Other work held by workers that died or stalled goes back to the queue
+            self.conn.execute(
+                '''UPDATE job_resumes SET status = 'pending', worker = NULL, row = NULL
+                   WHERE status = 'running' AND claimed_at < ?''',
+                (expired,),
+            )
+            row = self.conn.execute(
+                '''SELECT j.id, j.profile, j.batch_mode FROM jobs j
+                   WHERE EXISTS (SELECT 1 FROM job_resumes r WHERE r.job_id = j.id AND r.status = 'pending')
+                   ORDER BY (SELECT COUNT(*) FROM job_resumes r WHERE r.job_id = j.id AND r.status = 'running'),
+                            j.created_at
+                   LIMIT 1'''
+            ).fetchone()
+            if row is None:
+                return None, []
+            job = {'id': row[0], 'profile': row[1], 'batch_mode': bool(row[2])}
+            claimed = self.conn.execute(
+                '''SELECT position, filename, file_bytes FROM job_resumes
+                   WHERE job_id = ? AND status = 'pending' ORDER BY position LIMIT ?''',
+                (job['id'], limit),
+            ).fetchall()
+            self.conn.executemany(
+                '''UPDATE job_resumes SET status = 'running', worker = ?, claimed_at = ?, attempts = attempts + 1
+                   WHERE job_id = ? AND position = ?''',
+                [(worker_id, now, job['id'], position) for position, _, _ in claimed],
+            )
+            self.conn.execute('UPDATE jobs SET started_at = COALESCE(started_at, ?) WHERE id = ?', (now, job['id']))
+        return job, claimed
+
+    def update_partial(self, job_id, position, worker_id, row):
+        """
+        Stores the fields of a resume that have arrived so far, while `worker_id` still holds it.
+        """
+        self.conn.execute(
+            "UPDATE job_resumes SET row = ?, first_field_at = COALESCE(first_field_at, ?) "
+            "WHERE job_id = ? AND position = ? AND status = 'running' AND worker = ?",
+            (json.dumps(row), time.time(), job_id, position, worker_id),
+        )
+
+    def complete(self, job_id, position, worker_id, row=None, error=None, trimmed_tokens=0, tokens_saved=0,
+                 seconds=None, usage=None, duplicate_of=None, cache_hit=False):
+        """
+        Records the outcome of one resume; `row` is the parsed record, or None with an `error`.
+        `seconds` is the time spent on it across stages and `usage` the LLM token usage.
+        `duplicate_of` names the earlier resume it duplicates, if any, and `cache_hit` says
+        whether its response came from the response cache.
+        Returns False, recording nothing, if `worker_id` no longer holds the resume, e.g.
+        because its lease expired and another worker reclaimed it.
+        """
+        usage = usage or {}
+        now = time.time()
+        # Without streaming, a resume's fields all arrive when it completes
+        with self._transaction():
+            updated = self.conn.execute(
+                '''UPDATE job_resumes SET status = ?, finished_at = ?, row = ?, error = ?,
+                   trimmed_tokens = ?, tokens_saved = ?, seconds = ?, prompt_tokens = ?, completion_tokens = ?,
+                   duplicate_of = ?, cache_hit = ?, file_bytes = NULL,
+                   first_field_at = COALESCE(first_field_at, ?)
+                   WHERE job_id = ? AND position = ? AND status = 'running' AND worker = ?''',
+                ('failed' if row is None else 'done', now, None if row is None else json.dumps(row),
+                 error, trimmed_tokens, tokens_saved, seconds, usage.get('prompt_tokens', 0),
+                 usage.get('completion_tokens', 0), duplicate_of, int(cache_hit), None if row is None else now, job_id, position,
+                 worker_id),
+            ).rowcount
+            if not updated:
+                return False
+            self._finish_job(job_id, now)
+        return True
+
+    def _finish_job(self, job_id, now):
+        self.conn.execute(
+            '''UPDATE jobs SET finished_at = ? WHERE id = ? AND NOT EXISTS
+               (SELECT 1 FROM job_resumes WHERE job_id = ? AND status IN ('pending', 'running'))''',
+            (now, job_id, job_id),
+        )
+
+    def release(self, job_id, positions, worker_id):
+        """
+        Puts resumes `worker_id` still holds back in the queue, e.g. when it is shutting down.
+        Their claim doesn't count against MAX_ATTEMPTS, since the worker wasn't lost.
+        """
+        with self._transaction():
+            self.conn.executemany(
+                "UPDATE job_resumes SET status = 'pending', worker = NULL, row = NULL, attempts = attempts - 1 "
+                "WHERE job_id = ? AND position = ? AND status = 'running' AND worker = ?",
+                [(job_id, position, worker_id) for position in positions],
+            )
+
+    def progress(self, job_id):
+        """
+        Returns status counts, elapsed time and throughput for a job, or None if it doesn't exist.
+        'first_field_seconds' and 'first_row_seconds' are how long after work started the first
+        field and the first whole row arrived (None until they have).
+        """
+        job = self.conn.execute(
+            'SELECT total, created_at, started_at, finished_at FROM jobs WHERE id = ?', (job_id,)
+        ).fetchone()
+        if job is None:
+            return None
+        total, created_at, started_at, finished_at = job
+        counts = dict.fromkeys(('pending', 'running', 'done', 'failed'), 0)
+        counts.update(self.conn.execute(
+            'SELECT status, COUNT(*) FROM job_resumes WHERE job_id = ? GROUP BY status', (job_id,)
+        ).fetchall())
+        first_field_at, first_row_at = self.conn.execute(
+            '''SELECT MIN(first_field_at), MIN(CASE WHEN status = 'done' THEN finished_at END)
+               FROM job_resumes WHERE job_id = ?''',
+            (job_id,),
+        ).fetchone()
+        finished = counts['done'] + counts['failed']
+        elapsed = ((finished_at or time.time()) - started_at) if started_at else 0.0
+        return {
+            **counts,
+            'total': total,
+            'finished': finished_at is not None,
+            'queued_seconds': (started_at or time.time()) - created_at,
+            'elapsed': elapsed,
+            'per_minute': finished / elapsed * 60 if elapsed else 0.0,
+            'first_field_seconds': first_field_at - started_at if first_field_at and started_at else None,
+            'first_row_seconds': first_row_at - started_at if first_row_at and started_at else None,
+        }
+
+    def results(self, job_id):
+        """
+        Returns the finished resumes of a job in upload order as dicts with position, filename, status, row,
+        error, trimmed_tokens, tokens_saved, seconds, prompt_tokens, completion_tokens, duplicate_of
+        and cache_hit.
+        """
+        rows = self.conn.execute(
+            '''SELECT position, filename, status, row, error, trimmed_tokens, tokens_saved, seconds,
+                      prompt_tokens, completion_tokens, duplicate_of, cache_hit FROM job_resumes
+               WHERE job_id = ? AND status IN ('done', 'failed') ORDER BY position''',
+            (job_id,),
+        ).fetchall()
+        return [
+            {
+                'position': position,
+                'filename': filename,
+                'status': status,
+                'row': json.loads(row) if row else None,
+                'error': error,
+                'trimmed_tokens': trimmed_tokens,
+                'tokens_saved': tokens_saved,
+                'seconds': seconds,
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'duplicate_of': duplicate_of,
+                'cache_hit': bool(cache_hit),
+            }
+            for (position, filename, status, row, error, trimmed_tokens, tokens_saved, seconds,
+                 prompt_tokens, completion_tokens, duplicate_of, cache_hit) in rows
+        ]
+
+    def partial_rows(self, job_id):
+        """
+        Returns the running resumes of a job that have some fields already, in upload order,
+        as dicts with position, filename and the partial row.
+        """
+        rows = self.conn.execute(
+            '''SELECT position, filename, row FROM job_resumes
+               WHERE job_id = ? AND status = 'running' AND row IS NOT NULL ORDER BY position''',
+            (job_id,),
+        ).fetchall()
+        return [{'position': position, 'filename': filename, 'row': json.loads(row)} for position, filename, row in rows]
+
+    def heartbeat(self, worker_id, metrics=None):
+        """
+        Marks a worker as alive, publishes its metrics snapshot and extends the lease on the resumes it holds.
+        """
+        now = time.time()
+        with self._transaction():
+            self.conn.execute(
+                'INSERT OR REPLACE INTO workers (id, pid, heartbeat_at, metrics) VALUES (?, ?, ?, ?)',
+                (worker_id, os.getpid(), now, json.dumps(metrics) if metrics is not None else None),
+            )
+            self.conn.execute(
+                "UPDATE job_resumes SET claimed_at = ? WHERE worker = ? AND status = 'running'", (now, worker_id)
+            )
+
+    def remove_worker(self, worker_id):
+        self.conn.execute('DELETE FROM workers WHERE id = ?', (worker_id,))
+
+    def worker_metrics(self):
+        """
+        Returns the latest metrics snapshot of every live worker.
+        """
+        rows = self.conn.execute(
+            'SELECT metrics FROM workers WHERE heartbeat_at >= ? AND metrics IS NOT NULL',
+            (time.time() - WORKER_TIMEOUT,),
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def live_workers(self):
+        return self.conn.execute(
+            'SELECT COUNT(*) FROM workers WHERE heartbeat_at >= ?', (time.time() - WORKER_TIMEOUT,)
+        ).fetchone()[0]
+
+    def _transaction(self):
+        return _Transaction(self.conn)
+
+    def close(self):
+        self.conn.close()
+
+
+class _Transaction:
+    # BEGIN IMMEDIATE takes the write lock up front so two workers can't claim the same resumes
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
@@ -0,0 +1,259 @@
+"""
+Background workers for jobs submitted from the Streamlit apps.
+
+    python job_worker.py --workers 4
+
+Each worker process claims a few resumes at a time from the job queue, runs them through
+the pipeline and records every result as it finishes. The API quota is split evenly
+between the workers. The Groq API key is read from --api-key, GROQ_API_KEY or the
+[groq] api_key entry of .streamlit/secrets.toml.
+With --cascade, a smaller model answers first and only answers that fail the profile's
+checks go to the large model. Responses are streamed so each resume's row fills in on the
+apps' job pages as its fields arrive (--no-stream turns this off). With --metrics-port, the combined metrics of all workers are served at /metrics
+(Prometheus text) and /metrics.json.
+"""
+import argparse
+import importlib
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+import uuid
+
+from batch_runner import make_request_completions, run_resumes
+from candidate_index import INDEX_PATH, CandidateIndex
+from dedup import DuplicateIndex
+from extraction_cache import ExtractionCache
+from groq_client import default_api_key, get_client
+from job_queue import QUEUE_PATH, WORKER_TIMEOUT, JobQueue
+from llm_dispatch import RateLimiter
+from metrics import Metrics, merge_snapshots, serve
+from text_extraction import ExtractionPool
+
+CLAIM_SIZE = 8
+POLL_SECONDS = 1.0
+# How often the fields of resumes still streaming in are written to the queue
+PARTIAL_SECONDS = 0.5
+
+
+def heartbeat_loop(queue_path, worker_id, metrics, stop):
+    job_queue = JobQueue(queue_path)
+    try:
+        while not stop.is_set():
+            job_queue.heartbeat(worker_id, metrics.snapshot())
+            stop.wait(WORKER_TIMEOUT / 3)
+        job_queue.remove_worker(worker_id)
+    finally:
+        job_queue.close()
+
+
+class PartialRows:
+    """
+    Collects partial rows from the pipeline's threads and writes the latest one of each
+    resume `worker_id` holds to the queue every PARTIAL_SECONDS, over its own connection.
+    """
+    def __init__(self, queue_path, worker_id):
+        self.worker_id = worker_id
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(queue_path,), daemon=True)
+        self.thread.start()
+
+    def put(self, job_id, position, row):
+        with self.lock:
+            self.pending[job_id, position] = row
+
+    def run(self, queue_path):
+        job_queue = JobQueue(queue_path)
+        try:
+            while not self.stop.wait(PARTIAL_SECONDS):
+                self.flush(job_queue)
+        finally:
+            job_queue.close()
+
+    def flush(self, job_queue):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        for (job_id, position), row in pending.items():
+            # Ignored once the resume has completed, so a late write can't replace its final row
+            job_queue.update_partial(job_id, position, self.worker_id, row)
+
+    def close(self):
+        self.stop.set()
+        self.thread.join()
+
+
+def run_claimed(job_queue, worker_id, profile, job, claimed, request_completion, cache, text_cache, dedup, rate_limiter,
+                metrics, escalate_completion=None, search_index=None, chunked=False, partial_rows=None,
+                extraction_pool=None):
+    files = [(filename, file_bytes) for _, filename, file_bytes in claimed]
+    positions = [position for position, _, _ in claimed]
+    on_fields = None
+    if partial_rows is not None:
+        on_fields = lambda resume, row: partial_rows.put(job['id'], positions[resume['index']], row)
+    done = 0
+    results = run_resumes(
+        profile,
+        files,
+        request_completion,
+        cache=cache,
+        rate_limiter=rate_limiter,
+        batch_mode=job['batch_mode'],
+        metrics=metrics,
+        text_cache=text_cache,
+        dedup=dedup,
+        escalate_completion=escalate_completion,
+        chunked=chunked,
+        on_fields=on_fields,
+        extraction_pool=extraction_pool,
+    )
+    try:
+        # run_resumes yields exactly one result per input, in input order
+        for position, (resume, data) in zip(positions, results):
+            started = time.perf_counter()
+            recorded = job_queue.complete(
+                job['id'],
+                position,
+                worker_id,
+                row=data,
+                error=resume['error'] or resume['parse_error'],
+                trimmed_tokens=resume['trimmed_tokens'],
+                tokens_saved=resume['tokens_saved'],
+                seconds=sum(resume['timings'].values()),
+                usage=resume['usage'],
+                duplicate_of=resume['duplicate_of'],
+                cache_hit=resume['cache_hit'],
+            )
+            # A resume reclaimed by another worker after this one's lease ran out is left to it
+            if recorded and search_index is not None and data is not None:
+                search_index.add(f"job {job['id']}", resume['filename'], data, profile.INDEX_TAG_FIELDS)
+            metrics.observe('sink_write', time.perf_counter() - started)
+            done += 1
+    except Exception as e:
+        for position in positions[done:]:
+            job_queue.complete(job['id'], position, worker_id, error=f"Worker error: {e}")
+    finally:
+        # Stops the pipeline now if the worker is interrupted, dropping requests not yet sent
+        results.close()
+
+
+def stop_on_sigterm(signum, frame):
+    raise KeyboardInterrupt
+
+
+def worker_loop(args, index):
+    signal.signal(signal.SIGTERM, stop_on_sigterm)
+    worker_id = f"{os.uname().nodename}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    job_queue = JobQueue(args.queue)
+    cache = None if args.no_cache else ExtractionCache(args.cache)
+    text_cache = None if args.no_cache else ExtractionCache(args.cache, table='documents')
+    dedup = DuplicateIndex(':memory:' if args.no_cache else args.cache)
+    search_index = None if args.no_index else CandidateIndex(args.index)
+    client = get_client(args.api_key, args.base_url)
+    partial_rows = None if args.no_stream else PartialRows(args.queue, worker_id)
+    # One extraction pool for the worker's whole life rather than one per claim
+    extraction_pool = ExtractionPool()
+    profiles = {}
+    metrics = Metrics()
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=heartbeat_loop, args=(args.queue, worker_id, metrics, stop), daemon=True)
+    heartbeat.start()
+    job, claimed = None, []
+    try:
+        while True:
+            job, claimed = job_queue.claim(worker_id, args.claim_size)
+            if not claimed:
+                time.sleep(POLL_SECONDS)
+                continue
+            if job['profile'] not in profiles:
+                profile = importlib.import_module(f"{job['profile']}_profile")
+                rpm = args.rpm or profile.REQUESTS_PER_MINUTE
+                tpm = args.tpm or profile.TOKENS_PER_MINUTE
+                rate_limiter = RateLimiter(max(1, rpm // args.workers), max(1, tpm // args.workers))
+                profiles[job['profile']] = (profile, make_request_completions(client, profile, args.cascade), rate_limiter)
+            profile, (request_completion, escalate_completion), rate_limiter = profiles[job['profile']]
+            print(f"worker {index}: job {job['id']}, {len(claimed)} resumes", file=sys.stderr)
+            run_claimed(
+                job_queue, worker_id, profile, job, claimed, request_completion, cache, text_cache, dedup, rate_limiter, metrics,
+                escalate_completion, search_index, args.chunk, partial_rows, extraction_pool,
+            )
+    except KeyboardInterrupt:
+        # Requests waiting on the rate limiter give up rather than sleeping out their wait
+        for _, _, rate_limiter in profiles.values():
+            rate_limiter.cancel()
+        # Unfinished resumes go straight back to the queue instead of waiting for the lease to expire
+        if claimed:
+            job_queue.release(job['id'], [position for position, _, _ in claimed], worker_id)
+    finally:
+        extraction_pool.close()
+        stop.set()
+        heartbeat.join()
+        if partial_rows is not None:
+            partial_rows.close()
+        if cache is not None:
+            cache.close()
+            text_cache.close()
+        dedup.close()
+        if search_index is not None:
+            search_index.close()
+        job_queue.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run background workers for the resume parsing job queue.")
+    parser.add_argument('--workers', type=int, default=2, help="Number of worker processes.")
+    parser.add_argument('--queue', default=QUEUE_PATH, help="Job queue database path.")
+    parser.add_argument('--claim-size', type=int, default=CLAIM_SIZE, help="Resumes claimed per round trip.")
+    parser.add_argument('--rpm', type=int, help="Total requests-per-minute quota (default: the job profile's).")
+    parser.add_argument('--tpm', type=int, help="Total tokens-per-minute quota (default: the job profile's).")
+    parser.add_argument('--cache', default='extraction_cache.sqlite3', help="Response cache path.")
+    parser.add_argument('--no-cache', action='store_true', help="Don't read or write the response cache.")
+    parser.add_argument('--index', default=INDEX_PATH, help="Candidate search index the parsed rows are added to.")
+    parser.add_argument('--no-index', action='store_true', help="Don't add parsed rows to the search index.")
+    parser.add_argument('--api-key', help="Groq API key (default: GROQ_API_KEY, then [groq] api_key in .streamlit/secrets.toml).")
+    parser.add_argument('--chunk', action='store_true', help="Split long resumes into chunks extracted in parallel instead of trimming them.")
+    parser.add_argument('--no-stream', action='store_true', help="Wait for whole responses instead of streaming fields to the job pages.")
+    parser.add_argument('--cascade', action='store_true', help="Try the profile's SMALL_MODEL_NAME first, escalating failing answers.")
+    parser.add_argument('--base-url', help="Alternative OpenAI-compatible endpoint, e.g. a local mock server.")
+    parser.add_argument('--metrics-port', type=int, help="Serve the workers' combined metrics on this port.")
+    return parser
+
+
+def queue_metrics(queue_path):
+    job_queue = JobQueue(queue_path)
+    try:
+        return merge_snapshots(job_queue.worker_metrics())
+    finally:
+        job_queue.close()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.api_key = args.api_key or default_api_key()
+    if not args.api_key:
+        sys.exit("No Groq API key: pass --api-key, set GROQ_API_KEY or add it to .streamlit/secrets.toml")
+    # Creates the tables before the workers race to do it
+    JobQueue(args.queue).close()
+    processes = [multiprocessing.Process(target=worker_loop, args=(args, index)) for index in range(args.workers)]
+    for process in processes:
+        process.start()
+    print(f"{args.workers} workers polling {args.queue}", file=sys.stderr)
+    if args.metrics_port:
+        serve(lambda: queue_metrics(args.queue), args.metrics_port)
+        print(f"Metrics at http://127.0.0.1:{args.metrics_port}/metrics", file=sys.stderr)
+    signal.signal(signal.SIGTERM, stop_on_sigterm)
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    main()
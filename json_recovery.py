@@ -0,0 +1,285 @@
+import ast
+import json
+import re
+
+FENCED_BLOCK = re.compile(r'```(?:json)?\s*(.*?)(?:```|$)', re.S | re.I)
+PYTHON_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+SMART_QUOTES = str.maketrans({'“': '"', '”': '"', '‘': "'", '’': "'"})
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def scan_object(text):
+    """
+    Returns the first top-level {...} in `text`, tracking strings and nesting one character
+    at a time. A truncated object (e.g. a response cut off by the token limit) is closed off
+    so whatever arrived can still be parsed. Returns None if there is no '{'.
+    """
+    found = _scan(text)
+    return None if found is None else found[0]
+
+
+def _scan(text):
+    """
+    scan_object() that also says whether the text stops inside or right after the object's
+    last value, so more of it may follow: (fragment, pending) or None.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+    stack = []
+    quote = None
+    string_start = None
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if quote is not None:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in '"\'' and not (char == "'" and text[index - 1].isalnum()):
+            quote = char
+            string_start = index
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]':
+            if stack and stack[-1] == char:
+                stack.pop()
+            if not stack:
+                return text[start:index + 1], False
+    # A string cut off mid-way is dropped rather than kept as a half value
+    fragment = text[start:string_start if quote is not None else len(text)].rstrip()
+    if stack and stack[-1] == '}':
+        # So is a key left without its value
+        fragment = re.sub(r'([{,])\s*"[^"]*"\s*:?$', r'\1', fragment)
+    # A value is only known to be whole once the ',' after it has arrived; a nested one
+    # still open, or a number or string with nothing after it yet, may go on
+    pending = len(stack) > 1 or not fragment.endswith((',', '{'))
+    fragment = re.sub(r'[,:]\s*$', '', fragment)
+    return fragment + ''.join(reversed(stack)), pending
+
+
+def repair_json(fragment):
+    """
+    Rewrites the usual LLM slips into valid JSON: single-quoted strings, Python literals,
+    curly quotes and trailing commas before a closing bracket.
+    """
+    fragment = fragment.translate(SMART_QUOTES)
+    out = []
+    index = 0
+    length = len(fragment)
+    while index < length:
+        char = fragment[index]
+        if char in '"\'':
+            end = index + 1
+            while end < length and fragment[end] != char:
+                end += 2 if fragment[end] == '\\' else 1
+            content = fragment[index + 1:end]
+            if char == "'":
+                content = content.replace("\\'", "'").replace('"', '\\"')
+            out.append('"' + content + '"')
+            index = end + 1
+        elif char == ',':
+            rest = fragment[index + 1:].lstrip()
+            if not rest or rest[0] not in '}]':
+                out.append(char)
+            index += 1
+        elif char.isalpha():
+            end = index
+            while end < length and (fragment[end].isalnum() or fragment[end] == '_'):
+                end += 1
+            word = fragment[index:end]
+            out.append(PYTHON_LITERALS.get(word, word))
+            index = end
+        else:
+            out.append(char)
+            index += 1
+    return ''.join(out)
+
+
+def _decode(fragment):
+    for attempt in (
+        lambda: json.loads(fragment, strict=False),
+        lambda: json.loads(repair_json(fragment), strict=False),
+        lambda: ast.literal_eval(fragment),
+    ):
+        try:
+            data = attempt()
+        except (ValueError, SyntaxError, RecursionError):
+            continue
+        if isinstance(data, dict):
+            return data
+    return None
+
+
+def _load(response_content):
+    """
+    Returns (data, pending) for the first decodable object in a response, or (None, False);
+    see _scan() for `pending`.
+    """
+    candidates = [match.group(1) for match in FENCED_BLOCK.finditer(response_content)]
+    candidates.append(response_content)
+    for candidate in candidates:
+        found = _scan(candidate)
+        if found is None:
+            continue
+        data = _decode(found[0])
+        if data is not None:
+            return data, found[1]
+    return None, False
+
+
+def loads_tolerant(response_content):
+    """
+    Finds and decodes the JSON object in an LLM response, preferring a ```json fenced block.
+    Returns a dict, or None when nothing usable can be recovered.
+    """
+    return _load(response_content)[0]
+
+
+def field_key(name):
+    return _NON_WORD.sub('', name.lower())
+
+
+def clean_value(value):
+    """
+    Flattens a field value to the comma-separated string the CSV expects. Strings holding
+    a Python or JSON list are unpacked first, and nested objects such as per-employer
+    details become "key: value" text. Returns None for anything that isn't JSON data.
+    """
+    if isinstance(value, str):
+        stripped = value.strip()
+        if not (stripped.startswith('[') and stripped.endswith(']')):
+            return stripped
+        try:
+            value = ast.literal_eval(stripped)
+        except (ValueError, SyntaxError):
+            try:
+                value = json.loads(repair_json(stripped))
+            except ValueError:
+                return stripped
+    if value is None:
+        return ''
+    if isinstance(value, (bool, int, float, str)):
+        return str(value).strip()
+    if isinstance(value, dict):
+        parts = [(key, clean_value(item)) for key, item in value.items()]
+        if any(item is None for _, item in parts):
+            return None
+        return ', '.join(f"{key}: {item}" for key, item in parts if item)
+    if isinstance(value, (list, tuple)):
+        parts = [clean_value(item) for item in value]
+        if any(item is None for item in parts):
+            return None
+        separator = '; ' if any(isinstance(item, (dict, list, tuple)) for item in value) else ', '
+        return separator.join(item for item in parts if item)
+    return None
+
+
+def parse_fields(response_content, field_names):
+    """
+    Recovers `field_names` from an LLM response. Keys are matched ignoring case and punctuation.
+    Returns (values, missing): the cleaned values found and the fields that were absent
+    or held a value of the wrong shape.
+    """
+    return _match_fields(loads_tolerant(response_content), field_names)
+
+
+def parse_streamed_fields(response_content, field_names):
+    """
+    parse_fields() for a response that is still arriving. Returns (values, complete): the
+    fields whose values have fully arrived, and whether every one of `field_names` has.
+    The last key of an unfinished object is left out while more of its value may follow.
+
+    A value cut off mid-way is dropped, and the fields before it are kept:
+    >>> parse_streamed_fields('{"Name": "Jo", "Mail ID": "x@y.com", "Projects": "ab', ['Name', 'Mail ID'])
+    ({'Name': 'Jo', 'Mail ID': 'x@y.com'}, True)
+    >>> parse_streamed_fields('{"Name": "Jo", "Mail ID": "x@', ['Name', 'Mail ID'])
+    ({'Name': 'Jo'}, False)
+
+    A value followed by nothing yet may still go on, until its ',' or '}' arrives:
+    >>> parse_streamed_fields('{"Name": "Jo", "Mail ID": "x@y.com"', ['Name', 'Mail ID'])
+    ({'Name': 'Jo'}, False)
+    >>> parse_streamed_fields('{"Name": "Jo", "Mail ID": "x@y.com",', ['Name', 'Mail ID'])
+    ({'Name': 'Jo', 'Mail ID': 'x@y.com'}, True)
+    """
+    data, pending = _load(response_content)
+    if data and pending:
+        data.pop(next(reversed(data)))
+    values, missing = _match_fields(data, field_names)
+    return values, not missing
+
+
+def _match_fields(data, field_names):
+    if data is None:
+        return {}, list(field_names)
+    by_key = {field_key(key): value for key, value in data.items()}
+    values = {}
+    missing = []
+    for name in field_names:
+        value = clean_value(by_key[field_key(name)]) if field_key(name) in by_key else None
+        if value is None:
+            missing.append(name)
+        else:
+            values[name] = value
+    return values, missing
+
+
+def check_fields(values, missing, required=(), patterns=None):
+    """
+    Reasons to distrust parsed fields: any missing or malformed, any of `required` left empty,
+    and any non-empty value that doesn't fully match its regex in `patterns`. Fields the
+    caller skipped (e.g. filled by rules) are in neither `values` nor `missing` and aren't checked.
+    """
+    reasons = [f"missing {name}" for name in missing]
+    reasons += [f"empty {name}" for name in required if values.get(name) == '']
+    for name, pattern in (patterns or {}).items():
+        if values.get(name) and not pattern.fullmatch(values[name]):
+            reasons.append(f"malformed {name}")
+    return reasons
+
+
+def split_items(value):
+    """
+    Splits a cleaned list value on its top-level ', ' or '; ' separators, leaving commas
+    inside brackets (e.g. "Acme (2 years, Analyst)") alone.
+    """
+    items = []
+    depth = 0
+    start = 0
+    for index, char in enumerate(value):
+        if char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth = max(0, depth - 1)
+        elif char in ',;' and depth == 0:
+            items.append(value[start:index])
+            start = index + 1
+    items.append(value[start:])
+    return [item.strip() for item in items if item.strip()]
+
+
+def merge_records(records, field_names, single_fields=()):
+    """
+    Merges the fields extracted from separate chunks of one document, in chunk order.
+    `single_fields` (e.g. the name) keep the first non-empty value; every other field becomes
+    the union of the chunks' items, dropping repeats regardless of case and spacing.
+    """
+    merged = {}
+    for name in field_names:
+        # Fields no chunk returned stay missing rather than becoming empty
+        if not any(name in record for record in records):
+            continue
+        values = [record[name] for record in records if record.get(name)]
+        if name in single_fields:
+            merged[name] = values[0] if values else ''
+            continue
+        items = {}
+        for value in values:
+            for item in split_items(value):
+                items.setdefault(' '.join(item.lower().split()), item)
+        separator = '; ' if any('; ' in value for value in values) else ', '
+        merged[name] = separator.join(items.values())
+    return merged
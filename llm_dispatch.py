@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Rough characters-per-token ratio for the llama3 tokenizer on English text
+CHARS_PER_TOKEN = 4
+
+
+class Cancelled(Exception):
+    """
+    Raised in calls still waiting to run once their RateLimiter or dispatch_stream is stopped.
+    """
+
+
+def estimate_tokens(text):
+    """
+    Cheap token estimate used for rate limiting and budgeting.
+    """
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+class TokenBucket:
+    """
+    Bucket holding up to `capacity` units, refilled continuously over `period` seconds.
+    """
+    def __init__(self, capacity, period=60.0):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        # Requests larger than the bucket are clamped so they can still go through
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount):
+        self.tokens -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Blocks callers until both the requests-per-minute and tokens-per-minute quotas allow a call.
+    After cancel(), waiting and later callers raise Cancelled instead.
+    """
+    def __init__(self, requests_per_minute, tokens_per_minute=None):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        """
+        Wakes every caller, e.g. when a worker is shutting down, so none sleeps out its wait.
+        """
+        self.cancelled.set()
+
+    def sleep(self, seconds):
+        if self.cancelled.wait(seconds):
+            raise Cancelled()
+
+    def defer(self, seconds):
+        """
+        Holds back every caller for `seconds`, e.g. after the provider answers with a 429.
+        """
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def acquire(self, tokens=0):
+        while True:
+            if self.cancelled.is_set():
+                raise Cancelled()
+            with self.lock:
+                now = time.monotonic()
+                buckets = [(self.requests, 1)]
+                if self.tokens is not None:
+                    buckets.append((self.tokens, tokens))
+                for bucket, _ in buckets:
+                    bucket.refill(now)
+                wait = max(bucket.wait_time(amount) for bucket, amount in buckets)
+                wait = max(wait, self.blocked_until - now)
+                if wait <= 0:
+                    for bucket, amount in buckets:
+                        bucket.take(amount)
+                    return
+            self.sleep(wait)
+
+
+def dispatch_stream(items, worker, max_in_flight=4, rate_limiter=None, cost=estimate_tokens):
+    """
+    Lazily runs worker(item) for every item with at most `max_in_flight` calls in flight.
+    Yields results in the same order as `items`, pulling new items only as slots free up.
+    If the consumer stops early (an exception, e.g. KeyboardInterrupt, or closing the
+    generator), queued calls are dropped rather than run; calls already running finish alone.
+    """
+    stop = threading.Event()
+
+    def run(item):
+        if stop.is_set():
+            raise Cancelled()
+        if rate_limiter is not None:
+            rate_limiter.acquire(cost(item))
+        return worker(item)
+
+    max_in_flight = max(1, max_in_flight)
+    executor = ThreadPoolExecutor(max_workers=max_in_flight)
+    try:
+        futures = deque()
+        for item in items:
+            futures.append(executor.submit(run, item))
+            # Keep one extra item queued per worker so a slow head item doesn't idle the pool
+            if len(futures) >= 2 * max_in_flight:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+    except BaseException:
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+
+def dispatch(items, worker, max_in_flight=4, rate_limiter=None, cost=estimate_tokens):
+    """
+    Runs worker(item) for every item and returns the results in the same order as `items`.
+    """
+    return list(dispatch_stream(items, worker, max_in_flight, rate_limiter, cost))
@@ -0,0 +1,187 @@
+import heapq
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = 'resume_parser'
+SLOWEST_FILES = 10
+
+
+class Metrics:
+    """
+    Thread-safe counters and per-stage timings for the parsing pipeline.
+    Snapshots are plain dicts, so workers in other processes can publish theirs
+    and a reader can combine them with merge_snapshots().
+    """
+    def __init__(self, slowest=SLOWEST_FILES):
+        self.slowest = slowest
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.stages = {}
+        self.slowest_files = []
+
+    def inc(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            self._observe(stage, seconds)
+
+    def _observe(self, stage, seconds):
+        summary = self.stages.setdefault(stage, {'count': 0, 'sum': 0.0, 'max': 0.0})
+        summary['count'] += 1
+        summary['sum'] += seconds
+        summary['max'] = max(summary['max'], seconds)
+
+    def observe_resume(self, resume):
+        """
+        Records the stage timings, token usage and outcome of one resume from the pipeline.
+        """
+        usage = resume.get('usage') or {}
+        seconds = sum(resume['timings'].values())
+        failed = resume['error'] is not None or resume.get('parse_error') is not None
+        with self.lock:
+            for stage, stage_seconds in resume['timings'].items():
+                self._observe(stage, stage_seconds)
+            if 'extraction' in resume['timings'] and resume.get('pages'):
+                self._observe('extraction_per_page', resume['timings']['extraction'] / resume['pages'])
+            if resume.get('first_field_seconds') is not None:
+                # Part of 'llm' rather than a stage of its own, so it stays out of the total
+                self._observe('llm_first_field', resume['first_field_seconds'])
+            for name, value in (
+                ('resumes_failed' if failed else 'resumes_parsed', 1),
+                ('cache_hits', 1 if resume.get('cache_hit') else 0),
+                ('pages', resume.get('pages') or 0),
+                ('prompt_tokens', usage.get('prompt_tokens', 0)),
+                ('completion_tokens', usage.get('completion_tokens', 0)),
+                ('llm_attempts', resume['attempts']),
+                ('trimmed_tokens', resume['trimmed_tokens']),
+                ('batching_tokens_saved', resume['tokens_saved']),
+                ('missing_fields', len(resume.get('missing_fields') or ())),
+                ('duplicates', 1 if resume.get('duplicate_of') else 0),
+                ('escalations', 1 if resume.get('tier') == 'escalated' else 0),
+                ('chunked_resumes', 1 if (resume.get('chunks') or 0) > 1 else 0),
+            ):
+                self.counters[name] = self.counters.get(name, 0) + value
+            costs = resume.get('cost_by_tier') or {}
+            for tier, tier_usage in (resume.get('usage_by_tier') or {}).items():
+                for name, value in (
+                    (f'{tier}_resumes', 1),
+                    (f'{tier}_prompt_tokens', tier_usage.get('prompt_tokens', 0)),
+                    (f'{tier}_completion_tokens', tier_usage.get('completion_tokens', 0)),
+                    (f'{tier}_cost_usd', costs.get(tier, 0.0)),
+                ):
+                    self.counters[name] = self.counters.get(name, 0) + value
+            entry = (seconds, resume['filename'])
+            if len(self.slowest_files) < self.slowest:
+                heapq.heappush(self.slowest_files, entry)
+            else:
+                heapq.heappushpop(self.slowest_files, entry)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': dict(self.counters),
+                'stages': {stage: dict(summary) for stage, summary in self.stages.items()},
+                'slowest_files': [
+                    {'file': filename, 'seconds': seconds}
+                    for seconds, filename in sorted(self.slowest_files, reverse=True)
+                ],
+            }
+
+    def write_json(self, path):
+        """
+        Writes the current snapshot to `path`, replacing it atomically so readers never see half a file.
+        """
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(temp_path, path)
+
+
+def merge_snapshots(snapshots, slowest=SLOWEST_FILES):
+    merged = {'counters': {}, 'stages': {}, 'slowest_files': []}
+    for snapshot in snapshots:
+        for name, value in snapshot['counters'].items():
+            merged['counters'][name] = merged['counters'].get(name, 0) + value
+        for stage, summary in snapshot['stages'].items():
+            total = merged['stages'].setdefault(stage, {'count': 0, 'sum': 0.0, 'max': 0.0})
+            total['count'] += summary['count']
+            total['sum'] += summary['sum']
+            total['max'] = max(total['max'], summary['max'])
+        merged['slowest_files'] += snapshot['slowest_files']
+    merged['slowest_files'] = sorted(merged['slowest_files'], key=lambda entry: -entry['seconds'])[:slowest]
+    return merged
+
+
+def tier_report(snapshot):
+    """
+    Per-tier summary of a snapshot: resumes answered, mean LLM latency, tokens and cost,
+    plus the escalation rate (escalated resumes over those the base tier answered).
+    """
+    counters = snapshot['counters']
+    report = {}
+    for tier, stage in (('base', 'llm'), ('escalated', 'llm_escalated')):
+        if not counters.get(f'{tier}_resumes'):
+            continue
+        summary = snapshot['stages'].get(stage, {'count': 0, 'sum': 0.0})
+        report[tier] = {
+            'resumes': counters[f'{tier}_resumes'],
+            'mean_seconds': summary['sum'] / summary['count'] if summary['count'] else 0.0,
+            'tokens': counters.get(f'{tier}_prompt_tokens', 0) + counters.get(f'{tier}_completion_tokens', 0),
+            'cost_usd': counters.get(f'{tier}_cost_usd', 0.0),
+        }
+    base = counters.get('base_resumes', 0)
+    return report, counters.get('escalations', 0) / base if base else 0.0
+
+
+def render_prometheus(snapshot):
+    """
+    Formats a snapshot in the Prometheus text exposition format.
+    """
+    lines = [f'# TYPE {PREFIX}_stage_seconds summary']
+    for stage, summary in sorted(snapshot['stages'].items()):
+        lines.append(f'{PREFIX}_stage_seconds_count{{stage="{stage}"}} {summary["count"]}')
+        lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{stage}"}} {summary["sum"]:.6f}')
+    lines.append(f'# TYPE {PREFIX}_stage_seconds_max gauge')
+    for stage, summary in sorted(snapshot['stages'].items()):
+        lines.append(f'{PREFIX}_stage_seconds_max{{stage="{stage}"}} {summary["max"]:.6f}')
+    for name, value in sorted(snapshot['counters'].items()):
+        lines.append(f'# TYPE {PREFIX}_{name}_total counter')
+        lines.append(f'{PREFIX}_{name}_total {value}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    get_snapshot = None
+
+    def do_GET(self):
+        snapshot = type(self).get_snapshot()
+        if self.path.startswith('/metrics.json'):
+            body, content_type = json.dumps(snapshot).encode('utf-8'), 'application/json'
+        elif self.path.startswith('/metrics'):
+            body, content_type = render_prometheus(snapshot).encode('utf-8'), 'text/plain; version=0.0.4'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(get_snapshot, port, host='127.0.0.1'):
+    """
+    Serves /metrics (Prometheus text) and /metrics.json from a background thread.
+    `get_snapshot` is called on every scrape.
+    """
+    handler = type('Handler', (MetricsHandler,), {'get_snapshot': staticmethod(get_snapshot)})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
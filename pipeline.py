@@ -0,0 +1,437 @@
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from batching import build_batch_prompt, group_batches, split_batch_response
+from llm_dispatch import dispatch_stream, estimate_tokens
+from retry import RetriesExhausted, call_with_retries
+from text_extraction import PAGE_BREAK, PDF_BACKEND, document_key, extract_stream
+
+# Items buffered between pipeline stages
+QUEUE_SIZE = 8
+# Recent resumes a duplicate can wait on for its response; older ones are found through the cache
+DEDUP_WINDOW = 1000
+
+_DONE = object()
+
+
+def prefetch(iterable, maxsize=QUEUE_SIZE):
+    """
+    Runs `iterable` in a background thread, buffering at most `maxsize` items in a bounded queue.
+    Exceptions raised by the producer are re-raised in the consumer.
+    """
+    buffer = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((_DONE, None))
+        except BaseException as e:
+            put((_DONE, e))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def _unpack_cached(value):
+    """
+    Splits a cached value into (response, prefilled). Entries cached before rule-based
+    extraction existed hold just the raw response.
+    """
+    if value is None:
+        return None, {}
+    try:
+        entry = json.loads(value)
+    except json.JSONDecodeError:
+        return value, {}
+    if isinstance(entry, dict) and 'response' in entry:
+        return entry['response'], entry.get('prefilled') or {}
+    return value, {}
+
+
+def stream_resumes(files, build_prompt, request_completion, cache=None, cache_key=None,
+                   max_in_flight=4, rate_limiter=None, completion_tokens=512,
+                   extraction_timeout=60, queue_size=QUEUE_SIZE, batch_token_budget=None,
+                   max_attempts=4, compact=None, rules=None, parse=None, followup_prompt=None,
+                   text_cache=None, pdf_backend=PDF_BACKEND, char_budget=None, dedup=None,
+                   escalate=None, check=None, chunk=None, merge=None, max_chunks_in_flight=None,
+                   parse_partial=None, on_fields=None, refresh=None, extraction_pool=None):
+    """
+    Streams (filename, file_bytes) pairs through cache lookup, text extraction and the LLM.
+    Yields one resume dict per input, in input order, as soon as its response is available.
+    Each dict holds 'filename', its 'index' in `files`, 'key', 'text', 'response', 'error', 'prefilled', 'tokens_saved',
+    'trimmed_tokens', 'pages', LLM 'attempts', token 'usage' and per-stage 'timings' in seconds.
+    'cache_hit' is True when the response came from `cache`.
+    `request_completion(prompt)` returns the response text, or (text, usage) where usage holds
+    the provider's 'prompt_tokens' and 'completion_tokens'.
+    `compact`, if given, maps extracted text to (prompt_text, tokens_saved) before the LLM call.
+    `rules`, if given, maps extracted text to the fields it can fill locally; those land in
+    'prefilled' and are passed to build_prompt(text, skip_fields) so the LLM isn't asked for them.
+    `parse(response, skip_fields)`, if given, returns (data, missing) for the response; its result
+    lands in 'data', and fields still missing after one follow-up request built by
+    `followup_prompt(text, missing)` are left empty and listed in 'missing_fields'.
+    Extracted text is kept in `text_cache`, if given, keyed by document content hash, so a
+    resume whose LLM response isn't cached (e.g. after a prompt change) skips extraction.
+    `pdf_backend` and `char_budget` are passed to the text extractor, which runs in
+    `extraction_pool` (a text_extraction.ExtractionPool) if given, or a pool of its own.
+    With a `dedup` index, a resume whose text duplicates or nearly duplicates an earlier one
+    (in this stream or a previous run) gets 'duplicate_of' and 'similarity' set and reuses
+    that resume's response instead of making its own LLM call, when the response is available.
+    With `escalate` set (cascade mode), `request_completion` is a smaller model whose parsed
+    answer goes through `check(data, missing)`; an answer it returns reasons against is asked
+    again of `escalate`, the larger model. 'tier' records which model answered ('base' or
+    'escalated'), 'escalation_reasons' why, and 'usage_by_tier' the tokens each one used.
+    With `chunk` set (chunked mode), `chunk(text)` splits a long resume into chunk texts that
+    are extracted concurrently, each with build_prompt, and `merge(records)` combines their
+    parsed fields into one record, stored as the response; 'chunks' counts the requests.
+    Chunk requests share `max_chunks_in_flight` threads (default `max_in_flight`).
+    Chunked resumes get no follow-up request, since their whole text doesn't fit one prompt.
+    With `parse_partial` set (streaming mode), single-prompt requests are streamed:
+    `request_completion(prompt, on_text)` calls `on_text(text_so_far)` as the response arrives
+    and stops reading once it returns True. `parse_partial(text, skip_fields)` returns
+    (fields, complete); each time more fields have arrived, `on_fields(resume, fields)` is called
+    (from a worker thread), and the response is cut off as soon as every field is complete.
+    'first_field_seconds' records how long after the request the first field arrived.
+    With `batch_token_budget` set, several resumes are packed into each request.
+    Resumes whose filename `refresh(filename)` is true for skip the response cache, e.g. to
+    retry a file that failed before; a response that can't be parsed is dropped from the cache.
+    Provider errors are retried up to `max_attempts` times; a resume that still fails
+    gets an 'error' instead of aborting the stream.
+    """
+    def lookup():
+        iterator = iter(files)
+        for index in itertools.count():
+            # Time spent producing the bytes, e.g. reading a zip member
+            started = time.perf_counter()
+            try:
+                filename, file_bytes = next(iterator)
+            except StopIteration:
+                return
+            read_seconds = time.perf_counter() - started
+            key = cache_key(file_bytes) if cache is not None else None
+            cached = cache.get(key) if cache is not None and not (refresh is not None and refresh(filename)) else None
+            response, prefilled = _unpack_cached(cached)
+            resume = {
+                'filename': filename, 'index': index, 'key': key, 'text': None, 'response': response, 'error': None,
+                'prefilled': prefilled, 'tokens_saved': 0, 'trimmed_tokens': 0, 'pages': 0, 'attempts': 0,
+                'usage': {}, 'data': None, 'parse_error': None, 'missing_fields': [], 'duplicate_of': None,
+                'similarity': None, 'tier': None, 'escalation_reasons': [], 'usage_by_tier': {}, 'chunks': 0,
+                'first_field_seconds': None, 'timings': {'read': read_seconds}, 'cache_hit': response is not None,
+            }
+            # Cache hits skip extraction, so their bytes are dropped straight away
+            yield resume, (file_bytes if response is None else None)
+
+    # Responses can only be reused between resumes extracted under the same settings
+    scope = cache_key(b'') if cache is not None else None
+    recent = OrderedDict()
+    originals = {}
+    finished = {}
+
+    def find_duplicate(resume):
+        fingerprint = dedup.fingerprint(resume['text'])
+        match = dedup.find(fingerprint)
+        # Looked up before this resume is added, which can take over an identical text's id
+        original = recent.get(match['id']) if match is not None else None
+        # The same file from an earlier run, e.g. before a prompt change, isn't a duplicate
+        rerun = match is not None and original is None and match['similarity'] == 1.0 \
+            and match['filename'] == resume['filename']
+        document_id = dedup.add(resume['filename'], fingerprint, resume['key'], scope)
+        if document_id is not None:
+            finished[id(resume)] = threading.Event()
+            recent[document_id] = resume
+            if len(recent) > DEDUP_WINDOW:
+                recent.popitem(last=False)
+        if match is None or rerun:
+            return
+        resume['duplicate_of'] = match['filename']
+        resume['similarity'] = match['similarity']
+        event = finished.get(id(original)) if original is not None else None
+        if event is not None:
+            originals[id(resume)] = (original, event)
+        elif original is not None and original['response'] is not None:
+            resume['response'] = original['response']
+        elif cache is not None and match['key'] is not None and match['scope'] == scope:
+            resume['response'] = _unpack_cached(cache.get(match['key']))[0]
+
+    def extract(lookups):
+        resumes = deque()
+
+        def files_to_extract():
+            for resume, file_bytes in lookups:
+                key = None
+                if text_cache is not None and file_bytes is not None:
+                    key = document_key(file_bytes, pdf_backend, char_budget)
+                    resume['text'] = text_cache.get(key)
+                    if resume['text'] is not None:
+                        file_bytes = None
+                resumes.append((resume, key))
+                yield resume['filename'], file_bytes
+
+        records = extract_stream(
+            files_to_extract(), timeout=extraction_timeout, window=queue_size,
+            backend=pdf_backend, char_budget=char_budget, pool=extraction_pool,
+        )
+        for record in records:
+            resume, key = resumes.popleft()
+            if record['text'] is not None or record['error'] is not None:
+                resume['text'] = record['text']
+                resume['error'] = record['error']
+                resume['timings']['extraction'] = record['seconds']
+            if key is not None and record['text'] is not None:
+                text_cache.put(key, record['text'])
+            if resume['text'] is not None:
+                resume['pages'] = resume['text'].count(PAGE_BREAK) + 1
+            if dedup is not None and resume['text'] is not None:
+                started = time.perf_counter()
+                find_duplicate(resume)
+                resume['timings']['dedup'] = time.perf_counter() - started
+            if rules is not None and resume['text'] is not None:
+                started = time.perf_counter()
+                resume['prefilled'] = rules(resume['text'])
+                resume['timings']['rules'] = time.perf_counter() - started
+            if compact is not None and resume['text'] is not None:
+                started = time.perf_counter()
+                resume['text'], resume['trimmed_tokens'] = compact(resume['text'])
+                resume['timings']['compaction'] = time.perf_counter() - started
+            yield resume
+
+    def store(resume, response):
+        resume['response'] = response
+        if cache is not None:
+            # Cache as soon as the response arrives so a later failure doesn't lose it
+            cache.put(resume['key'], json.dumps({'response': response, 'prefilled': resume['prefilled']}))
+
+    def request(prompt, expected_completions=1, completion=request_completion, on_text=None):
+        result, attempts = call_with_retries(
+            lambda: completion(prompt) if on_text is None else completion(prompt, on_text),
+            rate_limiter,
+            estimate_tokens(prompt) + completion_tokens * expected_completions,
+            max_attempts,
+        )
+        response, usage = result if isinstance(result, tuple) else (result, {})
+        return response, usage or {}, attempts
+
+    def prompts_for(resume, skip_fields):
+        texts = chunk(resume['text']) if chunk is not None else [resume['text']]
+        resume['chunks'] = len(texts)
+        return [build_prompt(text, skip_fields) for text in texts]
+
+    def ask(prompts, skip_fields, completion=request_completion, on_text=None):
+        """
+        Returns (response, usage, attempts) for a resume's prompts. Chunk prompts run
+        concurrently and their answers are merged; chunks that fail are left out unless all do.
+        """
+        if len(prompts) == 1:
+            return request(prompts[0], completion=completion, on_text=on_text)
+        futures = [chunk_pool.submit(request, prompt, 1, completion) for prompt in prompts]
+        records, usage, attempts, error = [], {}, 0, None
+        for future in futures:
+            try:
+                response, chunk_usage, chunk_attempts = future.result()
+            except RetriesExhausted as e:
+                attempts += e.attempts
+                error = error or e
+                continue
+            attempts += chunk_attempts
+            for name, value in chunk_usage.items():
+                usage[name] = usage.get(name, 0) + value
+            records.append(parse(response, skip_fields)[0])
+        if not records:
+            raise RetriesExhausted(attempts, error.error)
+        return json.dumps(merge(records)), usage, attempts
+
+    def watch(resume, skip_fields, started):
+        """
+        Returns the on_text callback for one resume's streamed response.
+        """
+        arrived = [0]
+
+        def on_text(text):
+            fields, complete = parse_partial(text, skip_fields)
+            if len(fields) > arrived[0]:
+                if resume['first_field_seconds'] is None:
+                    resume['first_field_seconds'] = time.perf_counter() - started
+                arrived[0] = len(fields)
+                if on_fields is not None:
+                    on_fields(resume, {**fields, **resume['prefilled']})
+            return complete
+        return on_text
+
+    def add_usage(resume, usage):
+        tier_usage = resume['usage_by_tier'].setdefault(resume['tier'] or 'base', {})
+        for name, value in usage.items():
+            resume['usage'][name] = resume['usage'].get(name, 0) + value
+            tier_usage[name] = tier_usage.get(name, 0) + value
+
+    def escalate_if_unsure(resume, data, missing, skip_fields):
+        reasons = check(data, missing) if check is not None else list(missing)
+        if not reasons:
+            return data, missing
+        resume['escalation_reasons'] = reasons
+        started = time.perf_counter()
+        try:
+            response, usage, attempts = ask(prompts_for(resume, skip_fields), skip_fields, escalate)
+            resume['tier'] = 'escalated'
+            add_usage(resume, usage)
+            escalated_data, escalated_missing = parse(response, skip_fields)
+            # An unreadable answer from the larger model doesn't replace a usable one
+            if escalated_data:
+                store(resume, response)
+                data, missing = escalated_data, escalated_missing
+        except RetriesExhausted as e:
+            attempts = e.attempts
+        resume['attempts'] += attempts
+        resume['timings']['llm_escalated'] = time.perf_counter() - started
+        return data, missing
+
+    def finish(resume):
+        if parse is None or resume['response'] is None:
+            return resume
+        skip_fields = tuple(sorted(resume['prefilled']))
+        started = time.perf_counter()
+        data, missing = parse(resume['response'], skip_fields)
+        resume['timings']['parse'] = time.perf_counter() - started
+        # Only fresh answers from the smaller model are checked; cache hits and reused
+        # duplicates already hold the final answer
+        if escalate is not None and resume['tier'] == 'base' and resume['text'] is not None:
+            data, missing = escalate_if_unsure(resume, data, missing, skip_fields)
+        # Cache hits have no text to ask about, so only fresh responses get a follow-up
+        if missing and followup_prompt is not None and resume['text'] is not None and resume['chunks'] <= 1:
+            started = time.perf_counter()
+            found = {}
+            try:
+                completion = escalate if resume['tier'] == 'escalated' else request_completion
+                response, usage, attempts = request(followup_prompt(resume['text'], missing), completion=completion)
+                add_usage(resume, usage)
+                resume['attempts'] += attempts
+                found, missing = parse(response, skip_fields + tuple(data))
+                data.update(found)
+            except RetriesExhausted as e:
+                resume['attempts'] += e.attempts
+            resume['timings']['followup'] = time.perf_counter() - started
+            if found:
+                # The repaired record replaces the raw response so a re-run needs no follow-up.
+                # Fields still missing are left out, so a re-run reports them missing again.
+                store(resume, json.dumps(data))
+        if not data:
+            resume['parse_error'] = "No valid JSON in the response."
+            if cache is not None:
+                # Otherwise a retry would get the same unusable response back from the cache
+                cache.delete(resume['key'])
+            return resume
+        resume['data'] = {**data, **dict.fromkeys(missing, '')}
+        resume['missing_fields'] = missing
+        return resume
+
+    def complete(resume):
+        original, event = originals.pop(id(resume), (None, None))
+        if original is not None and resume['response'] is None and resume['error'] is None:
+            # The original is earlier in the stream, so it is already being worked on
+            event.wait()
+            if original['response'] is not None:
+                store(resume, original['response'])
+        try:
+            return request_or_parse(resume)
+        finally:
+            if id(resume) in finished:
+                finished.pop(id(resume)).set()
+
+    def request_or_parse(resume):
+        if resume['response'] is None and resume['error'] is None:
+            started = time.perf_counter()
+            skip_fields = tuple(sorted(resume['prefilled']))
+            prompts = prompts_for(resume, skip_fields)
+            resume['timings']['prompt'] = time.perf_counter() - started
+            started = time.perf_counter()
+            resume['tier'] = 'base'
+            on_text = watch(resume, skip_fields, started) if parse_partial is not None and len(prompts) == 1 else None
+            try:
+                response, usage, attempts = ask(prompts, skip_fields, on_text=on_text)
+                store(resume, response)
+                add_usage(resume, usage)
+            except RetriesExhausted as e:
+                attempts = e.attempts
+                resume['error'] = f"LLM request {e}"
+            resume['attempts'] += attempts
+            resume['timings']['llm'] = time.perf_counter() - started
+        return finish(resume)
+
+    def complete_batch(batch):
+        # Duplicates wait for their original in complete() below rather than joining the batch
+        # So do resumes long enough to be chunked
+        pending = [
+            resume for resume in batch
+            if resume['response'] is None and resume['error'] is None and id(resume) not in originals
+            and (chunk is None or len(chunk(resume['text'])) == 1)
+        ]
+        if len(pending) > 1:
+            # Only fields every resume in the batch already has can be left out of the shared prompt
+            skip_fields = set.intersection(*(set(resume['prefilled']) for resume in pending))
+            started = time.perf_counter()
+            prompt = build_batch_prompt(build_prompt, pending, tuple(sorted(skip_fields)))
+            prompt_seconds = time.perf_counter() - started
+            started = time.perf_counter()
+            try:
+                response, usage, attempts = request(prompt, len(pending))
+            except RetriesExhausted as e:
+                response, usage, attempts = '', {}, e.attempts
+            responses = split_batch_response(response, len(pending))
+            elapsed = time.perf_counter() - started
+            share = estimate_tokens(prompt) / len(pending)
+            for resume, resume_response in zip(pending, responses):
+                resume['attempts'] += attempts
+                resume['tier'] = 'base'
+                # The shared request's cost is split evenly across the resumes in it
+                add_usage(resume, {name: value / len(pending) for name, value in usage.items()})
+                resume['timings']['prompt'] = prompt_seconds / len(pending)
+                if resume_response is not None:
+                    store(resume, resume_response)
+                    resume['timings']['llm'] = elapsed
+                    resume['tokens_saved'] = max(0, round(estimate_tokens(build_prompt(resume['text'])) - share))
+        # Anything the batch response didn't cover falls back to a single-resume request
+        for resume in batch:
+            complete(resume)
+        return batch
+
+    # Chunk requests get their own threads so a resume waiting on its chunks can't starve them
+    chunk_pool = ThreadPoolExecutor(max_chunks_in_flight or max_in_flight) if chunk is not None else None
+    extracted = prefetch(extract(prefetch(lookup(), queue_size)), queue_size)
+    try:
+        if batch_token_budget is None:
+            yield from dispatch_stream(extracted, complete, max_in_flight)
+            return
+        batches = group_batches(extracted, build_prompt, batch_token_budget, completion_tokens)
+        for batch in dispatch_stream(batches, complete_batch, max_in_flight):
+            yield from batch
+    finally:
+        if chunk_pool is not None:
+            chunk_pool.shutdown(wait=False, cancel_futures=True)
+        # Duplicates still waiting on an original that will now never run go ahead on their own
+        for event in list(finished.values()):
+            event.set()
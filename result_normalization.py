@@ -0,0 +1,254 @@
+"""
+Column-wise clean-up of parsed resume rows, run once over a whole batch or history.
+
+    python result_normalization.py output.csv combined_employee_data.csv --profile app1 --output history.parquet
+
+List fields arrive as comma strings, stringified Python lists ("['EY, London. (Manager)']")
+or real lists; they become lists of items with skill names made canonical. Emails are
+lower-cased. The result is a typed Arrow table: list<string> for list fields, string otherwise.
+"""
+import argparse
+import importlib
+import io
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from result_sink import SOURCE_COLUMN, sink_columns
+
+# Canonical skill spellings and the variants that should map to them. Variants differing
+# only in case, spacing or punctuation ("PowerBI", "power bi") already match through skill_key()
+SKILL_SYNONYMS = {
+    'Power BI': ('MS Power BI', 'Microsoft Power BI'),
+    'Excel': ('MS Excel', 'Microsoft Excel', 'Advanced Excel'),
+    'scikit-learn': ('sklearn', 'scikit'),
+    'PyTorch': ('torch',),
+    'JavaScript': ('js',),
+    'Node.js': ('node', 'nodejs'),
+    'PostgreSQL': ('postgres', 'psql'),
+    'Kubernetes': ('k8s',),
+    'C++': ('cpp',),
+    'Web Scraping': ('web scrapping', 'webscraping'),
+    'NLP': ('natural language processing',),
+    'Large Language Models': ('large language model', 'llm', 'llms'),
+    'MLOps': ('ml ops',),
+    'Machine Learning': ('ml',),
+    'AWS': ('amazon web services',),
+    'GCP': ('google cloud', 'google cloud platform'),
+    'Azure': ('microsoft azure',),
+    'Communication': ('communication skills',),
+    'Problem Solving': ('problem-solving', 'problem solving skills'),
+    'Teamwork': ('team work', 'team player'),
+}
+
+# List items are separated by commas, semicolons or newlines. Values with parentheses only
+# split outside them, which needs a lookahead that Arrow's regex engine (RE2) doesn't have
+_ITEM_SEPARATORS = (',', ';', '\n')
+_NESTED_SEPARATOR = re.compile(r'\s*[,;\n]\s*(?![^()]*\))')
+# The separator between the quoted items of a stringified Python list
+_QUOTED_SEPARATOR = r'''['"]\s*,\s*['"]'''
+_UNIT = '\x1f'
+
+
+LIST_DTYPE = pd.ArrowDtype(pa.list_(pa.string()))
+
+
+def skill_key(item):
+    return re.sub(r'[^a-z0-9+#]', '', item.lower())
+
+
+def synonym_keys(synonyms=SKILL_SYNONYMS):
+    """
+    Maps the skill_key() of every canonical name and variant to the canonical name.
+    """
+    keys = {}
+    for canonical, variants in synonyms.items():
+        for name in (canonical, *variants):
+            keys[skill_key(name)] = canonical
+    return keys
+
+
+def as_text(column):
+    """
+    Returns a column as strings: real lists are joined with ", " and missing values are ''.
+    """
+    if column.dtype == object:
+        is_list = column.map(lambda value: isinstance(value, (list, tuple, np.ndarray)))
+        if is_list.any():
+            column = column.where(~is_list, column[is_list].map(lambda items: ', '.join(str(item) for item in items)))
+    return column.fillna('').astype(str).str.strip()
+
+
+def split_list_column(column):
+    """
+    Splits a text column into (items, rows): an Arrow array of the items and the row position
+    of each, using Arrow compute kernels over the whole column. Stringified lists are split between
+    their quoted items, so commas inside an item survive.
+    """
+    text = pa.array(as_text(column).to_numpy(dtype=object), type=pa.string())
+    literal = pc.and_(pc.starts_with(text, '['), pc.ends_with(text, ']'))
+    inner = pc.if_else(literal, pc.utf8_slice_codeunits(text, 1, -1), text)
+    # Plain substring replacement is several times faster than a regex, so only the values
+    # that need one (stringified lists, parentheses) go through a regex
+    units = inner
+    for separator in _ITEM_SEPARATORS:
+        units = pc.replace_substring(units, separator, _UNIT)
+    nested = pc.and_(pc.invert(literal), pc.match_substring(inner, '('))
+    if pc.any(nested).as_py():
+        values = [_NESTED_SEPARATOR.sub(_UNIT, value) for value in inner.filter(nested).to_pylist()]
+        units = pc.replace_with_mask(units, nested, pa.array(values, type=pa.string()))
+    if pc.any(literal).as_py():
+        units = pc.replace_with_mask(
+            units, literal, pc.replace_substring_regex(inner.filter(literal), _QUOTED_SEPARATOR, _UNIT)
+        )
+    lists = pc.split_pattern(units, _UNIT)
+    items = pc.utf8_trim(pc.list_flatten(lists), ' \'"')
+    keep = pc.not_equal(items, '')
+    return items.filter(keep), pc.list_parent_indices(lists).filter(keep).to_numpy()
+
+
+def canonical_names(names, counts, synonym_table):
+    """
+    Canonical spelling of each distinct item: the synonym table's, else the most frequent
+    spelling with the same skill_key().
+    """
+    commonest = {}
+    for position in np.argsort(-counts, kind='stable'):
+        commonest.setdefault(skill_key(names[position]), names[position])
+    return [synonym_table.get(key, commonest[key]) for key in map(skill_key, names)]
+
+
+def list_column(items, rows, row_count, synonym_table=None):
+    """
+    Packs items and their row positions into a list<string> column of `row_count` rows,
+    dropping repeats within a row. With a `synonym_table` items are made canonical first.
+    Per-item Python work happens once per distinct item; the rest are Arrow and NumPy array ops.
+    """
+    encoded = pc.dictionary_encode(items)
+    codes = encoded.indices.to_numpy()
+    names = encoded.dictionary.to_pylist()
+    if synonym_table is not None:
+        names = canonical_names(names, np.bincount(codes, minlength=len(names)), synonym_table)
+    key_codes, keys = pd.factorize(np.array([skill_key(name) for name in names], dtype=object))
+    # Repeats within a row share (row, key); the first spelling is kept
+    first = ~pd.Series(rows.astype(np.int64) * max(len(keys), 1) + key_codes[codes]).duplicated().to_numpy()
+    values = pa.array(names, type=pa.string()).take(pa.array(codes[first]))
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(rows[first], minlength=row_count))]).astype(np.int32)
+    return pd.Series(pa.ListArray.from_arrays(offsets, values), dtype=LIST_DTYPE)
+
+
+def normalize_frame(df, list_fields=(), email_fields=(), skill_fields=(), synonyms=SKILL_SYNONYMS, columns=None):
+    """
+    Returns a normalised copy of a results DataFrame, reindexed to `columns` if given.
+    `list_fields` become lists of distinct items, with `skill_fields` items made canonical
+    through `synonyms`; `email_fields` are lower-cased; everything else is stripped text.
+    """
+    if columns is not None:
+        df = df.reindex(columns=columns)
+    index = df.index
+    # Items are tracked by row position from here on
+    df = df.reset_index(drop=True)
+    synonym_table = synonym_keys(synonyms)
+    result = {}
+    for name in df.columns:
+        if name in list_fields:
+            items, rows = split_list_column(df[name])
+            result[name] = list_column(items, rows, len(df), synonym_table if name in skill_fields else None)
+            continue
+        text = as_text(df[name])
+        if name in email_fields:
+            text = text.str.lower().str.replace(r'^mailto:', '', regex=True)
+        else:
+            # A single value that came back as a one-item stringified list
+            text = text.str.replace(r'''^\[\s*['"](.*)['"]\s*\]$''', r'\1', regex=True)
+        result[name] = text
+    return pd.DataFrame(result).set_axis(index)
+
+
+def profile_settings(profile):
+    """
+    normalize_frame() keyword arguments for a profile module.
+    """
+    return {
+        'list_fields': profile.LIST_FIELDS,
+        'email_fields': profile.EMAIL_FIELDS,
+        'skill_fields': profile.SKILL_FIELDS,
+        'columns': sink_columns(profile.FIELD_NAMES),
+    }
+
+
+def join_lists(df, separator=', '):
+    """
+    Turns list columns back into text, e.g. for a CSV download.
+    """
+    return df.apply(
+        lambda column: pd.Series(
+            pc.binary_join(pa.array(column), separator).fill_null(''), index=column.index, dtype=object,
+        ) if column.dtype == LIST_DTYPE else column
+    )
+
+
+def to_arrow(df, list_fields=()):
+    """
+    A typed Arrow table: list<string> for list fields and string for the rest.
+    """
+    schema = pa.schema([
+        pa.field(name, pa.list_(pa.string()) if name in list_fields else pa.string()) for name in df.columns
+    ])
+    # The pandas metadata would name the list dtype in a form pandas can't read back
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False).replace_schema_metadata(None)
+
+
+def parquet_bytes(df, list_fields=()):
+    buffer = io.BytesIO()
+    pq.write_table(to_arrow(df, list_fields), buffer)
+    return buffer.getvalue()
+
+
+def write_parquet(df, path, list_fields=()):
+    # Written under a temporary name first so a crash never leaves a truncated file behind
+    pq.write_table(to_arrow(df, list_fields), path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+
+def read_results(path):
+    """
+    Reads a result file written by ResultSink (CSV, JSONL or a Parquet directory), or a
+    Parquet file, with every column as text.
+    """
+    if os.path.isdir(path) or path.endswith('.parquet'):
+        return pq.read_table(path).to_pandas()
+    if path.endswith('.jsonl'):
+        return pd.read_json(path, lines=True, dtype=False)
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Normalise parsed resume results into a typed Parquet file.")
+    parser.add_argument('inputs', nargs='+', help="Result files (.csv/.jsonl/.parquet or a Parquet directory).")
+    parser.add_argument('--profile', default='app', choices=['app', 'app1'], help="Which app's fields to use.")
+    parser.add_argument('--output', required=True, help="Parquet file to write.")
+    args = parser.parse_args(argv)
+
+    profile = importlib.import_module(f'{args.profile}_profile')
+    settings = profile_settings(profile)
+    frames = []
+    for path in args.inputs:
+        frame = read_results(path)
+        if SOURCE_COLUMN not in frame.columns:
+            frame[SOURCE_COLUMN] = os.path.basename(path)
+        frames.append(frame)
+    # Columns are matched by name, so files written with different column orders line up
+    df = normalize_frame(pd.concat(frames, ignore_index=True), **settings)
+    write_parquet(df, args.output, settings['list_fields'])
+    print(f"{len(df)} rows -> {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import csv
+import io
+import json
+import os
+
+# Column recording which uploaded file a row came from; used to resume interrupted runs
+SOURCE_COLUMN = 'Source File'
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+
+def sink_columns(field_names):
+    return [SOURCE_COLUMN] + list(field_names)
+
+
+def _cell(value):
+    if isinstance(value, (list, tuple)):
+        return ', '.join(str(item) for item in value)
+    if value is None:
+        return ''
+    return value if isinstance(value, str) else str(value)
+
+
+def _trim_partial_line(path):
+    """
+    Drops a half-written last line left behind by a crash so appends start on a clean line.
+    """
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+
+class ResultSink:
+    """
+    Append-only writer for parsed resume rows with a fixed column order.
+    Every row is flushed as it arrives, so an interrupted run keeps everything written so far.
+    CSV and JSONL sinks are single files; a Parquet sink is a directory of part files,
+    one per `row_group_size` rows, since Parquet files cannot be appended to.
+    Rows are numbered from 0 in the order they were written, across runs appending to the sink.
+    """
+    def __init__(self, path, columns, format=None, resume=True, row_group_size=100):
+        self.path = path
+        self.columns = list(columns)
+        self.format = format or os.path.splitext(path)[1].lstrip('.').lower() or 'csv'
+        if self.format not in FORMATS:
+            raise ValueError(f"Unsupported sink format: {self.format}")
+        self.row_group_size = row_group_size
+        self.buffer = []
+        self.written = 0
+        # Rows in the sink, including those from earlier runs; the next row's ID
+        self.rows = 0
+        if not resume:
+            self._reset()
+        if self.format != 'parquet' and os.path.isfile(path) and os.path.getsize(path) > 0:
+            # Before reading, so a cut-off last line is neither counted nor taken as done
+            _trim_partial_line(path)
+        self.completed = self._read_completed()
+        self.file = None
+        if self.format == 'parquet':
+            os.makedirs(path, exist_ok=True)
+            self.part = len(self._parts())
+        else:
+            self.file = open(path, 'a', encoding='utf-8', newline='')
+            if self.format == 'csv' and os.path.getsize(path) == 0:
+                self._write_line(self.columns)
+
+    def _reset(self):
+        if self.format == 'parquet':
+            for part in self._parts():
+                os.remove(part)
+        elif os.path.isfile(self.path):
+            os.remove(self.path)
+
+    def _parts(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if name.startswith('part-') and name.endswith('.parquet')
+        )
+
+    def _read_completed(self):
+        """
+        Returns the source files that already have a row in the sink.
+        """
+        completed = set()
+        if self.format == 'parquet':
+            if self._parts():
+                import pyarrow.parquet as pq
+                for part in self._parts():
+                    sources = pq.read_table(part, columns=[SOURCE_COLUMN]).column(0).to_pylist()
+                    completed.update(sources)
+                    self.rows += len(sources)
+        elif os.path.isfile(self.path):
+            with open(self.path, encoding='utf-8', newline='') as f:
+                if self.format == 'csv':
+                    reader = csv.reader(f)
+                    header = next(reader, None)
+                    if header is not None and header != self.columns:
+                        raise ValueError(f"{self.path} has columns {header}, expected {self.columns}")
+                    for row in reader:
+                        self.rows += 1
+                        # A short row is a line cut off by a crash; its file gets processed again
+                        if len(row) == len(self.columns):
+                            completed.add(row[0])
+                else:
+                    for line in f:
+                        self.rows += 1
+                        try:
+                            completed.add(json.loads(line)[SOURCE_COLUMN])
+                        except (json.JSONDecodeError, KeyError, TypeError):
+                            pass
+        return completed
+
+    def _write_line(self, values):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(values)
+        # One write per row keeps a crash from leaving more than one partial line
+        self.file.write(buffer.getvalue())
+        self.file.flush()
+
+    def write(self, source, data):
+        """
+        Appends one parsed resume and returns its row ID. Keys outside the sink's columns
+        are dropped and missing ones are left empty.
+        """
+        row = dict(data)
+        row[SOURCE_COLUMN] = source
+        if self.format == 'csv':
+            self._write_line([_cell(row.get(column)) for column in self.columns])
+        elif self.format == 'jsonl':
+            record = {column: row.get(column, '') for column in self.columns}
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.file.flush()
+        else:
+            self.buffer.append([_cell(row.get(column)) for column in self.columns])
+            if len(self.buffer) >= self.row_group_size:
+                self.flush()
+        self.completed.add(source)
+        self.written += 1
+        self.rows += 1
+        return self.rows - 1
+
+    def saved_rows(self):
+        """
+        Rows already on disk; Parquet rows wait in the buffer until their part file is written.
+        """
+        return self.rows - len(self.buffer)
+
+    def flush(self):
+        if self.format != 'parquet' or not self.buffer:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.table({column: [row[i] for row in self.buffer] for i, column in enumerate(self.columns)})
+        # Write to a temporary name first so a crash never leaves a truncated part behind
+        final_path = os.path.join(self.path, f'part-{self.part:05d}.parquet')
+        pq.write_table(table, final_path + '.tmp')
+        os.replace(final_path + '.tmp', final_path)
+        self.part += 1
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
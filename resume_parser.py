@@ -67,7 +67,7 @@ import re
 import io
 import pandas as pd
 import json
-from groq import Groq
+from groq_client import default_api_key, get_client
 
 # Path to the output CSV file
 csv_file = 'output.csv'
@@ -115,8 +115,10 @@ def ensure_fields(row, fieldnames):
         if field not in fieldnames:
             del row[field]
 
-def process_resumes(resumes_text):
+def process_resumes(resumes_text, api_key=None):
     all_rows = []
+    # One long-lived client for every resume, so its connections are reused
+    client = get_client(api_key or default_api_key(), max_retries=2)
     for filename, text in resumes_text.items():
         prompt_template = f'''
     You are an AI bot designed to act as a professional for parsing resumes. You are given with resume {text} and your job is to extract the following information from the resume:
@@ -129,10 +131,6 @@ def process_resumes(resumes_text):
     7. soft skills
     Give the extracted information in csv format only not other text i want in start and end
     '''
-        
-        groq_api_key = st.secrets["groq"]["api_key"]
-        
-        client = Groq(api_key=groq_api_key)
 
     chat_completion = client.chat.completions.create(
         messages=[
@@ -146,7 +144,6 @@ def process_resumes(resumes_text):
     )
 
     response_content = chat_completion.choices[0].message.content
-    print(response_content)
     
     # Extract the JSON part from the string
     start_index = response_content.find('{')
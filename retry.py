@@ -0,0 +1,89 @@
+import random
+import time
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+RATE_LIMITED = 'rate_limited'
+TRANSIENT = 'transient'
+FATAL = 'fatal'
+
+
+class RetriesExhausted(Exception):
+    def __init__(self, attempts, error):
+        super().__init__(f"gave up after {attempts} attempts: {type(error).__name__}: {error}")
+        self.attempts = attempts
+        self.error = error
+
+
+def classify_error(error):
+    """
+    Sorts a provider error into RATE_LIMITED, TRANSIENT (worth retrying) or FATAL.
+    """
+    try:
+        import groq
+        if isinstance(error, (groq.APITimeoutError, groq.APIConnectionError)):
+            return TRANSIENT
+    except ImportError:
+        pass
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return TRANSIENT
+    status = getattr(error, 'status_code', None)
+    if status == 429:
+        return RATE_LIMITED
+    if status in RETRYABLE_STATUS:
+        return TRANSIENT
+    return FATAL
+
+
+def retry_after_seconds(error):
+    """
+    Reads the provider's retry-after hint from the error response, if there is one.
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except ValueError:
+        # HTTP-date values are rare from LLM providers; fall back to backoff
+        pass
+    return None
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """
+    Full-jitter exponential backoff for the given zero-based attempt number.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def call_with_retries(func, rate_limiter=None, cost=0, max_attempts=4, base_delay=1.0, max_delay=60.0):
+    """
+    Calls func() until it succeeds, retrying rate limits and transient errors with
+    jittered exponential backoff. A retry-after hint from the provider takes precedence
+    and, for rate limits, pauses every caller sharing `rate_limiter`.
+    Returns (result, attempts) or raises RetriesExhausted.
+    """
+    for attempt in range(max_attempts):
+        if rate_limiter is not None:
+            rate_limiter.acquire(cost)
+        try:
+            return func(), attempt + 1
+        except Exception as e:
+            kind = classify_error(e)
+            if kind == FATAL or attempt + 1 == max_attempts:
+                raise RetriesExhausted(attempt + 1, e) from e
+            delay = retry_after_seconds(e)
+            if delay is None:
+                delay = backoff_delay(attempt, base_delay, max_delay)
+            if kind == RATE_LIMITED and rate_limiter is not None:
+                rate_limiter.defer(delay)
+            elif rate_limiter is not None:
+                # Cut short if the rate limiter is cancelled
+                rate_limiter.sleep(delay)
+            else:
+                time.sleep(delay)
@@ -0,0 +1,34 @@
+import re
+
+EMAIL = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}')
+LINKEDIN = re.compile(r'(?:https?://)?(?:[a-z]{2,3}\.)?linkedin\.com/(?:in|pub)/[A-Za-z0-9_%-]+/?', re.I)
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def extract_email(text):
+    match = EMAIL.search(text)
+    return match.group(0).lower() if match else None
+
+
+def extract_linkedin(text):
+    match = LINKEDIN.search(text)
+    if not match:
+        return None
+    url = match.group(0).rstrip('/')
+    return url if url.lower().startswith('http') else 'https://' + url
+
+
+def normalise(text):
+    return ' ' + _NON_WORD.sub(' ', text.lower()).strip() + ' '
+
+
+def apply_rules(text, field_rules):
+    """
+    Runs each field's rule over the text and returns the fields it could fill.
+    """
+    found = {}
+    for field, rule in field_rules.items():
+        value = rule(text)
+        if value:
+            found[field] = value
+    return found
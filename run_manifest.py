@@ -0,0 +1,195 @@
+"""
+Per-file record of batch runs, kept in SQLite next to the output they write.
+
+    python run_manifest.py results.csv.manifest.sqlite3
+
+Every input file gets a row with its content hash, extraction status, LLM attempts, token
+usage, latency and the ID of its output row, committed as soon as the file finishes, so an
+interrupted run keeps its progress. A later run over the same inputs only processes files
+that are new, changed (different hash) or not done. Each run also gets a row with its
+start and end times and counts, as an audit trail for throughput.
+"""
+import argparse
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+
+MANIFEST_SUFFIX = '.manifest.sqlite3'
+
+
+def content_hash(file_bytes):
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def manifest_path(output):
+    return output.rstrip('/\\') + MANIFEST_SUFFIX
+
+
+def extraction_status(resume):
+    """
+    How a pipeline resume got its text: 'extracted', 'failed', 'cached' (text from the
+    document cache) or 'skipped' (the response was cached, so no text was needed).
+    """
+    if 'extraction' in resume['timings']:
+        return 'extracted' if resume['text'] is not None else 'failed'
+    return 'cached' if resume['text'] is not None else 'skipped'
+
+
+class RunManifest:
+    """
+    Files are keyed by source name, as in the output's Source File column. Their status is
+    'running' from the moment they enter the pipeline until they are 'done' or 'failed';
+    a file left 'running' by a crash is processed again.
+    """
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        # Files are registered from the pipeline's reader thread and finished from the main one
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(
+            '''CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                argv TEXT,
+                started_at REAL NOT NULL,
+                finished_at REAL,
+                status TEXT NOT NULL DEFAULT 'running',
+                processed INTEGER NOT NULL DEFAULT 0,
+                failed INTEGER NOT NULL DEFAULT 0,
+                skipped INTEGER NOT NULL DEFAULT 0,
+                tokens REAL NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                source TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                status TEXT NOT NULL,
+                run_id INTEGER NOT NULL,
+                extraction TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                prompt_tokens REAL NOT NULL DEFAULT 0,
+                completion_tokens REAL NOT NULL DEFAULT 0,
+                seconds REAL,
+                row_id INTEGER,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            );'''
+        )
+
+    def start_run(self, argv=()):
+        with self.lock, self.conn:
+            return self.conn.execute(
+                'INSERT INTO runs (argv, started_at) VALUES (?, ?)', (' '.join(argv), time.time())
+            ).lastrowid
+
+    def finish_run(self, run_id, processed, failed, skipped, interrupted=False):
+        with self.lock, self.conn:
+            self.conn.execute(
+                'UPDATE runs SET finished_at = ?, status = ?, processed = ?, failed = ?, skipped = ? WHERE id = ?',
+                (time.time(), 'interrupted' if interrupted else 'finished', processed, failed, skipped, run_id),
+            )
+
+    def sources(self):
+        with self.lock:
+            return {source for source, in self.conn.execute('SELECT source FROM files')}
+
+    def status(self, source, sha256):
+        """
+        The status recorded for `source` with this content, or None if it has none.
+        """
+        with self.lock:
+            row = self.conn.execute('SELECT sha256, status FROM files WHERE source = ?', (source,)).fetchone()
+        return row[1] if row is not None and row[0] == sha256 else None
+
+    def begin(self, run_id, source, sha256):
+        """
+        Marks a file as entering the pipeline, replacing what an earlier run recorded for it.
+        """
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO files (source, sha256, status, run_id, started_at) VALUES (?, ?, ?, ?, ?)',
+                (source, sha256, 'running', run_id, time.time()),
+            )
+
+    def finish(self, source, resume, row_id=None):
+        """
+        Records how a pipeline resume went; `row_id` is its row in the output, if one was written.
+        """
+        usage = resume.get('usage') or {}
+        error = resume['error'] or resume.get('parse_error')
+        tokens = usage.get('prompt_tokens', 0) + usage.get('completion_tokens', 0)
+        with self.lock, self.conn:
+            # Kept on the run too, so its totals survive the file being processed again later
+            self.conn.execute(
+                'UPDATE runs SET tokens = tokens + ? WHERE id = (SELECT run_id FROM files WHERE source = ?)',
+                (tokens, source),
+            )
+            self.conn.execute(
+                '''UPDATE files SET status = ?, extraction = ?, error = ?, attempts = ?, prompt_tokens = ?,
+                completion_tokens = ?, seconds = ?, row_id = ?, finished_at = ? WHERE source = ?''',
+                (
+                    'failed' if row_id is None else 'done', extraction_status(resume), error, resume['attempts'],
+                    usage.get('prompt_tokens', 0), usage.get('completion_tokens', 0),
+                    sum(resume['timings'].values()), row_id, time.time(), source,
+                ),
+            )
+
+    def forget_files(self):
+        """
+        Drops every file's record, e.g. when the output is replaced; the run history stays.
+        """
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM files')
+
+    def runs(self):
+        """
+        Every run with its counts, tokens and throughput, oldest first.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT id, argv, started_at, finished_at, status, processed, failed, skipped, tokens FROM runs ORDER BY id'
+            ).fetchall()
+        runs = []
+        for run_id, argv, started_at, finished_at, status, processed, failed, skipped, tokens in rows:
+            seconds = (finished_at or time.time()) - started_at
+            runs.append({
+                'id': run_id, 'argv': argv, 'started_at': started_at, 'finished_at': finished_at,
+                'status': status, 'processed': processed, 'failed': failed, 'skipped': skipped,
+                'tokens': tokens, 'seconds': seconds,
+                'resumes_per_minute': processed / seconds * 60 if seconds > 0 else 0.0,
+            })
+        return runs
+
+    def counts(self):
+        """
+        Number of files per status.
+        """
+        with self.lock:
+            return dict(self.conn.execute('SELECT status, COUNT(*) FROM files GROUP BY status'))
+
+    def close(self):
+        self.conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the runs and file statuses recorded in a run manifest.")
+    parser.add_argument('path', help="Manifest file, e.g. results.csv" + MANIFEST_SUFFIX)
+    args = parser.parse_args(argv)
+
+    manifest = RunManifest(args.path)
+    print(f"{'run':>4}  {'started':<20}{'status':<13}{'processed':>10}{'failed':>8}{'skipped':>9}{'tokens':>10}{'resumes/min':>13}")
+    for run in manifest.runs():
+        started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['started_at']))
+        print(
+            f"{run['id']:>4}  {started:<20}{run['status']:<13}{run['processed']:>10}{run['failed']:>8}"
+            f"{run['skipped']:>9}{run['tokens']:>10.0f}{run['resumes_per_minute']:>13.1f}"
+        )
+    counts = manifest.counts()
+    print(', '.join(f"{count} {status}" for status, count in sorted(counts.items())) or "No files recorded", file=sys.stderr)
+    manifest.close()
+
+
+if __name__ == "__main__":
+    main()
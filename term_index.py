@@ -0,0 +1,246 @@
+"""
+Fuzzy matching of resume text against a term taxonomy with TF-IDF character trigrams,
+run as NumPy array operations on the CPU with no model or LLM call.
+
+Every window of one to a few consecutive words in a resume is compared with every phrase
+of the taxonomy by cosine similarity of their trigram TF-IDF vectors, so "US-GAAP",
+"hedge-fund" and "Privat Equity" still find their terms. A window's dot product with each
+phrase is summed from vectors built once per distinct word, so no per-window vector is built.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from rule_extractors import normalise
+
+NGRAM = 3
+# Space, a-z and 0-9: the characters left by rule_extractors.normalise()
+ALPHABET = 37
+# Cosine similarity a window needs to count as mentioning a term
+MATCH_THRESHOLD = 0.7
+# Windows may hold this many more words than the phrase, e.g. "U S GAAP" for "US GAAP"
+EXTRA_WORDS = 1
+# Characters scored per batch; bounds the (words x phrases) window arrays
+BATCH_CHARS = 100_000
+# Seconds between checks of a taxonomy file for changes
+RELOAD_SECONDS = 5.0
+
+_CHAR_CODES = np.zeros(256, dtype=np.int64)
+_CHAR_CODES[ord('a'):ord('z') + 1] = np.arange(1, 27)
+_CHAR_CODES[ord('0'):ord('9') + 1] = np.arange(27, 37)
+
+
+def term_phrases(term):
+    """
+    The phrases a taxonomy term is matched by: the term itself and the alternatives in
+    "A / B" and "A (B)" forms. Plurals need no variant, since they share most trigrams.
+    """
+    parts = [term, re.sub(r'\(.*?\)', ' ', term)]
+    parts += re.split(r'\s+/\s+', term) + re.findall(r'\((.*?)\)', term)
+    phrases = []
+    for part in parts:
+        phrase = normalise(part)
+        if phrase.strip() and phrase not in phrases:
+            phrases.append(phrase)
+    return phrases
+
+
+def trigram_codes(text):
+    """
+    Integer code of every character trigram in normalised text, in order.
+    """
+    chars = _CHAR_CODES[np.frombuffer(text.encode('ascii'), dtype=np.uint8)]
+    return chars[:-2] * ALPHABET * ALPHABET + chars[1:-1] * ALPHABET + chars[2:]
+
+
+class TermIndex:
+    """
+    TF-IDF trigram vectors of a taxonomy's phrases. IDF is taken over the phrases, so
+    trigrams shared by many terms ("nce", " fu") count for less than distinctive ones.
+    """
+    def __init__(self, terms, threshold=MATCH_THRESHOLD, extra_words=EXTRA_WORDS):
+        self.terms = list(terms)
+        self.threshold = threshold
+        # Identifies what the index finds, e.g. for cache keys over its results
+        settings = '\n'.join([*self.terms, str(threshold), str(extra_words)])
+        self.version = hashlib.sha256(settings.encode('utf-8')).hexdigest()[:16]
+        phrases = [(phrase, index) for index, term in enumerate(self.terms) for phrase in term_phrases(term)]
+        # Phrases are ordered by length in words, so the phrases compared with windows of
+        # one size are a slice of columns
+        phrases.sort(key=lambda item: len(item[0].split()))
+        self.phrase_terms = np.array([index for _, index in phrases], dtype=np.int64)
+        phrases = [phrase for phrase, _ in phrases]
+        self.phrase_words = np.array([len(phrase.split()) for phrase in phrases], dtype=np.int64)
+        self.extra_words = extra_words
+        codes = [trigram_codes(phrase) for phrase in phrases]
+        vocabulary = np.unique(np.concatenate(codes)) if codes else np.zeros(0, dtype=np.int64)
+        counts = np.zeros((len(vocabulary), len(phrases)))
+        for column, phrase_codes in enumerate(codes):
+            np.add.at(counts[:, column], np.searchsorted(vocabulary, phrase_codes), 1)
+        document_frequency = (counts > 0).sum(axis=1)
+        idf = np.log((1 + len(phrases)) / (1 + document_frequency)) + 1
+        weights = counts * idf[:, None]
+        weights /= np.maximum(np.linalg.norm(weights, axis=0), 1e-12)
+        # Each trigram of a window adds its own IDF times the phrase's weight to the dot
+        # product. Row -1 is all zeros, for trigrams outside the taxonomy
+        self.lookup = np.full(ALPHABET ** NGRAM, -1, dtype=np.int64)
+        self.lookup[vocabulary] = np.arange(len(vocabulary))
+        self.weights = np.vstack([weights * idf[:, None], np.zeros((1, len(phrases)))]).astype(np.float32)
+        # Squared IDF of every trigram, for window norms; unseen trigrams get the highest IDF
+        self.idf_squared = np.full(ALPHABET ** NGRAM, (np.log(1 + len(phrases)) + 1) ** 2, dtype=np.float32)
+        self.idf_squared[vocabulary] = idf ** 2
+        self.window_sizes = range(1, int(self.phrase_words.max(initial=0)) + extra_words + 1)
+
+    def scores(self, texts):
+        """
+        Returns a (len(texts), len(terms)) array: each term's best cosine similarity with
+        any window of each text.
+        """
+        result = np.zeros((len(texts), len(self.terms)))
+        if not self.terms:
+            return result
+        batch, batch_chars = [], 0
+        for index, text in enumerate(texts):
+            batch.append(index)
+            batch_chars += len(text)
+            if batch_chars >= BATCH_CHARS:
+                result[batch] = self._score_batch([texts[i] for i in batch])
+                batch, batch_chars = [], 0
+        if batch:
+            result[batch] = self._score_batch([texts[i] for i in batch])
+        return result
+
+    def _word_vectors(self, words):
+        """
+        Dot products with each phrase and squared norms of the trigrams of ' word ', for
+        each of `words`, computed together over one string of all of them.
+        """
+        text = ' ' + ' '.join(words) + ' '
+        codes = trigram_codes(text)
+        spaces = np.flatnonzero(np.frombuffer(text.encode('ascii'), dtype=np.uint8) == ord(' '))
+        rows = self.lookup[codes]
+        squares = self.idf_squared[codes]
+        # Trigrams spanning two words ('x y') belong to neither
+        rows[spaces[1:-1] - 1] = -1
+        squares[spaces[1:-1] - 1] = 0
+        starts = spaces[:-1]
+        return np.add.reduceat(self.weights[rows], starts, axis=0), np.add.reduceat(squares, starts)
+
+    def _score_batch(self, texts):
+        # A window's trigrams are those of its words plus one across each space inside it,
+        # so vectors are built once per distinct word and summed along the text by word
+        word_lists = [normalise(text).split() for text in texts]
+        words = [word for word_list in word_lists for word in word_list]
+        if not words:
+            return np.zeros((len(texts), len(self.terms)))
+        word_ids, distinct = [], {}
+        for word in words:
+            word_ids.append(distinct.setdefault(word, len(distinct)))
+        word_dots, word_squares = self._word_vectors(list(distinct))
+        word_ids = np.array(word_ids)
+        word_docs = np.repeat(np.arange(len(texts)), [len(word_list) for word_list in word_lists])
+        # The trigram across the space before each word, e.g. 'e f' in 'hedge fund'
+        ends = _CHAR_CODES[np.frombuffer(''.join(word[-1] for word in words).encode('ascii'), dtype=np.uint8)]
+        beginnings = _CHAR_CODES[np.frombuffer(''.join(word[0] for word in words).encode('ascii'), dtype=np.uint8)]
+        crossing = np.concatenate([[0], ends[:-1] * ALPHABET * ALPHABET + beginnings[1:]])
+        crossing_squares = self.idf_squared[crossing]
+        # Between two texts it gets an infinite norm, so windows spanning them score 0
+        crossing_squares[np.flatnonzero(np.diff(word_docs)) + 1] = np.inf
+        # Each word with the trigram before it, as added to a window it extends
+        next_dots = word_dots[word_ids] + self.weights[self.lookup[crossing]]
+        next_squares = word_squares[word_ids] + crossing_squares
+        best = np.zeros((len(texts), self.weights.shape[1]), dtype=np.float32)
+        # window_dots[i] sums words i..i+size-1 and grows by a word per size. Phrases too
+        # short for the sizes left are dropped from its columns as it goes
+        window_dots, window_squares, offset = word_dots[word_ids], word_squares[word_ids], 0
+        for size in self.window_sizes:
+            count = len(words) - size + 1
+            if count <= 0:
+                break
+            # A phrase is only compared with windows at least as long as it, so "private"
+            # alone doesn't score well against "private equity"
+            low = np.searchsorted(self.phrase_words, size - self.extra_words)
+            high = np.searchsorted(self.phrase_words, size, side='right')
+            if size > 1:
+                window_dots = window_dots[:count, low - offset:] + next_dots[size - 1:, low:]
+                window_squares = window_squares[:count] + next_squares[size - 1:]
+                offset = low
+            if low == high:
+                continue
+            similarity = window_dots[:, low - offset:high - offset] / np.sqrt(np.maximum(window_squares, 1e-12))[:, None]
+            # Windows are grouped by the text they start in
+            docs = word_docs[:count]
+            starts = np.concatenate([[0], np.flatnonzero(np.diff(docs)) + 1])
+            np.maximum.at(best[:, low:high], docs[starts], np.maximum.reduceat(similarity, starts, axis=0))
+        # A term scores its best phrase. Window norms count a repeated trigram twice rather
+        # than once squared, which can push a score slightly past 1
+        scores = np.zeros((len(texts), len(self.terms)), dtype=np.float32)
+        np.maximum.at(scores.T, self.phrase_terms, best.T)
+        return np.minimum(scores, 1.0)
+
+    def match_many(self, texts):
+        """
+        Returns the terms found in each text, in taxonomy order.
+        """
+        found = self.scores(texts) >= self.threshold
+        return [[self.terms[index] for index in np.flatnonzero(row)] for row in found]
+
+    def find_joined(self, text):
+        return ', '.join(self.match_many([text])[0]) or None
+
+
+def read_terms(path):
+    """
+    Reads a taxonomy file: one term per line; blank lines and lines starting with '#' are skipped.
+    """
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+class TaxonomyFile:
+    """
+    A TermIndex over the terms in a file, rebuilt when the file changes, so the taxonomy
+    can be edited while workers and apps are running. Falls back to `default_terms` while
+    the file doesn't exist. The file is checked at most every `check_seconds`.
+    """
+    def __init__(self, path, default_terms=(), check_seconds=RELOAD_SECONDS, **index_settings):
+        self.path = path
+        self.default_terms = list(default_terms)
+        self.check_seconds = check_seconds
+        self.index_settings = index_settings
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.checked_at = 0.0
+        self._load()
+
+    def _load(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            terms = read_terms(self.path)
+        except FileNotFoundError:
+            mtime, terms = None, self.default_terms
+        self.index = TermIndex(terms, **self.index_settings)
+        self.mtime = mtime
+
+    def current(self):
+        """
+        Returns the TermIndex for the file as it is now, reloading it if it has changed.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if now - self.checked_at >= self.check_seconds:
+                self.checked_at = now
+                try:
+                    mtime = os.stat(self.path).st_mtime_ns
+                except FileNotFoundError:
+                    mtime = None
+                if mtime != self.mtime:
+                    self._load()
+            return self.index
+
+    def find_joined(self, text):
+        return self.current().find_joined(text)
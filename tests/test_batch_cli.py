@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+import batch_cli
+from benchmarks.mock_llm_server import MockSettings, start_server
+from benchmarks.synthetic_resumes import generate_corpus
+from result_sink import SOURCE_COLUMN
+
+
+@pytest.fixture
+def server():
+    settings = MockSettings(latency=0.0, jitter=0.0, seed=0)
+    server, base_url = start_server(settings)
+    yield settings, base_url
+    server.shutdown()
+
+
+def write_resumes(directory, files):
+    directory.mkdir(exist_ok=True)
+    for filename, file_bytes in files:
+        (directory / filename).write_bytes(file_bytes)
+
+
+def run(base_url, inputs, output, *extra):
+    return batch_cli.main([
+        str(inputs), '--output', str(output), '--api-key', 'test', '--base-url', base_url,
+        '--no-cache', '--no-dedup', '--no-index', '--rpm', '0', '--tpm', '100000000', *extra,
+    ])
+
+
+def sources(output):
+    with open(output, encoding='utf-8') as f:
+        return [json.loads(line)[SOURCE_COLUMN] for line in f]
+
+
+def test_resume_only_processes_new_and_changed_files(server, tmp_path):
+    settings, base_url = server
+    corpus = list(generate_corpus(6, docx_ratio=0, long_ratio=0))
+    inputs = tmp_path / 'resumes'
+    output = tmp_path / 'results.jsonl'
+    write_resumes(inputs, corpus[:4])
+    assert run(base_url, inputs, output) == 0
+    assert len(sources(output)) == 4
+    assert settings.requests == 4
+
+    write_resumes(inputs, corpus[4:])
+    # Same name, different content: processed again
+    changed, _ = corpus[0]
+    write_resumes(inputs, [(changed, corpus[5][1])])
+    assert run(base_url, inputs, output, '--resume') == 0
+    assert settings.requests == 7
+    rows = sources(output)
+    assert len(set(rows)) == 6
+
+    # Nothing left to do
+    assert run(base_url, inputs, output, '--resume') == 0
+    assert settings.requests == 7
+    assert sources(output) == rows
+
+
+def test_an_existing_output_needs_resume_or_overwrite(server, tmp_path):
+    _, base_url = server
+    inputs = tmp_path / 'resumes'
+    output = tmp_path / 'results.jsonl'
+    write_resumes(inputs, generate_corpus(1, long_ratio=0))
+    assert run(base_url, inputs, output) == 0
+    with pytest.raises(SystemExit):
+        run(base_url, inputs, output)
+    assert run(base_url, inputs, output, '--overwrite') == 0
+    assert len(sources(output)) == 1
+
+
+def test_shards_split_the_inputs_without_overlap(server, tmp_path):
+    settings, base_url = server
+    inputs = tmp_path / 'resumes'
+    write_resumes(inputs, generate_corpus(8, long_ratio=0))
+    shards = []
+    for index in range(2):
+        output = tmp_path / f'shard_{index}.jsonl'
+        assert run(base_url, inputs, output, '--shard', f'{index}/2') == 0
+        shards.append(set(sources(output)))
+    assert all(shards)
+    assert not shards[0] & shards[1]
+    assert len(shards[0] | shards[1]) == 8
+    assert settings.requests == 8
+    assert shards == [
+        {name for name in shards[0] | shards[1] if batch_cli.in_shard(name, (index, 2))} for index in range(2)
+    ]
@@ -0,0 +1,50 @@
+import json
+
+from batching import build_batch_prompt, group_batches, resume_label, split_batch_response
+
+
+def answer(response):
+    return None if response is None else json.loads(response)
+
+
+def test_sections_are_labelled_by_position():
+    resumes = [{'text': 'first'}, {'text': 'second'}]
+    prompt = build_batch_prompt(lambda text, skip_fields: text, resumes)
+    assert '### Resume 1\nfirst' in prompt
+    assert '### Resume 2\nsecond' in prompt
+    assert [resume_label(position) for position in range(2)] == ['Resume 1', 'Resume 2']
+
+
+def test_answers_map_back_to_their_positions():
+    response = '```json\n' + json.dumps({
+        'Resume 2': {'Name': 'B'},
+        'Resume 1': {'Name': 'A'},
+        '3': {'Name': 'C'},
+    }) + '\n```'
+    assert [answer(item) for item in split_batch_response(response, 3)] == [{'Name': 'A'}, {'Name': 'B'}, {'Name': 'C'}]
+
+
+def test_missing_or_unusable_answers_are_none():
+    response = json.dumps({'Resume 1': {'Name': 'A'}, 'Resume 3': 'not an object'})
+    assert [answer(item) for item in split_batch_response(response, 3)] == [{'Name': 'A'}, None, None]
+
+
+def test_an_array_of_answers_is_taken_in_order():
+    response = json.dumps([{'Name': 'A'}, {'Name': 'B'}])
+    assert [answer(item) for item in split_batch_response(response, 2)] == [{'Name': 'A'}, {'Name': 'B'}]
+    # With the wrong number of items there is no telling which answer is whose
+    assert split_batch_response(response, 3) == [None, None, None]
+
+
+def test_unreadable_response_gives_no_answers():
+    assert split_batch_response('Sorry, I cannot help with that.', 2) == [None, None]
+
+
+def test_batches_stay_within_the_token_budget():
+    resumes = [{'text': 'word ' * 400, 'response': None, 'error': None} for _ in range(5)]
+    resumes.insert(2, {'text': None, 'response': '{}', 'error': None})
+    # Each resume costs 600 tokens with its completion, so two fit in 1400 alongside the instructions
+    batches = list(group_batches(resumes, lambda text: text, token_budget=1400, completion_tokens=100))
+    # Every resume lands in exactly one batch, in order, and a cached one rides along for free
+    assert [resume for batch in batches for resume in batch] == resumes
+    assert [len(batch) for batch in batches] == [3, 2, 1]
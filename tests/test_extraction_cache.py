@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+from extraction_cache import ExtractionCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cache.sqlite3')
+
+
+def stored_bytes(cache):
+    return cache.conn.execute(f'SELECT bytes FROM {cache.table}_size').fetchone()[0]
+
+
+def test_size_follows_puts_overwrites_and_deletes(path):
+    cache = ExtractionCache(path)
+    cache.put('a', 'x' * 10)
+    cache.put('b', 'é' * 5)
+    assert stored_bytes(cache) == 20
+    cache.put('a', 'x' * 3)
+    assert stored_bytes(cache) == 13
+    cache.delete('b')
+    assert stored_bytes(cache) == 3
+    assert cache.get('a') == 'xxx'
+    assert cache.get('b') is None
+    cache.close()
+
+
+def test_size_is_shared_between_connections(path):
+    first = ExtractionCache(path)
+    second = ExtractionCache(path)
+    first.put('a', 'x' * 10)
+    second.put('b', 'x' * 20)
+    assert stored_bytes(first) == stored_bytes(second) == 30
+    first.close()
+    second.close()
+    # Reopening counts the existing entries once rather than seeding the total again
+    reopened = ExtractionCache(path)
+    assert reopened.conn.execute('SELECT COUNT(*) FROM responses_size').fetchone()[0] == 1
+    assert stored_bytes(reopened) == 30
+    reopened.close()
+
+
+def test_tables_keep_their_own_size(path):
+    responses = ExtractionCache(path)
+    documents = ExtractionCache(path, table='documents')
+    responses.put('a', 'x' * 10)
+    documents.put('a', 'y' * 4)
+    assert stored_bytes(responses) == 10
+    assert stored_bytes(documents) == 4
+    assert documents.get('a') == 'yyyy'
+    responses.close()
+    documents.close()
+
+
+def test_least_recently_used_entries_are_evicted_over_max_bytes(path, monkeypatch):
+    cache = ExtractionCache(path, max_bytes=25)
+    clock = iter(range(1_000_000, 2_000_000))
+    monkeypatch.setattr(time, 'time', lambda: next(clock))
+    cache.put('a', 'x' * 10)
+    cache.put('b', 'x' * 10)
+    cache.get('a')
+    cache.put('c', 'x' * 10)
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+    assert stored_bytes(cache) == 20
+    cache.close()
+
+
+def test_entries_expire_after_max_age(path, monkeypatch):
+    cache = ExtractionCache(path, max_age_days=1)
+    now = time.time()
+    cache.put('old', 'x' * 10)
+    monkeypatch.setattr(time, 'time', lambda: now + 2 * 24 * 60 * 60)
+    assert cache.get('old') is None
+    cache.put('new', 'x' * 5)
+    # The next put drops the expired entry and its bytes
+    assert cache.conn.execute('SELECT key FROM responses').fetchall() == [('new',)]
+    assert stored_bytes(cache) == 5
+    cache.close()
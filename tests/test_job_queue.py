@@ -0,0 +1,94 @@
+import pytest
+
+import job_queue
+from job_queue import MAX_ATTEMPTS, JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / 'queue.sqlite3'))
+    yield queue
+    queue.close()
+
+
+def submit(queue, count=3):
+    return queue.submit(((f'resume_{index}.pdf', b'%PDF') for index in range(count)), 'app')
+
+
+def expire_leases(monkeypatch):
+    # Every lease taken so far counts as expired on the next claim
+    monkeypatch.setattr(job_queue, 'LEASE_SECONDS', -1)
+
+
+def test_claim_hands_out_each_resume_once(queue):
+    job_id = submit(queue)
+    job, claimed = queue.claim('worker-a', 2)
+    assert job['id'] == job_id
+    assert [position for position, _, _ in claimed] == [0, 1]
+    _, claimed = queue.claim('worker-b', 2)
+    assert [(position, filename) for position, filename, _ in claimed] == [(2, 'resume_2.pdf')]
+    assert queue.claim('worker-c', 2) == (None, [])
+
+
+def test_complete_records_rows_and_finishes_the_job(queue):
+    job_id = submit(queue, 2)
+    _, claimed = queue.claim('worker-a', 2)
+    assert queue.complete(job_id, 0, 'worker-a', row={'Name': 'Jo'}, usage={'prompt_tokens': 10}, cache_hit=True)
+    assert not queue.progress(job_id)['finished']
+    assert queue.complete(job_id, 1, 'worker-a', error='No valid JSON in the response.')
+    progress = queue.progress(job_id)
+    assert progress['finished']
+    assert (progress['done'], progress['failed']) == (1, 1)
+    results = queue.results(job_id)
+    assert results[0]['row'] == {'Name': 'Jo'}
+    assert results[0]['prompt_tokens'] == 10
+    assert results[0]['cache_hit']
+    assert results[1]['row'] is None
+    assert results[1]['error'] == 'No valid JSON in the response.'
+
+
+def test_complete_is_ignored_once_another_worker_holds_the_resume(queue, monkeypatch):
+    job_id = submit(queue, 1)
+    queue.claim('worker-a', 1)
+    expire_leases(monkeypatch)
+    _, claimed = queue.claim('worker-b', 1)
+    assert [position for position, _, _ in claimed] == [0]
+    assert not queue.complete(job_id, 0, 'worker-a', row={'Name': 'stale'})
+    assert queue.complete(job_id, 0, 'worker-b', row={'Name': 'fresh'})
+    assert queue.results(job_id)[0]['row'] == {'Name': 'fresh'}
+
+
+def test_partial_rows_are_kept_until_the_resume_completes(queue):
+    job_id = submit(queue, 1)
+    queue.claim('worker-a', 1)
+    queue.update_partial(job_id, 0, 'worker-a', {'Name': 'Jo'})
+    assert [entry['row'] for entry in queue.partial_rows(job_id)] == [{'Name': 'Jo'}]
+    queue.complete(job_id, 0, 'worker-a', row={'Name': 'Jo', 'Mail ID': 'jo@example.com'})
+    # A write arriving after completion doesn't replace the final row
+    queue.update_partial(job_id, 0, 'worker-a', {'Name': 'late'})
+    assert queue.partial_rows(job_id) == []
+    assert queue.results(job_id)[0]['row'] == {'Name': 'Jo', 'Mail ID': 'jo@example.com'}
+
+
+def test_release_puts_resumes_back_without_using_an_attempt(queue, monkeypatch):
+    job_id = submit(queue, 1)
+    for _ in range(MAX_ATTEMPTS + 1):
+        _, claimed = queue.claim('worker-a', 1)
+        assert claimed
+        queue.release(job_id, [0], 'worker-a')
+    expire_leases(monkeypatch)
+    _, claimed = queue.claim('worker-b', 1)
+    assert claimed
+
+
+def test_resume_fails_after_its_worker_is_lost_max_attempts_times(queue, monkeypatch):
+    job_id = submit(queue, 1)
+    expire_leases(monkeypatch)
+    for attempt in range(MAX_ATTEMPTS):
+        _, claimed = queue.claim(f'worker-{attempt}', 1)
+        assert claimed
+    assert queue.claim('worker-last', 1) == (None, [])
+    progress = queue.progress(job_id)
+    assert progress['finished']
+    assert progress['failed'] == 1
+    assert queue.results(job_id)[0]['error'] == f'Worker lost {MAX_ATTEMPTS} times while processing this resume'
@@ -0,0 +1,38 @@
+import doctest
+
+import json_recovery
+from json_recovery import parse_fields, parse_streamed_fields
+
+FIELDS = ['Name', 'Mail ID', 'Technical Skills']
+
+
+def test_docstring_examples():
+    assert doctest.testmod(json_recovery).failed == 0
+
+
+def test_fields_arrive_one_by_one_as_the_response_streams():
+    response = '```json\n{"Name": "Jo Smith", "Mail ID": "jo@example.com", "Technical Skills": "Python, SQL"}\n```'
+    seen = []
+    for end in range(1, len(response) + 1):
+        values, complete = parse_streamed_fields(response[:end], FIELDS)
+        if not seen or values != seen[-1][0]:
+            seen.append((values, complete))
+    assert [list(values) for values, _ in seen] == [[], ['Name'], ['Name', 'Mail ID'], FIELDS]
+    assert [complete for _, complete in seen] == [False, False, False, True]
+    # Every value seen while streaming is the final value, never a truncated one
+    final, _ = parse_fields(response, FIELDS)
+    for values, _ in seen:
+        assert all(final[name] == value for name, value in values.items())
+
+
+def test_the_last_value_waits_for_its_closing_brace():
+    values, complete = parse_streamed_fields('{"Name": "Jo", "Mail ID": "jo@example.com", "Technical Skills": "Python"', FIELDS)
+    assert list(values) == ['Name', 'Mail ID']
+    assert not complete
+    values, complete = parse_streamed_fields('{"Name": "Jo", "Mail ID": "jo@example.com", "Technical Skills": "Python"}', FIELDS)
+    assert values['Technical Skills'] == 'Python'
+    assert complete
+
+
+def test_nothing_is_parsed_before_the_object_starts():
+    assert parse_streamed_fields('Here is the extracted information:', FIELDS) == ({}, False)
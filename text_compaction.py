@@ -0,0 +1,203 @@
+import re
+from collections import Counter
+
+from llm_dispatch import estimate_tokens
+from text_extraction import PAGE_BREAK
+
+SECTION_ALIASES = {
+    'summary': ['summary', 'profile', 'professional summary', 'career objective', 'objective', 'about me'],
+    'experience': [
+        'experience', 'work experience', 'professional experience', 'employment', 'employment history',
+        'work history', 'career history', 'internships', 'internship',
+    ],
+    'skills': [
+        'skills', 'technical skills', 'key skills', 'core competencies', 'competencies', 'soft skills',
+        'tools', 'technologies', 'tools and technologies', 'areas of expertise', 'expertise',
+    ],
+    'projects': ['projects', 'personal projects', 'academic projects', 'key projects'],
+    'education': ['education', 'academic background', 'qualifications', 'academic qualifications'],
+    'certifications': ['certifications', 'certificates', 'licenses', 'courses', 'training'],
+    'languages': ['languages', 'languages known', 'languages spoken'],
+    'other': [
+        'interests', 'hobbies', 'references', 'publications', 'awards', 'achievements',
+        'declaration', 'personal details', 'volunteering', 'extracurricular activities',
+    ],
+}
+_HEADINGS = {alias: section for section, aliases in SECTION_ALIASES.items() for alias in aliases}
+
+PAGE_NUMBER = re.compile(r'^(page\s*)?\d+(\s*(of|/)\s*\d+)?$', re.I)
+_SPACES = re.compile('[ \t\u00a0]+')
+
+
+def normalise_whitespace(text):
+    lines = [_SPACES.sub(' ', line).strip() for line in text.splitlines()]
+    out = []
+    for line in lines:
+        # Keep at most one blank line in a row
+        if line or (out and out[-1]):
+            out.append(line)
+    return '\n'.join(out).strip()
+
+
+def remove_page_furniture(pages):
+    """
+    Drops page numbers and lines repeated on most pages (running headers and footers).
+    """
+    page_lines = [page.splitlines() for page in pages]
+    repeated = set()
+    if len(page_lines) > 1:
+        counts = Counter(line for lines in page_lines for line in set(lines) if line)
+        repeated = {
+            line for line, count in counts.items()
+            if count >= max(2, len(page_lines) // 2 + 1) and section_of(line) is None
+        }
+    cleaned = []
+    for lines in page_lines:
+        cleaned.append('\n'.join(
+            line for line in lines if line not in repeated and not PAGE_NUMBER.match(line)
+        ))
+    return cleaned
+
+
+def section_of(line):
+    if len(line) > 40:
+        return None
+    key = re.sub(r'[^a-z ]', '', line.lower()).strip()
+    return _HEADINGS.get(key)
+
+
+def split_sections(text):
+    """
+    Splits text into (section, text) blocks. Text before the first heading is the 'header'
+    block, which carries the name and contact details.
+    """
+    sections = [['header', []]]
+    for line in text.splitlines():
+        section = section_of(line)
+        if section is not None:
+            sections.append([section, [line]])
+        else:
+            sections[-1][1].append(line)
+    return [(section, '\n'.join(lines).strip()) for section, lines in sections if any(lines)]
+
+
+def _truncate(text, tokens):
+    if estimate_tokens(text) <= tokens:
+        return text
+    lines = []
+    used = 0
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > tokens:
+            break
+        lines.append(line)
+        used += cost
+    return '\n'.join(lines)
+
+
+def compact_text(text, token_budget=None, keep_sections=('experience', 'skills', 'projects', 'education')):
+    """
+    Normalises whitespace, removes repeated page headers/footers and page numbers, and, when
+    the result is still over `token_budget`, drops sections outside `keep_sections` before
+    trimming the kept ones. The header block is always kept.
+    Returns (compacted_text, tokens_saved).
+    """
+    original_tokens = estimate_tokens(text)
+    pages = [normalise_whitespace(page) for page in text.split(PAGE_BREAK)]
+    compacted = normalise_whitespace('\n'.join(remove_page_furniture(pages)))
+
+    if token_budget is not None and estimate_tokens(compacted) > token_budget:
+        sections = split_sections(compacted)
+        kept = [(section, body) for section, body in sections if section == 'header' or section in keep_sections]
+        if sum(estimate_tokens(body) for _, body in kept) > token_budget:
+            # The header (name, contacts) is kept whole up to a quarter of the budget; the rest
+            # of the budget is shared across the kept sections in proportion to their size
+            header = sum(estimate_tokens(body) for section, body in kept if section == 'header')
+            header_budget = min(header, token_budget // 4)
+            total = sum(estimate_tokens(body) for section, body in kept if section != 'header') or 1
+            kept = [
+                (section, _truncate(body, header_budget if section == 'header'
+                                    else (token_budget - header_budget) * estimate_tokens(body) // total))
+                for section, body in kept
+            ]
+        compacted = '\n\n'.join(body for _, body in kept if body)
+
+    return compacted, max(0, original_tokens - estimate_tokens(compacted))
+
+
+def _split_long_section(body, chunk_tokens):
+    """
+    Splits a section too long for one chunk between lines (or words, for a single huge line),
+    repeating its heading at the start of every piece after the first.
+    """
+    lines = body.splitlines()
+    heading = lines[0] if lines and section_of(lines[0]) is not None else None
+    words = []
+    for line in lines:
+        if estimate_tokens(line) < chunk_tokens // 2:
+            words.append(line)
+        else:
+            # Text without line breaks (common in PDFs) is cut between words instead
+            words.extend(_split_words(line, chunk_tokens // 2))
+    pieces = []
+    current = []
+    used = 0
+    for line in words:
+        cost = estimate_tokens(line) + 1
+        if current and used + cost > chunk_tokens:
+            pieces.append('\n'.join(current))
+            current = [heading] if heading is not None else []
+            used = estimate_tokens(heading) + 1 if heading is not None else 0
+        current.append(line)
+        used += cost
+    if current:
+        pieces.append('\n'.join(current))
+    return pieces
+
+
+def _split_words(line, tokens):
+    pieces = []
+    current = []
+    used = 0
+    for word in line.split(' '):
+        cost = estimate_tokens(word) + 1
+        if current and used + cost > tokens:
+            pieces.append(' '.join(current))
+            current = []
+            used = 0
+        current.append(word)
+        used += cost
+    if current:
+        pieces.append(' '.join(current))
+    return pieces
+
+
+def split_chunks(text, chunk_tokens):
+    """
+    Splits text of more than `chunk_tokens` into chunks of about that size along section
+    boundaries, so a long resume can be extracted in parallel. Whole sections are packed
+    together in order, starting with the header block; a section bigger than a chunk is
+    split between lines. Text that fits is returned as a single chunk.
+    """
+    if estimate_tokens(text) <= chunk_tokens:
+        return [text]
+    pieces = []
+    for _, body in split_sections(text):
+        if estimate_tokens(body) <= chunk_tokens:
+            pieces.append(body)
+        else:
+            pieces.extend(_split_long_section(body, chunk_tokens))
+    chunks = []
+    current = []
+    used = 0
+    for piece in pieces:
+        cost = estimate_tokens(piece) + 2
+        if current and used + cost > chunk_tokens:
+            chunks.append('\n\n'.join(current))
+            current = []
+            used = 0
+        current.append(piece)
+        used += cost
+    if current:
+        chunks.append('\n\n'.join(current))
+    return chunks
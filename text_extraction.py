@@ -0,0 +1,266 @@
+import hashlib
+import io
+import math
+import multiprocessing
+import signal
+import time
+from collections import deque
+# import win32com.client
+
+# PDFs bigger than this are split into page ranges extracted in parallel
+SPLIT_PDF_BYTES = 1024 * 1024
+PAGES_PER_TASK = 8
+# Marks PDF page boundaries so later stages can spot running headers and footers
+PAGE_BREAK = '\f'
+# 'auto' reads PDFs with PyPDF2 and re-reads them with pdfminer's layout analysis when the text looks wrong
+PDF_BACKEND = 'auto'
+# Below this many characters per page, fast extraction probably missed the text
+MIN_CHARS_PER_PAGE = 200
+# Share of over-long words that suggests columns were run together
+MAX_GLUED_WORDS = 0.05
+
+
+def extract_text_from_docx(file_bytes):
+    import docx
+    doc = docx.Document(io.BytesIO(file_bytes))
+    text = [para.text for para in doc.paragraphs]
+    return '\n'.join(text)
+
+# def extract_text_from_doc(doc_path):
+#     word = win32com.client.Dispatch("Word.Application")
+#     doc = word.Documents.Open(doc_path)
+#     text = doc.Content.Text
+#     doc.Close(False)
+#     word.Quit()
+#     return text
+
+def pypdf2_pages(file_bytes, start=0, stop=None):
+    from PyPDF2 import PdfReader
+    reader = PdfReader(io.BytesIO(file_bytes))
+    for page in reader.pages[start:stop]:
+        yield page.extract_text() or ''
+
+def pdfminer_pages(file_bytes, start=0, stop=None):
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+    resources = PDFResourceManager()
+    for number, page in enumerate(PDFPage.get_pages(io.BytesIO(file_bytes))):
+        if number < start:
+            continue
+        if stop is not None and number >= stop:
+            return
+        output = io.StringIO()
+        device = TextConverter(resources, output, laparams=LAParams())
+        PDFPageInterpreter(resources, device).process_page(page)
+        device.close()
+        yield output.getvalue().rstrip(PAGE_BREAK)
+
+PDF_BACKENDS = {
+    'pypdf2': pypdf2_pages,
+    'pdfminer': pdfminer_pages,
+}
+
+def read_pdf_pages(file_bytes, backend, start=0, stop=None, char_budget=None):
+    """
+    Reads page texts lazily, stopping once `char_budget` characters have been read.
+    """
+    pages = []
+    total = 0
+    for text in PDF_BACKENDS[backend](file_bytes, start, stop):
+        pages.append(text)
+        total += len(text)
+        if char_budget is not None and total >= char_budget:
+            break
+    return pages
+
+def looks_garbled(pages):
+    """
+    True when fast extraction lost the text or the layout: almost nothing per page
+    (e.g. text drawn as outlines) or words run together because column gaps were dropped.
+    """
+    text = ''.join(pages)
+    words = [word for word in text.split() if '@' not in word and '/' not in word]
+    if len(text.strip()) < MIN_CHARS_PER_PAGE * len(pages) or not words:
+        return True
+    return sum(1 for word in words if len(word) > 25) / len(words) > MAX_GLUED_WORDS
+
+def extract_text_from_pdf(file_bytes, start=0, stop=None, backend=PDF_BACKEND, char_budget=None):
+    if backend == 'auto':
+        pages = read_pdf_pages(file_bytes, 'pypdf2', start, stop, char_budget)
+        if looks_garbled(pages):
+            pages = read_pdf_pages(file_bytes, 'pdfminer', start, stop, char_budget)
+    else:
+        pages = read_pdf_pages(file_bytes, backend, start, stop, char_budget)
+    return (PAGE_BREAK + '\n').join(pages)
+
+def count_pdf_pages(file_bytes):
+    from PyPDF2 import PdfReader
+    return len(PdfReader(io.BytesIO(file_bytes)).pages)
+
+def extract_text_from_resume(filename, file_bytes, backend=PDF_BACKEND, char_budget=None):
+    if filename.endswith('.docx'):
+        return extract_text_from_docx(file_bytes)
+    # elif filename.endswith('.doc'):
+    #     return extract_text_from_doc(filename)
+    elif filename.endswith('.pdf'):
+        return extract_text_from_pdf(file_bytes, backend=backend, char_budget=char_budget)
+    else:
+        raise ValueError(f"Unsupported file format: {filename}")
+
+def document_key(file_bytes, backend=PDF_BACKEND, char_budget=None):
+    """
+    Content hash identifying a document's extracted text under the given extraction settings.
+    """
+    digest = hashlib.sha256(file_bytes)
+    digest.update(f"{backend}:{char_budget}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _raise_timeout(signum, frame):
+    raise TimeoutError("text extraction timed out")
+
+def _run_task(func, args, timeout):
+    """
+    Runs one extraction task inside a worker process and returns (result, error, seconds).
+    On platforms with SIGALRM the task is interrupted after `timeout` seconds.
+    """
+    use_alarm = hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    started = time.perf_counter()
+    try:
+        return func(*args), None, time.perf_counter() - started
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}", time.perf_counter() - started
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _get(async_result, timeout):
+    try:
+        return async_result.get(timeout=timeout), False
+    except multiprocessing.TimeoutError:
+        return (None, "TimeoutError: text extraction timed out", timeout), True
+    except Exception as e:
+        return (None, f"{type(e).__name__}: {e}", 0.0), False
+
+
+class ExtractionPool:
+    """
+    Process pool for extract_stream that can be kept across calls, e.g. for a worker's
+    whole life. It is started with 'forkserver' ('spawn' where that isn't available), so
+    its processes don't inherit the caller's threads, locks and open connections, and
+    started on first use. A pool left with a hung task is discarded and replaced.
+    """
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.pool = None
+
+    def get(self):
+        if self.pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            self.pool = context.Pool(self.max_workers)
+        return self.pool
+
+    def close(self):
+        """
+        Stops the processes, abandoning any task still running; the next get() starts new ones.
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+
+def extract_stream(files, max_workers=None, timeout=60, window=None, backend=PDF_BACKEND, char_budget=None,
+                   pool=None):
+    """
+    Extracts text from (filename, file_bytes) pairs across a process pool, pulling at most
+    `window` files ahead of the consumer. Large PDFs are split into page ranges; with a
+    `char_budget` the ranges are read in order and the rest skipped once the budget is met.
+    Yields one record per file, in input order, with either 'text' set or an 'error'
+    describing why that file failed, and the worker 'seconds' spent on it. Entries with no bytes (e.g. cache hits) pass straight through.
+    `pool`, an ExtractionPool, is used instead of starting one for this call.
+    """
+    shared = pool is not None
+    owner = pool if shared else ExtractionPool(max_workers)
+    max_workers = owner.max_workers
+    window = window or 2 * max_workers
+    # Guards against workers that cannot be interrupted in-process (e.g. no SIGALRM on Windows)
+    wait_timeout = timeout * (math.ceil(window / max_workers) + 1)
+    pool = owner.get()
+    hung = False
+
+    def submit(filename, file_bytes):
+        if file_bytes is None:
+            return None
+        # Small documents are extracted whole, large PDFs first report their page count
+        if filename.endswith('.pdf') and len(file_bytes) > SPLIT_PDF_BYTES:
+            return 'pages', pool.apply_async(_run_task, (count_pdf_pages, (file_bytes,), timeout))
+        args = (filename, file_bytes, backend, char_budget)
+        return 'text', pool.apply_async(_run_task, (extract_text_from_resume, args, timeout))
+
+    def finish(filename, file_bytes, job):
+        nonlocal hung
+        record = {'filename': filename, 'text': None, 'error': None, 'seconds': 0.0}
+        if job is None:
+            return record
+        kind, async_result = job
+        (result, error, seconds), timed_out = _get(async_result, wait_timeout)
+        record['seconds'] += seconds
+        hung = hung or timed_out
+        if error is not None:
+            record['error'] = error
+        elif kind == 'text':
+            record['text'] = result
+        else:
+            def submit_range(start, budget):
+                args = (file_bytes, start, start + PAGES_PER_TASK, backend, budget)
+                return pool.apply_async(_run_task, (extract_text_from_pdf, args, timeout))
+
+            starts = range(0, result, PAGES_PER_TASK)
+            # Without a budget every range runs in parallel; with one, each waits for the last
+            page_results = [submit_range(start, None) for start in starts] if char_budget is None else starts
+            remaining = char_budget
+            texts = []
+            for page_result in page_results:
+                if char_budget is not None:
+                    page_result = submit_range(page_result, remaining)
+                (text, error, seconds), timed_out = _get(page_result, wait_timeout)
+                record['seconds'] += seconds
+                hung = hung or timed_out
+                if error is not None and record['error'] is None:
+                    record['error'] = error
+                texts.append(text)
+                if char_budget is not None:
+                    remaining -= len(text or '')
+                    if remaining <= 0 or error is not None:
+                        break
+            if record['error'] is None:
+                record['text'] = (PAGE_BREAK + '\n').join(texts)
+        return record
+
+    try:
+        pending = deque()
+        for filename, file_bytes in files:
+            pending.append((filename, file_bytes, submit(filename, file_bytes)))
+            if len(pending) >= window:
+                yield finish(*pending.popleft())
+        while pending:
+            yield finish(*pending.popleft())
+    finally:
+        # A shared pool is kept unless a task in it hung
+        if hung or not shared:
+            owner.close()
+
+
+def extract_all(files, max_workers=None, timeout=60, backend=PDF_BACKEND, char_budget=None):
+    """
+    Extracts text from (filename, file_bytes) pairs and returns one record per file, in input order.
+    """
+    return list(extract_stream(files, max_workers, timeout, backend=backend, char_budget=char_budget))